@@ -4,8 +4,8 @@ Proyección de puntos 3D a 2D usando ecuaciones fundamentales
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+
+from camcalib.projection import focal_K, project_points
 
 # ─────────────────────────────────────────────
 # FUNCIÓN DE PROYECCIÓN BÁSICA (sin matriz K)
@@ -17,17 +17,9 @@ def project_pinhole(points_3d, focal_length):
     points_3d: array (N, 3) con columnas [X, Y, Z]
     focal_length: distancia focal f
     """
-    X = points_3d[:, 0]
-    Y = points_3d[:, 1]
-    Z = points_3d[:, 2]
-    
-    # Evitar división por cero
-    Z = np.where(Z == 0, 1e-6, Z)
-    
-    x_proj = focal_length * X / Z
-    y_proj = focal_length * Y / Z
-    
-    return np.stack([x_proj, y_proj], axis=1)
+    # Equivale a K = diag(f, f, 1) sin punto principal.
+    # z_policy='zero' evita la división por cero (Z == 0 → 1e-6)
+    return project_points(points_3d, focal_K(focal_length), z_policy='zero')
 
 
 # ─────────────────────────────────────────────
@@ -74,54 +66,58 @@ def draw_cube_2d(ax, projected, edges, color='blue', label=''):
         ax.set_title(label)
 
 
-# ─────────────────────────────────────────────
-# EXPERIMENTO: Distintas distancias focales
-# ─────────────────────────────────────────────
-vertices, edges = create_cube(size=1.0, z_offset=5.0)
-
-focal_lengths = [50, 100, 200, 400]
-colors = ['blue', 'green', 'red', 'orange']
-
-fig, axes = plt.subplots(1, 4, figsize=(16, 4))
-fig.suptitle('Efecto de la Distancia Focal en la Proyección Pinhole', fontsize=14)
-
-for ax, f, color in zip(axes, focal_lengths, colors):
-    projected = project_pinhole(vertices, focal_length=f)
-    draw_cube_2d(ax, projected, edges, color=color, label=f'f = {f}px')
-    ax.set_xlim(-150, 150)
-    ax.set_ylim(-150, 150)
-    ax.set_aspect('equal')
-    ax.grid(True, alpha=0.3)
-    ax.axhline(0, color='gray', linewidth=0.5)
-    ax.axvline(0, color='gray', linewidth=0.5)
-    ax.set_xlabel('x (píxeles)')
-    ax.set_ylabel('y (píxeles)')
-
-plt.tight_layout()
-plt.savefig('../media/01_focal_lengths.png', dpi=150, bbox_inches='tight')
-plt.show()
-print("Guardado: media/01_focal_lengths.png")
-
-
-# ─────────────────────────────────────────────
-# EXPERIMENTO: Cubo a diferentes distancias Z
-# ─────────────────────────────────────────────
-fig, axes = plt.subplots(1, 4, figsize=(16, 4))
-fig.suptitle('Efecto de la Distancia Z (perspectiva)', fontsize=14)
-
-z_distances = [3, 5, 8, 15]
-for ax, z, color in zip(axes, z_distances, colors):
-    verts, _ = create_cube(size=1.0, z_offset=z)
-    projected = project_pinhole(verts, focal_length=100)
-    draw_cube_2d(ax, projected, edges, color=color, label=f'Z = {z} unidades')
-    ax.set_xlim(-100, 100)
-    ax.set_ylim(-100, 100)
-    ax.set_aspect('equal')
-    ax.grid(True, alpha=0.3)
-    ax.set_xlabel('x (píxeles)')
-    ax.set_ylabel('y (píxeles)')
-
-plt.tight_layout()
-plt.savefig('../media/01_z_distances.png', dpi=150, bbox_inches='tight')
-plt.show()
-print("Guardado: media/01_z_distances.png")
\ No newline at end of file
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+
+    # ─────────────────────────────────────────────
+    # EXPERIMENTO: Distintas distancias focales
+    # ─────────────────────────────────────────────
+    vertices, edges = create_cube(size=1.0, z_offset=5.0)
+
+    focal_lengths = [50, 100, 200, 400]
+    colors = ['blue', 'green', 'red', 'orange']
+
+    fig, axes = plt.subplots(1, 4, figsize=(16, 4))
+    fig.suptitle('Efecto de la Distancia Focal en la Proyección Pinhole', fontsize=14)
+
+    for ax, f, color in zip(axes, focal_lengths, colors):
+        projected = project_pinhole(vertices, focal_length=f)
+        draw_cube_2d(ax, projected, edges, color=color, label=f'f = {f}px')
+        ax.set_xlim(-150, 150)
+        ax.set_ylim(-150, 150)
+        ax.set_aspect('equal')
+        ax.grid(True, alpha=0.3)
+        ax.axhline(0, color='gray', linewidth=0.5)
+        ax.axvline(0, color='gray', linewidth=0.5)
+        ax.set_xlabel('x (píxeles)')
+        ax.set_ylabel('y (píxeles)')
+
+    plt.tight_layout()
+    plt.savefig('../media/01_focal_lengths.png', dpi=150, bbox_inches='tight')
+    plt.show()
+    print("Guardado: media/01_focal_lengths.png")
+
+
+    # ─────────────────────────────────────────────
+    # EXPERIMENTO: Cubo a diferentes distancias Z
+    # ─────────────────────────────────────────────
+    fig, axes = plt.subplots(1, 4, figsize=(16, 4))
+    fig.suptitle('Efecto de la Distancia Z (perspectiva)', fontsize=14)
+
+    z_distances = [3, 5, 8, 15]
+    for ax, z, color in zip(axes, z_distances, colors):
+        verts, _ = create_cube(size=1.0, z_offset=z)
+        projected = project_pinhole(verts, focal_length=100)
+        draw_cube_2d(ax, projected, edges, color=color, label=f'Z = {z} unidades')
+        ax.set_xlim(-100, 100)
+        ax.set_ylim(-100, 100)
+        ax.set_aspect('equal')
+        ax.grid(True, alpha=0.3)
+        ax.set_xlabel('x (píxeles)')
+        ax.set_ylabel('y (píxeles)')
+
+    plt.tight_layout()
+    plt.savefig('../media/01_z_distances.png', dpi=150, bbox_inches='tight')
+    plt.show()
+    print("Guardado: media/01_z_distances.png")
@@ -4,7 +4,8 @@ Transforma puntos del mundo 3D al sistema de coordenadas de la cámara
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+from camcalib.projection import project_points
 
 
 def rotation_x(angle_deg):
@@ -43,21 +44,9 @@ def project_full(points_world, K, R, t):
     P_cam = R @ P_world + t
     p_img = K @ P_cam / Z
     """
-    # Transformar a coordenadas de cámara
-    # points_world: (N, 3)
-    P_cam = (R @ points_world.T).T + t  # (N, 3)
-    
-    Z = P_cam[:, 2]
-    Z = np.where(Z <= 0, 1e-6, Z)
-    
-    x_norm = P_cam[:, 0] / Z
-    y_norm = P_cam[:, 1] / Z
-    ones = np.ones_like(x_norm)
-    
-    p_norm = np.stack([x_norm, y_norm, ones], axis=0)
-    p_img = K @ p_norm
-    
-    return p_img[:2, :].T
+    # points_world: (N, 3). Los puntos detrás de la cámara (Z <= 0)
+    # se fuerzan a Z = 1e-6 (z_policy='clip')
+    return project_points(points_world, K, R, t, z_policy='clip')
 
 
 def create_cube(size=1.0, z_offset=5.0):
@@ -77,51 +66,54 @@ def draw_cube_2d(ax, projected, edges, color='blue', title=''):
     if title: ax.set_title(title, fontsize=10)
 
 
-K = build_K()
-vertices, edges = create_cube(size=1.5, z_offset=0.0)  # Cubo centrado en origen
-
-# ─────────────────────────────────────────────
-# Experimento: Rotar la cámara alrededor del cubo
-# ─────────────────────────────────────────────
-fig, axes = plt.subplots(2, 4, figsize=(16, 8))
-fig.suptitle('Simulación de Movimiento de Cámara alrededor de un Cubo', fontsize=13)
-
-angles_y = [0, 15, 30, 45, 60, 90, 120, 160]
-t = np.array([0, 0, 5])  # Cámara a 5 unidades frente al cubo
-
-for ax, angle in zip(axes.flat, angles_y):
-    R = rotation_y(angle)
-    proj = project_full(vertices, K, R, t)
-    draw_cube_2d(ax, proj, edges, color='steelblue',
-                 title=f'Rotación Y = {angle}°')
-    ax.set_xlim(0, 640); ax.set_ylim(480, 0)
-    ax.set_aspect('equal'); ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('../media/03_camera_rotation.png', dpi=150, bbox_inches='tight')
-plt.show()
-
-# ─────────────────────────────────────────────
-# Experimento: Traslación de la cámara
-# ─────────────────────────────────────────────
-fig, axes = plt.subplots(1, 4, figsize=(16, 4))
-fig.suptitle('Efecto de la Traslación de la Cámara', fontsize=13)
-
-translations = [
-    (np.array([ 0, 0, 5]), 'Frontal\nt=[0,0,5]'),
-    (np.array([-2, 0, 5]), 'Derecha\nt=[-2,0,5]'),
-    (np.array([ 0,-2, 5]), 'Abajo\nt=[0,-2,5]'),
-    (np.array([ 2, 2, 5]), 'Diagonal\nt=[2,2,5]'),
-]
-R = np.eye(3)  # Sin rotación
-
-for ax, (t_vec, title) in zip(axes, translations):
-    proj = project_full(vertices, K, R, t_vec)
-    draw_cube_2d(ax, proj, edges, color='darkorange', title=title)
-    ax.set_xlim(0, 640); ax.set_ylim(480, 0)
-    ax.set_aspect('equal'); ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('../media/03_camera_translation.png', dpi=150, bbox_inches='tight')
-plt.show()
-print("Guardados en media/")
\ No newline at end of file
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    K = build_K()
+    vertices, edges = create_cube(size=1.5, z_offset=0.0)  # Cubo centrado en origen
+
+    # ─────────────────────────────────────────────
+    # Experimento: Rotar la cámara alrededor del cubo
+    # ─────────────────────────────────────────────
+    fig, axes = plt.subplots(2, 4, figsize=(16, 8))
+    fig.suptitle('Simulación de Movimiento de Cámara alrededor de un Cubo', fontsize=13)
+
+    angles_y = [0, 15, 30, 45, 60, 90, 120, 160]
+    t = np.array([0, 0, 5])  # Cámara a 5 unidades frente al cubo
+
+    for ax, angle in zip(axes.flat, angles_y):
+        R = rotation_y(angle)
+        proj = project_full(vertices, K, R, t)
+        draw_cube_2d(ax, proj, edges, color='steelblue',
+                     title=f'Rotación Y = {angle}°')
+        ax.set_xlim(0, 640); ax.set_ylim(480, 0)
+        ax.set_aspect('equal'); ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig('../media/03_camera_rotation.png', dpi=150, bbox_inches='tight')
+    plt.show()
+
+    # ─────────────────────────────────────────────
+    # Experimento: Traslación de la cámara
+    # ─────────────────────────────────────────────
+    fig, axes = plt.subplots(1, 4, figsize=(16, 4))
+    fig.suptitle('Efecto de la Traslación de la Cámara', fontsize=13)
+
+    translations = [
+        (np.array([ 0, 0, 5]), 'Frontal\nt=[0,0,5]'),
+        (np.array([-2, 0, 5]), 'Derecha\nt=[-2,0,5]'),
+        (np.array([ 0,-2, 5]), 'Abajo\nt=[0,-2,5]'),
+        (np.array([ 2, 2, 5]), 'Diagonal\nt=[2,2,5]'),
+    ]
+    R = np.eye(3)  # Sin rotación
+
+    for ax, (t_vec, title) in zip(axes, translations):
+        proj = project_full(vertices, K, R, t_vec)
+        draw_cube_2d(ax, proj, edges, color='darkorange', title=title)
+        ax.set_xlim(0, 640); ax.set_ylim(480, 0)
+        ax.set_aspect('equal'); ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig('../media/03_camera_translation.png', dpi=150, bbox_inches='tight')
+    plt.show()
+    print("Guardados en media/")
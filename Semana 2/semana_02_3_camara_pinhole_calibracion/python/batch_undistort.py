@@ -0,0 +1,64 @@
+"""
+Corrección de distorsión por lotes (directorios de imágenes o videos)
+(línea de comandos de camcalib.batch)
+
+Uso:
+    python batch_undistort.py ../calibration_images ../undistorted
+    python batch_undistort.py captura.mp4 ../frames --crop --resume
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from camcalib import Undistorter
+from camcalib.batch import input_images, output_names, run
+from camcalib.bundle import load_bundle
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('src', help='carpeta de imágenes o archivo de video')
+    parser.add_argument('out_dir', help='carpeta de salida')
+    parser.add_argument('--bundle', default='../python/calibration.calib',
+                        help='paquete de 04_calibration.py (si no existe se usan --K y --dist)')
+    parser.add_argument('--K', default='../python/calibration_K.npy')
+    parser.add_argument('--dist', default='../python/calibration_dist.npy')
+    parser.add_argument('--alpha', type=float, default=1.0,
+                        help='0 = recortar bordes negros, 1 = conservar todos los píxeles')
+    parser.add_argument('--crop', action='store_true',
+                        help='recortar a la región válida (roi)')
+    parser.add_argument('--decode-workers', type=int, default=4)
+    parser.add_argument('--encode-workers', type=int, default=4)
+    parser.add_argument('--queue-depth', type=int, default=16,
+                        help='imágenes en vuelo por etapa (acota la memoria)')
+    parser.add_argument('--resume', action='store_true',
+                        help='saltar las imágenes ya escritas en out_dir')
+    parser.add_argument('--ext', default='.jpg', help='formato de salida')
+    parser.add_argument('--quality', type=int, default=95, help='calidad JPEG')
+    parser.add_argument('--map-cache', default='../.undistort_maps',
+                        help='carpeta de mapas de corrección precalculados')
+    args = parser.parse_args()
+
+    if os.path.exists(args.bundle):
+        bundle = load_bundle(args.bundle)
+        K, dist = bundle.K, bundle.dist
+        # Los mapas del paquete solo sirven si se pidió el mismo alpha
+        undistorter = (Undistorter.from_bundle(bundle, cache_dir=args.map_cache)
+                       if bundle.alpha == args.alpha else None)
+    else:
+        K, dist, undistorter = np.load(args.K), np.load(args.dist), None
+
+    if os.path.isdir(args.src):
+        try:
+            output_names(input_images(args.src), args.ext)
+        except ValueError as e:
+            raise SystemExit(f"Entrada inválida: {e}")
+    try:
+        run(args.src, args.out_dir, K, dist, undistorter=undistorter,
+            alpha=args.alpha, crop=args.crop, decode_workers=args.decode_workers,
+            encode_workers=args.encode_workers, depth=args.queue_depth,
+            resume=args.resume, ext=args.ext, quality=args.quality,
+            cache_dir=args.map_cache)
+    except OSError as e:
+        raise SystemExit(str(e))
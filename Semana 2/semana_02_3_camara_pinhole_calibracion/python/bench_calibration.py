@@ -0,0 +1,308 @@
+"""
+Benchmark de precisión y rendimiento de la calibración completa
+Para cada combinación de número de imágenes, resolución y ruido:
+    1. genera un dataset sintético con verdad de terreno (camcalib.dataset)
+    2. calibra con camcalib.calibration.calibrate_camera (el pipeline de
+       producción): decodifica, detecta esquinas, las refina y calibra
+    3. calcula el error de reproyección y corrige la distorsión
+De cada etapa registra tiempo, imágenes/s y pico de memoria (RSS); los
+tiempos de decodificación, detección, subpíxel y calibración salen de los
+cronómetros de camcalib.metrics dentro de calibrate_camera. De la
+calibración registra el error de K, dist y de las esquinas contra la verdad
+de terreno.
+Los resultados se agregan como una línea JSON por combinación (--out) y se
+pueden comparar contra una ejecución anterior (--baseline) para detectar
+regresiones; en ese caso el código de salida es 1.
+
+Uso:
+    python bench_calibration.py                                  # barrido por defecto
+    python bench_calibration.py --counts 20 80 --resolutions 1280x960 --noise 0 3 8
+    python bench_calibration.py --baseline bench_v1.jsonl --out bench_v2.jsonl
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import cv2
+import numpy as np
+
+from camcalib import metrics
+from camcalib.calibration import calibrate_camera
+from camcalib.dataset import generate_dataset, load_manifest, parse_resolution
+from camcalib.reprojection import reprojection_errors
+from camcalib.undistorter import Undistorter
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage
+    resource = None
+
+STAGES = ('generate', 'decode', 'detect', 'subpix', 'calibrate', 'reprojection', 'undistort')
+PARAMS = ('fx', 'fy', 'cx', 'cy', 'k1', 'k2', 'p1', 'p2', 'k3')
+
+
+def _reset_peak_rss():
+    """Reinicia el pico de RSS del proceso (Linux); False si no se puede."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Pico de RSS desde el último reinicio (VmHWM) o de toda la ejecución."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _ru_maxrss_mb('RUSAGE_SELF')
+
+
+def _ru_maxrss_mb(who):
+    if resource is None:
+        return 0.0
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss: bytes en macOS, kB en Linux
+    return resource.getrusage(getattr(resource, who)).ru_maxrss * scale / 1024 ** 2
+
+
+def _children_peak_rss_mb():
+    """
+    Pico de RSS del mayor proceso hijo ya terminado (los workers del pool de
+    generación). El SO no permite reiniciarlo: es el máximo desde el inicio.
+    """
+    return _ru_maxrss_mb('RUSAGE_CHILDREN')
+
+
+def _stage_seconds(state, stage):
+    """Tiempo total acumulado por metrics.timer('calib_stage_seconds', stage=...)."""
+    hist = state['histograms'].get(('calib_stage_seconds', (('stage', stage),)))
+    return hist[1] if hist else 0.0
+
+
+def _stage(seconds, n_images, peak_rss_mb):
+    return {'seconds': round(seconds, 6),
+            'images_per_sec': round(n_images / seconds, 3) if seconds > 0 else None,
+            'peak_rss_mb': round(peak_rss_mb, 1)}
+
+
+def run_config(n_images, resolution, noise, seed, supersample, workers, chessboard, work_dir):
+    """Ejecuta todas las etapas para una combinación y retorna su registro."""
+    cols, rows, square = chessboard
+    stages = {}
+
+    _reset_peak_rss()
+    t0 = time.perf_counter()
+    generate_dataset(work_dir, n_cameras=1, views_per_camera=n_images, seed=seed,
+                     resolutions=[resolution], board=chessboard, noise_sigma=noise,
+                     supersample=supersample, workers=workers)
+    # Los workers del pool de generación son procesos hijos: su pico cuenta
+    stages['generate'] = _stage(time.perf_counter() - t0, n_images,
+                                max(_peak_rss_mb(), _children_peak_rss_mb()))
+
+    manifest = load_manifest(work_dir)
+    truth = manifest['cameras'][0]
+    images = manifest['images']
+    truth_by_file = {os.path.normpath(os.path.join(work_dir, item['file'])): item['corners']
+                     for item in images}
+
+    # Pipeline de producción en el mismo proceso (workers=1), con los
+    # cronómetros de camcalib.metrics; el pico de RSS es el de la llamada completa
+    _reset_peak_rss()
+    was_enabled = metrics.enabled()
+    metrics.enable()
+    metrics.reset()
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            result = calibrate_camera(os.path.join(work_dir, 'cam_00', '*.jpg'), (cols, rows),
+                                      square, workers=1, streaming=True, preview_size=0)
+        state = metrics.snapshot()
+    finally:
+        metrics.reset()
+        if not was_enabled:
+            metrics.disable()
+    rss = _peak_rss_mb()
+    detection = result[8] if result is not None else []
+    n_found = sum(found for _, _, _, found in detection)
+    stages['decode'] = _stage(_stage_seconds(state, 'imread'), n_images, rss)
+    stages['detect'] = _stage(_stage_seconds(state, 'find_chessboard'), n_images, rss)
+    stages['subpix'] = _stage(_stage_seconds(state, 'corner_subpix'), n_found, rss)
+
+    record = {'config': {'images': n_images, 'width': resolution[0], 'height': resolution[1],
+                         'noise': noise, 'seed': seed, 'supersample': supersample},
+              'detected': n_found, 'stages': stages}
+    if result is None:
+        record['error'] = f'solo {n_found} imágenes detectadas'
+        return record
+
+    rms, K, dist, rvecs, tvecs, obj_points, img_points = result[:7]
+    truth_corners = [truth_by_file[os.path.normpath(fname)]
+                     for fname, _, _, found in detection if found]
+    stages['calibrate'] = _stage(_stage_seconds(state, 'calibrate'), n_found, rss)
+
+    _reset_peak_rss()
+    t0 = time.perf_counter()
+    errors = reprojection_errors(obj_points, img_points, rvecs, tvecs, K, dist)
+    stages['reprojection'] = _stage(time.perf_counter() - t0, n_found, _peak_rss_mb())
+
+    # Corrección de distorsión: solo se cronometra el remap (los mapas se
+    # construyen en la primera imagen); la decodificación queda fuera
+    _reset_peak_rss()
+    undistorter = Undistorter(K, dist)
+    t_undistort = 0.0
+    for item in images:
+        img = cv2.imread(os.path.join(work_dir, item['file']), cv2.IMREAD_GRAYSCALE)
+        t0 = time.perf_counter()
+        undistorter.undistort(img)
+        t_undistort += time.perf_counter() - t0
+    stages['undistort'] = _stage(t_undistort, n_images, _peak_rss_mb())
+
+    # Precisión contra la verdad de terreno
+    estimated = np.concatenate([[K[0, 0], K[1, 1], K[0, 2], K[1, 2]], dist.ravel()[:5]])
+    expected = np.concatenate([[truth['K'][0, 0], truth['K'][1, 1],
+                                truth['K'][0, 2], truth['K'][1, 2]], truth['dist'][:5]])
+    corner_err = np.linalg.norm(np.concatenate(img_points).reshape(-1, 2) -
+                                np.concatenate(truth_corners).reshape(-1, 2), axis=1)
+    record['accuracy'] = {
+        'rms': float(rms),
+        'reprojection_mean': errors.mean,
+        'param_error': {name: float(abs(e - x)) for name, e, x in
+                        zip(PARAMS, estimated, expected)},
+        'focal_rel_error': float(np.abs(estimated[:2] / expected[:2] - 1).max()),
+        'corner_error_rms': float(np.sqrt(np.mean(corner_err ** 2))),
+        'corner_error_max': float(corner_err.max()),
+    }
+    return record
+
+
+def environment():
+    """Versiones y máquina, para poder comparar ejecuciones entre releases."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit,
+            'python': platform.python_version(), 'opencv': cv2.__version__,
+            'numpy': np.__version__, 'machine': platform.machine(),
+            'cpus': os.cpu_count()}
+
+
+def _config_key(record):
+    c = record['config']
+    return (c['images'], c['width'], c['height'], c['noise'], c['seed'], c['supersample'])
+
+
+def compare(records, baseline_path, tolerance):
+    """
+    Compara contra una ejecución anterior: una etapa es regresión si sus
+    imágenes/s caen más de `tolerance` (fracción); la precisión, si el error
+    relativo de la focal o el RMS de las esquinas crece más de `tolerance`.
+    Retorna la lista de regresiones encontradas.
+    """
+    baseline = {}
+    with open(baseline_path) as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                baseline[_config_key(rec)] = rec
+
+    regressions = []
+    for rec in records:
+        base = baseline.get(_config_key(rec))
+        if base is None:
+            continue
+        label = '{images} img {width}x{height} ruido {noise}'.format(**rec['config'])
+        for stage, cur in rec['stages'].items():
+            old = base['stages'].get(stage)
+            if not old or not old['images_per_sec'] or not cur['images_per_sec']:
+                continue
+            if cur['images_per_sec'] < old['images_per_sec'] * (1 - tolerance):
+                regressions.append(f"{label}: {stage} {old['images_per_sec']:.1f} → "
+                                   f"{cur['images_per_sec']:.1f} imágenes/s")
+        if 'accuracy' in rec and 'accuracy' in base:
+            for metric in ('focal_rel_error', 'corner_error_rms'):
+                old, cur = base['accuracy'][metric], rec['accuracy'][metric]
+                # Margen absoluto pequeño: no alarmar por diferencias de redondeo
+                if cur > old * (1 + tolerance) + 1e-4:
+                    regressions.append(f"{label}: {metric} {old:.5f} → {cur:.5f}")
+    return regressions
+
+
+def print_record(record):
+    c = record['config']
+    print(f"\n{c['images']} imágenes {c['width']}x{c['height']}, ruido {c['noise']} "
+          f"→ {record['detected']} detectadas")
+    print(f"  {'etapa':<14}{'tiempo (s)':>12}{'imágenes/s':>12}{'pico RSS (MB)':>15}")
+    for stage in STAGES:
+        s = record['stages'].get(stage)
+        if s:
+            ips = f"{s['images_per_sec']:.1f}" if s['images_per_sec'] else '-'
+            print(f"  {stage:<14}{s['seconds']:>12.3f}{ips:>12}{s['peak_rss_mb']:>15.1f}")
+    if 'accuracy' in record:
+        a = record['accuracy']
+        p = a['param_error']
+        print(f"  RMS {a['rms']:.4f} px | esquinas vs. verdad: RMS {a['corner_error_rms']:.4f} px, "
+              f"máx {a['corner_error_max']:.4f} px")
+        print(f"  |Δ| fx {p['fx']:.3f}  fy {p['fy']:.3f}  cx {p['cx']:.3f}  cy {p['cy']:.3f} px | "
+              f"k1 {p['k1']:.5f}  k2 {p['k2']:.5f}  p1 {p['p1']:.6f}  p2 {p['p2']:.6f}  "
+              f"k3 {p['k3']:.5f}")
+    else:
+        print(f"  {record.get('error')}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--counts', type=int, nargs='+', default=[20, 60])
+    parser.add_argument('--resolutions', type=parse_resolution, nargs='+',
+                        default=[(640, 480), (1280, 960)])
+    parser.add_argument('--noise', type=float, nargs='+', default=[0.0, 3.0, 8.0],
+                        help='ruido del sensor (niveles de gris)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--supersample', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='procesos para generar las imágenes')
+    parser.add_argument('--board', type=float, nargs=3, default=(9, 6, 30.0),
+                        metavar=('COLS', 'ROWS', 'SQUARE_MM'))
+    parser.add_argument('--out', default='bench_calibration.jsonl',
+                        help='archivo JSONL donde se agregan los resultados')
+    parser.add_argument('--baseline', help='JSONL de una ejecución anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='caída relativa tolerada antes de marcar una regresión')
+    args = parser.parse_args()
+
+    cols, rows, square = args.board
+    chessboard = (int(cols), int(rows), square)
+    env = environment()
+    records = []
+    for n_images in args.counts:
+        for resolution in args.resolutions:
+            for noise in args.noise:
+                with tempfile.TemporaryDirectory(prefix='bench_calib_') as work_dir:
+                    record = run_config(n_images, resolution, noise, args.seed,
+                                        args.supersample, args.workers, chessboard, work_dir)
+                record['environment'] = env
+                print_record(record)
+                records.append(record)
+                with open(args.out, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+    print(f"\nResultados agregados a {args.out}")
+
+    if args.baseline:
+        regressions = compare(records, args.baseline, args.tolerance)
+        print(f"\nComparación con {args.baseline}: {len(regressions)} regresiones")
+        for r in regressions:
+            print(f"  ✗ {r}")
+        sys.exit(1 if regressions else 0)
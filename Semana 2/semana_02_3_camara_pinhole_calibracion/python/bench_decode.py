@@ -0,0 +1,144 @@
+"""
+Benchmark: decodificación BGR + cvtColor vs. escala de grises directa y reducida
+Genera (o usa) una carpeta de JPEG grandes y compara, por imagen, el tiempo
+de decodificación y el pico de memoria de cada forma de leerlas; después
+compara la detección completa (lectura + tablero + subpíxel) con la ruta
+anterior (imread BGR + cvtColor) y con camcalib.decode, con y sin la
+decodificación reducida del nivel grueso. Parte de las imágenes generadas
+no tiene tablero, como en una captura real: sin tablero, la detección
+termina buscándolo a resolución completa (decenas de segundos con 12 MP),
+que es justo lo que evita la decodificación reducida.
+
+Uso:
+    python bench_decode.py                         # 9 imágenes de 4000x3000
+    python bench_decode.py --dir ../fotos_20mp --pyramid 3
+    python bench_decode.py --resolution 5472x3648 --images 20 --empty 2
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from camcalib.corner_detection import detect_corners, find_corners
+from camcalib.dataset import generate_dataset, parse_resolution
+from camcalib.decode import ImageLoader
+
+
+def make_images(out_dir, resolution, n_images, n_empty, seed):
+    """Tableros sintéticos (camcalib.dataset) + imágenes sin tablero."""
+    generate_dataset(out_dir, n_cameras=1, views_per_camera=n_images, seed=seed,
+                     resolutions=[resolution], supersample=1)
+    rng = np.random.default_rng(seed)
+    w, h = resolution
+    for i in range(n_empty):
+        # Fondo suave (manchas grandes) con ruido de sensor, sin tablero
+        blobs = rng.uniform(40, 220, (12, 16)).astype(np.float32)
+        base = cv2.resize(blobs, (w, h), interpolation=cv2.INTER_CUBIC)
+        img = np.clip(base + rng.normal(0, 3, base.shape), 0, 255).astype(np.uint8)
+        cv2.imwrite(os.path.join(out_dir, f'empty_{i:03d}.jpg'), img,
+                    [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return sorted(glob.glob(os.path.join(out_dir, '**', '*.jpg'), recursive=True))
+
+
+def measure(fn, paths, repeats):
+    """
+    (ms por imagen, pico de memoria en MB de una sola imagen, resultados).
+    El pico se mide con tracemalloc (numpy le reporta sus arreglos) en una
+    pasada aparte; con repeats=0 se mide todo en esa misma pasada.
+    """
+    times, peaks, results = [], [], []
+    for path in paths:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        results.append(fn(path))
+        elapsed = time.perf_counter() - t0
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if repeats:
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                fn(path)
+            elapsed = (time.perf_counter() - t0) / repeats
+        times.append(elapsed)
+    return np.mean(times) * 1000, max(peaks) / 1e6, results
+
+
+def bgr_then_gray(path):
+    img = cv2.imread(path)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def run(paths, board, pyramid, repeats):
+    h, w = cv2.imread(paths[0], cv2.IMREAD_GRAYSCALE).shape
+    size_mb = sum(os.path.getsize(p) for p in paths) / len(paths) / 1e6
+    print(f"{len(paths)} imágenes de {w}x{h} ({w * h / 1e6:.1f} MP, {size_mb:.1f} MB en disco)\n")
+
+    reader = ImageLoader()
+    methods = [
+        ('BGR + cvtColor', bgr_then_gray),
+        ('gris (imread)', lambda p: cv2.imread(p, cv2.IMREAD_GRAYSCALE)),
+        ('gris + buffer', reader.read_gray),
+        ('reducida x2', lambda p: reader.read_gray(p, 2)),
+        ('reducida x4', lambda p: reader.read_gray(p, 4)),
+        ('reducida x8', lambda p: reader.read_gray(p, 8)),
+    ]
+    print(f"{'decodificación':<18}{'ms/imagen':>11}{'pico MB':>10}")
+    baseline = None
+    for name, fn in methods:
+        ms, peak, _ = measure(fn, paths, repeats)
+        speedup = '' if baseline is None else f'   x{baseline / ms:.1f}'
+        baseline = baseline or ms
+        print(f"{name:<18}{ms:>11.1f}{peak:>10.1f}{speedup}")
+    print(f"(buffer de archivo reutilizado: {reader.reallocations} realocaciones)")
+
+    def old_detect(path):
+        gray = bgr_then_gray(path)
+        return find_corners(gray, board, pyramid_levels=pyramid)[0]
+
+    pipelines = [
+        ('BGR + cvtColor', old_detect),
+        ('gris directo', lambda p: detect_corners(p, board, return_image=False,
+                                                  pyramid_levels=pyramid)[4]),
+        ('gris + reducida', lambda p: detect_corners(p, board, return_image=False,
+                                                     pyramid_levels=pyramid,
+                                                     reduced_decode=True)[4]),
+    ]
+    print(f"\n{'detección (pirámide x' + str(pyramid) + ')':<24}{'ms/imagen':>11}"
+          f"{'pico MB':>10}{'tableros':>10}")
+    baseline = None
+    for name, fn in pipelines:
+        # Una sola pasada: sin tablero la búsqueda a resolución completa tarda
+        ms, peak, results = measure(fn, paths, 0)
+        found = sum(bool(r) for r in results)
+        speedup = '' if baseline is None else f'   x{baseline / ms:.1f}'
+        baseline = baseline or ms
+        print(f"{name:<24}{ms:>11.1f}{peak:>10.1f}{found:>6}/{len(paths):<3}{speedup}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--dir', help='carpeta con JPEG propios (por defecto se generan)')
+    parser.add_argument('--resolution', type=parse_resolution, default=(4000, 3000))
+    parser.add_argument('--images', type=int, default=8, help='imágenes con tablero a generar')
+    parser.add_argument('--empty', type=int, default=1, help='imágenes sin tablero a generar')
+    parser.add_argument('--board', type=int, nargs=2, default=(9, 6), metavar=('COLS', 'ROWS'))
+    parser.add_argument('--pyramid', type=int, default=2, help='niveles de la detección coarse-to-fine')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # Comparar el costo por imagen en un solo núcleo
+    if args.dir:
+        paths = sorted(p for p in glob.glob(os.path.join(args.dir, '*'))
+                       if p.lower().endswith(('.jpg', '.jpeg')))
+        run(paths, tuple(args.board), args.pyramid, args.repeats)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = make_images(tmp, args.resolution, args.images, args.empty, args.seed)
+            run(paths, tuple(args.board), args.pyramid, args.repeats)
@@ -0,0 +1,72 @@
+"""
+Benchmark: proyección por lotes (projection.py) vs. un bucle de
+proyecciones de una sola cámara, como lo hacía project_full (03).
+Con más de un núcleo mide también el reparto de cámaras entre hilos
+(--workers) contra un solo hilo.
+
+Uso:
+    python bench_projection.py                          # 1M puntos x 100 poses
+    python bench_projection.py --points 200000 --poses 20 --workers 8
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from camcalib.projection import project_points
+
+
+def project_full_loop(points_world, K, R, t):
+    """Implementación anterior de project_full, una pose por llamada."""
+    P_cam = (R @ points_world.T).T + t
+    Z = P_cam[:, 2]
+    Z = np.where(Z <= 0, 1e-6, Z)
+    p_norm = np.stack([P_cam[:, 0] / Z, P_cam[:, 1] / Z, np.ones_like(Z)], axis=0)
+    return (K @ p_norm)[:2, :].T
+
+
+def run(n_points, n_poses, workers, seed):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-1, 1, (n_points, 3)) + [0, 0, 5]
+    K = np.array([[800, 0, 640], [0, 800, 480], [0, 0, 1]], dtype=np.float64)
+    R = np.stack([cv2.Rodrigues(rng.normal(0, 0.2, 3))[0] for _ in range(n_poses)])
+    t = rng.normal(0, 0.5, (n_poses, 3))
+    workers = os.cpu_count() if workers is None else workers
+    print(f"{n_points} puntos x {n_poses} poses, {os.cpu_count()} núcleo(s)\n")
+
+    t0 = time.perf_counter()
+    for i in range(n_poses):
+        project_full_loop(points, K, R[i], t[i])
+    loop = time.perf_counter() - t0
+    print(f"{'bucle (float64)':<30}{loop:8.3f} s")
+
+    threads = (1, workers) if workers > 1 else (1,)
+    for dtype, n_threads in [(d, w) for d in (np.float64, np.float32) for w in threads]:
+        out = np.empty((n_poses, n_points, 2), dtype=dtype)
+        t0 = time.perf_counter()
+        project_points(points, K, R, t, out=out, workers=n_threads)
+        elapsed = time.perf_counter() - t0
+
+        # Verificar contra la implementación anterior en algunas poses
+        tol = 0 if dtype == np.float64 else 1e-2
+        for i in rng.choice(n_poses, min(3, n_poses), replace=False):
+            ref = project_full_loop(points, K, R[i], t[i])
+            assert np.allclose(out[i], ref, rtol=1e-12 if tol == 0 else 1e-5, atol=tol)
+
+        name = f"lotes ({np.dtype(dtype).name}, {n_threads} hilo{'s' if n_threads > 1 else ''})"
+        print(f"{name:<30}{elapsed:8.3f} s   x{loop / elapsed:.1f}")
+        del out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--poses', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='hilos de project_points (por defecto, todos los núcleos)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.points, args.poses, args.workers, args.seed)
@@ -0,0 +1,82 @@
+"""
+Benchmark: detección directa vs. detección coarse-to-fine (pirámide)
+Renderiza las vistas de generate_synthetic_calibration.py a alta resolución
+(por defecto ~20 MP) y compara tiempo, tasa de detección y error de las
+esquinas respecto a su posición real proyectada.
+
+Uso:
+    python bench_pyramid_detection.py                  # escala 4 → 5120x3840
+    python bench_pyramid_detection.py --scale 2 --levels 1 2 3
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import generate_synthetic_calibration as synth
+from camcalib.corner_detection import find_corners
+
+
+def render_view(view, scale, rng, noise_sigma=3.0):
+    """Renderiza una vista sintética escalada y retorna (gray, esquinas reales)."""
+    rx, ry, rz, tx, ty, tz = view
+    K = synth.K_real.copy()
+    K[:2] *= scale
+    w, h = int(synth.IMG_W * scale), int(synth.IMG_H * scale)
+
+    rvec = synth.euler_to_rvec(rx, ry, rz)
+    tvec = np.array([[tx], [ty], [tz]], dtype=np.float64)
+    truth, _ = cv2.projectPoints(synth.objp, rvec, tvec, K, synth.dist_real)
+    truth = truth.reshape(-1, 2)
+
+    img = synth.render_chessboard(rvec, tvec, K, synth.dist_real, w, h,
+                                  synth.COLS, synth.ROWS, synth.SQUARE_MM)
+    noise = rng.normal(0, noise_sigma, img.shape)
+    gray = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return gray, truth
+
+
+def run(scale, levels_list, repeats, seed):
+    rng = np.random.default_rng(seed)
+    views = [render_view(v, scale, rng) for v in synth.views_params]
+    h, w = views[0][0].shape
+    print(f"{len(views)} vistas de {w}x{h} ({w * h / 1e6:.1f} MP)\n")
+
+    board = (synth.COLS, synth.ROWS)
+    print(f"{'método':<14}{'detectadas':>12}{'ms/imagen':>12}{'RMS (px)':>11}{'máx (px)':>11}")
+    baseline = None
+    for levels in [0] + list(levels_list):
+        times, errors, found_count = [], [], 0
+        for gray, truth in views:
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                found, corners = find_corners(gray, board, pyramid_levels=levels)
+            times.append((time.perf_counter() - t0) / repeats)
+            if found:
+                found_count += 1
+                errors.append(np.linalg.norm(corners.reshape(-1, 2) - truth, axis=1))
+
+        ms = np.mean(times) * 1000
+        name = 'directa' if levels == 0 else f'pirámide x{levels}'
+        if errors:
+            err = np.concatenate(errors)
+            rms, worst = np.sqrt(np.mean(err ** 2)), err.max()
+        else:
+            rms = worst = float('nan')
+        speedup = '' if baseline is None else f'   x{baseline / ms:.1f}'
+        baseline = baseline or ms
+        print(f"{name:<14}{found_count:>8}/{len(views):<3}{ms:>12.1f}{rms:>11.4f}{worst:>11.4f}{speedup}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', type=float, default=4.0,
+                        help='factor sobre la resolución sintética de 1280x960')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 3],
+                        help='profundidades de pirámide a comparar')
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.scale, args.levels, args.repeats, args.seed)
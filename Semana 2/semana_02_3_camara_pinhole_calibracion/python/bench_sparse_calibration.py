@@ -0,0 +1,92 @@
+"""
+Benchmark: cv2.calibrateCamera vs. ajuste de haces disperso con muchas vistas
+Genera esquinas sintéticas (sin renderizar imágenes: poses al azar de
+camcalib.dataset proyectadas con ruido) para cantidades crecientes de vistas
+y compara tiempo, pico de memoria (tracemalloc solo ve lo que reserva NumPy,
+así que para OpenCV se reporta el aumento del RSS) y la diferencia de K,
+dist y RMS entre ambos solvers.
+
+Uso:
+    python bench_sparse_calibration.py                       # 50 a 3000 vistas
+    python bench_sparse_calibration.py --views 100 1000 10000 --opencv-max 1000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from camcalib.bundle_adjustment import calibrate_sparse
+from camcalib.dataset import sample_camera, sample_pose
+
+
+def _rss_mb():
+    """RSS actual del proceso (Linux); 0 si no se puede leer."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def make_views(n_views, board, square_size, noise, rng):
+    """Cámara al azar y n_views vistas del tablero con ruido de detección."""
+    camera = sample_camera(rng)
+    cols, rows = board
+    objp = np.zeros((rows * cols, 3), dtype=np.float32)
+    objp[:, :2] = np.mgrid[0:cols, 0:rows].T.reshape(-1, 2) * square_size
+    obj_points, img_points = [], []
+    for _ in range(n_views):
+        _, _, proj = sample_pose(rng, camera, objp, cols, rows, square_size)
+        obj_points.append(objp)
+        img_points.append((proj + rng.normal(0, noise, proj.shape)).astype(np.float32))
+    return camera, obj_points, img_points
+
+
+def run(view_counts, opencv_max, board, noise, seed):
+    print(f"{'vistas':>7}{'OpenCV s':>10}{'disperso s':>12}{'x':>7}{'MB disperso':>13}"
+          f"{'iter':>6}{'Δ RMS':>10}{'Δ K máx':>10}{'Δ dist máx':>12}")
+    for n in view_counts:
+        rng = np.random.default_rng(seed)
+        camera, obj_points, img_points = make_views(n, board, 25.0, noise, rng)
+        size = (camera['width'], camera['height'])
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        sparse = calibrate_sparse(obj_points, img_points, size)
+        t_sparse = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+        if n > opencv_max:
+            print(f"{n:>7}{'-':>10}{t_sparse:>12.2f}{'':>7}{peak:>13.1f}{sparse.iterations:>6}")
+            continue
+        rss0 = _rss_mb()
+        t0 = time.perf_counter()
+        rms, K, dist, _, _ = cv2.calibrateCamera(obj_points, img_points, size, None, None)
+        t_cv = time.perf_counter() - t0
+        params = K[[0, 1, 0, 1], [0, 1, 2, 2]]
+        d_K = np.abs(sparse.K[[0, 1, 0, 1], [0, 1, 2, 2]] - params).max()
+        d_dist = np.abs(sparse.dist.ravel() - dist.ravel()).max()
+        print(f"{n:>7}{t_cv:>10.2f}{t_sparse:>12.2f}{t_cv / t_sparse:>7.1f}{peak:>13.1f}"
+              f"{sparse.iterations:>6}{sparse.rms - rms:>10.1e}{d_K:>10.1e}{d_dist:>12.1e}"
+              f"   (OpenCV +{_rss_mb() - rss0:.0f} MB RSS)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--views', type=int, nargs='+', default=[50, 200, 1000, 3000])
+    parser.add_argument('--opencv-max', type=int, default=3000,
+                        help='no correr cv2.calibrateCamera con más vistas que esto')
+    parser.add_argument('--board', type=int, nargs=2, default=(9, 6), metavar=('COLS', 'ROWS'))
+    parser.add_argument('--noise', type=float, default=0.3, help='ruido de las esquinas (px)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # Comparar en un solo núcleo
+    run(args.views, args.opencv_max, tuple(args.board), args.noise, args.seed)
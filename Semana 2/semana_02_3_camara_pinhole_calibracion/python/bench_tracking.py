@@ -0,0 +1,128 @@
+"""
+Benchmark: detección cuadro a cuadro vs. seguimiento temporal de las esquinas
+Renderiza una secuencia continua (como un video a mano alzada) que pasa
+suavemente por las poses de generate_synthetic_calibration.py y compara el
+tiempo por cuadro, la tasa de detección y el error de las esquinas respecto
+a su posición real entre findChessboardCorners en cada cuadro (directa y con
+pirámide) y camcalib.tracking.CornerTracker. El fondo liso es el caso fácil
+para findChessboardCorners; --clutter pone detrás del tablero rectángulos
+al azar (como una habitación), que es donde la detección se vuelve cara.
+
+Uso:
+    python bench_tracking.py                          # 120 cuadros de 1280x960
+    python bench_tracking.py --frames 300 --scale 2
+    python bench_tracking.py --step 2                 # movimiento más rápido
+    python bench_tracking.py --scale 3 --clutter
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import generate_synthetic_calibration as synth
+from camcalib.corner_detection import find_corners
+from camcalib.tracking import CornerTracker
+
+
+def pose_sequence(n_frames, step):
+    """
+    n_frames poses interpoladas (coseno) entre vistas consecutivas de
+    synth.views_params; `step` = vistas recorridas cada 30 cuadros.
+    """
+    views = np.asarray(synth.views_params, dtype=np.float64)
+    t = np.arange(n_frames) * step / 30.0
+    i = np.floor(t).astype(int) % (len(views) - 1)
+    a = (1 - np.cos(np.pi * (t - np.floor(t)))) / 2  # Frena en cada pose
+    return views[i] + a[:, None] * (views[i + 1] - views[i])
+
+
+def clutter_background(w, h, rng, n_rects=60):
+    """Fondo con rectángulos de grises al azar (bordes y esquinas falsas)."""
+    bg = np.full((h, w), 200, dtype=np.uint8)
+    for _ in range(n_rects):
+        x, y = rng.integers(0, w), rng.integers(0, h)
+        rw, rh = rng.integers(w // 40, w // 6), rng.integers(h // 40, h // 6)
+        cv2.rectangle(bg, (int(x), int(y)), (int(x + rw), int(y + rh)),
+                      int(rng.integers(0, 256)), -1)
+    return bg
+
+
+def render_frame(view, scale, rng, background=None, noise_sigma=3.0):
+    """Como bench_pyramid_detection.render_view, con un fondo opcional."""
+    rx, ry, rz, tx, ty, tz = view
+    K = synth.K_real.copy()
+    K[:2] *= scale
+    w, h = int(synth.IMG_W * scale), int(synth.IMG_H * scale)
+
+    rvec = synth.euler_to_rvec(rx, ry, rz)
+    tvec = np.array([[tx], [ty], [tz]], dtype=np.float64)
+    truth, _ = cv2.projectPoints(synth.objp, rvec, tvec, K, synth.dist_real)
+
+    img = synth.render_chessboard(rvec, tvec, K, synth.dist_real, w, h,
+                                  synth.COLS, synth.ROWS, synth.SQUARE_MM)
+    if background is not None:
+        outside = img == 200  # El render deja el fondo en gris 200
+        img[outside] = background[outside]
+    noise = rng.normal(0, noise_sigma, img.shape)
+    gray = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return gray, truth.reshape(-1, 2)
+
+
+def run(n_frames, step, scale, levels, clutter, seed):
+    rng = np.random.default_rng(seed)
+    w, h = int(synth.IMG_W * scale), int(synth.IMG_H * scale)
+    background = clutter_background(w, h, rng) if clutter else None
+    frames = [render_frame(v, scale, rng, background)
+              for v in pose_sequence(n_frames, step)]
+    print(f"{n_frames} cuadros de {w}x{h} ({w * h / 1e6:.1f} MP"
+          f"{', fondo con objetos' if clutter else ''})\n")
+
+    board = (synth.COLS, synth.ROWS)
+    tracker = CornerTracker(board, pyramid_levels=levels)
+    methods = [
+        ('directa', lambda g: find_corners(g, board)),
+        (f'pirámide x{levels}', lambda g: find_corners(g, board, pyramid_levels=levels)),
+        ('seguimiento', lambda g: tracker.track(g)[:2]),
+    ]
+    print(f"{'método':<16}{'detectadas':>12}{'ms/cuadro':>12}{'RMS (px)':>11}{'máx (px)':>11}")
+    baseline = None
+    for name, fn in methods:
+        times, errors, found_count = [], [], 0
+        for gray, truth in frames:
+            t0 = time.perf_counter()
+            found, corners = fn(gray)
+            times.append(time.perf_counter() - t0)
+            if found:
+                found_count += 1
+                errors.append(np.linalg.norm(corners.reshape(-1, 2) - truth, axis=1))
+
+        ms = np.mean(times) * 1000
+        if errors:
+            err = np.concatenate(errors)
+            rms, worst = np.sqrt(np.mean(err ** 2)), err.max()
+        else:
+            rms = worst = float('nan')
+        speedup = '' if baseline is None else f'   x{baseline / ms:.1f}'
+        baseline = baseline or ms
+        print(f"{name:<16}{found_count:>8}/{len(frames):<3}{ms:>12.1f}{rms:>11.4f}{worst:>11.4f}{speedup}")
+    print(f"\nSeguimiento: {tracker.tracked} cuadros seguidos, {tracker.detected} "
+          f"detecciones completas ({tracker.lost} pérdidas)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--step', type=float, default=1.0,
+                        help='vistas de la secuencia recorridas cada 30 cuadros')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='factor sobre la resolución sintética de 1280x960')
+    parser.add_argument('--levels', type=int, default=2,
+                        help='pirámide de la detección completa (y del respaldo del seguimiento)')
+    parser.add_argument('--clutter', action='store_true', help='fondo con objetos en vez de liso')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # Comparar el costo por cuadro en un solo núcleo
+    run(args.frames, args.step, args.scale, args.levels, args.clutter, args.seed)
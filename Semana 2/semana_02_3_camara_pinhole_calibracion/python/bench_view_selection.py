@@ -0,0 +1,100 @@
+"""
+Benchmark: calibrar con todas las vistas vs. con N vistas elegidas por
+view_selection.select_views vs. con N vistas al azar.
+
+Las esquinas se generan sin renderizar: poses aleatorias del tablero
+sintético (generate_synthetic_calibration) proyectadas con la K/dist reales
+más ruido gaussiano. Para cada subconjunto se mide el tiempo de
+cv2.calibrateCamera, el error de K/dist contra los valores reales y el RMS
+de reproyección sobre TODAS las vistas (poses re-estimadas con solvePnP).
+
+Uso:
+    python bench_view_selection.py                      # 2000 vistas → 40
+    python bench_view_selection.py --views 500 --select 25 --noise 0.3
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import generate_synthetic_calibration as synth
+from camcalib.reprojection import reprojection_errors
+from camcalib.view_selection import select_views
+
+
+def synthetic_views(n_views, noise, rng):
+    """Esquinas proyectadas de n_views poses aleatorias que caen dentro de la imagen."""
+    obj_points, img_points = [], []
+    center = synth.objp.mean(axis=0)
+    while len(img_points) < n_views:
+        rvec = synth.euler_to_rvec(*rng.uniform([-35, -35, -15], [35, 35, 15]))
+        tz = rng.uniform(350, 700)
+        # Centrar el tablero y desplazarlo dentro del campo de visión
+        R = cv2.Rodrigues(rvec)[0]
+        tvec = (-R @ center + [rng.uniform(-0.35, 0.35) * tz,
+                               rng.uniform(-0.25, 0.25) * tz, tz])
+        pts, _ = cv2.projectPoints(synth.objp, rvec, tvec, synth.K_real, synth.dist_real)
+        pts = pts + rng.normal(0, noise, pts.shape)
+        if not (np.all(pts[..., 0] > 5) and np.all(pts[..., 0] < synth.IMG_W - 5) and
+                np.all(pts[..., 1] > 5) and np.all(pts[..., 1] < synth.IMG_H - 5)):
+            continue
+        obj_points.append(synth.objp)
+        img_points.append(pts.astype(np.float32))
+    return obj_points, img_points
+
+
+def evaluate(name, indices, obj_points, img_points, img_shape):
+    """Calibra con las vistas `indices` e imprime tiempo y errores."""
+    t0 = time.perf_counter()
+    _, K, dist, _, _ = cv2.calibrateCamera([obj_points[i] for i in indices],
+                                           [img_points[i] for i in indices],
+                                           img_shape, None, None)
+    elapsed = time.perf_counter() - t0
+
+    # Reproyección de todas las vistas con la K/dist de este subconjunto
+    rvecs, tvecs = [], []
+    for obj, pts in zip(obj_points, img_points):
+        _, rvec, tvec = cv2.solvePnP(obj, pts, K, dist)
+        rvecs.append(rvec)
+        tvecs.append(tvec)
+    rms_all = reprojection_errors(obj_points, img_points, rvecs, tvecs, K, dist).rms
+
+    f_err = np.abs(K[[0, 1], [0, 1]] - synth.K_real[[0, 1], [0, 1]]).max()
+    c_err = np.abs(K[[0, 1], [2, 2]] - synth.K_real[[0, 1], [2, 2]]).max()
+    d_err = np.abs(dist.ravel()[:5] - synth.dist_real).max()
+    print(f"{name:<22}{len(indices):6d}{elapsed:10.3f}{rms_all:10.4f}"
+          f"{f_err:10.3f}{c_err:10.3f}{d_err:10.4f}")
+
+
+def run(n_views, n_select, noise, seed):
+    rng = np.random.default_rng(seed)
+    img_shape = (synth.IMG_W, synth.IMG_H)
+    obj_points, img_points = synthetic_views(n_views, noise, rng)
+    print(f"{n_views} vistas sintéticas, ruido {noise} px\n")
+    print(f"{'subconjunto':<22}{'vistas':>6}{'calib (s)':>10}{'RMS todas':>10}"
+          f"{'|Δf| px':>10}{'|Δc| px':>10}{'|Δdist|':>10}")
+
+    evaluate('todas', list(range(n_views)), obj_points, img_points, img_shape)
+
+    t0 = time.perf_counter()
+    chosen = select_views(obj_points, img_points, img_shape, n_select)
+    select_time = time.perf_counter() - t0
+    evaluate('seleccionadas', chosen, obj_points, img_points, img_shape)
+
+    for k in range(3):
+        random_views = rng.choice(n_views, n_select, replace=False).tolist()
+        evaluate(f'al azar #{k + 1}', random_views, obj_points, img_points, img_shape)
+
+    print(f"\nSelección de {n_select} vistas: {select_time:.3f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--views', type=int, default=2000)
+    parser.add_argument('--select', type=int, default=40)
+    parser.add_argument('--noise', type=float, default=0.3, help='ruido de las esquinas (px)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.views, args.select, args.noise, args.seed)
@@ -0,0 +1,187 @@
+"""
+Servicio de calibración por lotes para muchas cámaras (cola de trabajos)
+Línea de comandos de camcalib.service: encolar trabajos (una carpeta de
+imágenes por cámara), correr el planificador con un pool de procesos y
+consultar el estado. Cada resultado queda en <cola>/results/<id>.calib
+(ver camcalib.bundle). La cola es una carpeta: se puede encolar desde otra
+terminal mientras el servicio corre, y un servicio interrumpido retoma los
+trabajos pendientes.
+
+Uso:
+    python calibration_service.py submit ../cola --images ../fotos/cam_A --board 9 6 --square 25
+    python calibration_service.py submit ../cola --dataset ../synthetic_dataset   # un trabajo por cámara
+    python calibration_service.py submit ../cola --jobs trabajos.jsonl            # una especificación JSON por línea
+    python calibration_service.py run ../cola --workers 8
+    python calibration_service.py run ../cola --http 8765 --keep-alive            # + front end en localhost
+    python calibration_service.py status ../cola
+
+Con --http: GET /jobs, GET /jobs/<id>, GET /jobs/<id>/result (el .calib),
+POST /jobs (especificación JSON, con Content-Type: application/json) y
+GET /events (avance, Server-Sent Events):
+    curl -N http://127.0.0.1:8765/events
+    curl -H 'Content-Type: application/json' -d @trabajo.json http://127.0.0.1:8765/jobs
+Solo escucha en loopback salvo --http-host con --allow-remote (sin autenticación).
+"""
+
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+
+from camcalib.dataset import load_manifest
+from camcalib.service import CalibrationService, JobQueue, serve_http
+
+STAGE_NAMES = {'detection': 'detección', 'calibrate': 'calibrando', 'uncertainty': 'incertidumbre'}
+
+
+def job_specs(args):
+    """Especificaciones de trabajo a partir de los argumentos de `submit`."""
+    options = {}
+    if args.pyramid_levels:
+        options['pyramid_levels'] = args.pyramid_levels
+    if args.max_views:
+        options['max_views'] = args.max_views
+    if args.solver:
+        options['solver'] = args.solver
+    limits = {'workers': args.job_workers, 'memory_mb': args.memory_mb,
+              'timeout_s': args.timeout}
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            specs = [json.loads(line) for line in f if line.strip()]
+        for spec in filter(lambda spec: isinstance(spec, dict), specs):
+            # Los argumentos son valores por defecto
+            spec['options'] = dict(options, **spec.get('options', {}))
+            spec['limits'] = dict(limits, **spec.get('limits', {}))
+        return specs
+    if args.dataset:
+        manifest = load_manifest(args.dataset)
+        board = manifest['board']
+        return [{'name': f"cam_{cam['id']:02d}",
+                 'images': os.path.join(args.dataset, f"cam_{cam['id']:02d}"),
+                 'pattern': args.pattern, 'board': [board['cols'], board['rows']],
+                 'square_size': board['square_size'], 'options': options, 'limits': limits}
+                for cam in manifest['cameras']]
+    if not (args.images and args.board and args.square):
+        raise SystemExit("submit necesita --images, --board y --square (o --dataset / --jobs)")
+    return [{'name': args.name, 'images': args.images, 'pattern': args.pattern,
+             'board': args.board, 'square_size': args.square,
+             'options': options, 'limits': limits}]
+
+
+def print_event(event):
+    kind, name = event['event'], f"{event['id']} ({event.get('name', '')})"
+    if kind == 'progress':
+        stage = STAGE_NAMES.get(event['stage'], event['stage'])
+        count = f" {event['done']}/{event['total']}" if event['stage'] == 'detection' else ''
+        print(f"  {name}: {stage}{count}")
+    elif kind == 'done':
+        print(f"✓ {name}: RMS {event['rms']:.4f} px, {event['views']} vistas, "
+              f"{event['elapsed']:.1f} s")
+    elif kind == 'failed':
+        print(f"✗ {name}: {event['error']}")
+    elif kind == 'started':
+        print(f"→ {name}: iniciado (pid {event['pid']})")
+    elif kind == 'requeued':
+        print(f"↺ {name}: interrumpido, vuelve a la cola")
+
+
+def run(queue_dir, workers, http_port, keep_alive, http_host='127.0.0.1', allow_remote=False):
+    service = CalibrationService(queue_dir, workers=workers)
+    events = service.subscribe()
+    if http_port is not None:
+        try:
+            server = serve_http(service, host=http_host, port=http_port,
+                                allow_remote=allow_remote)
+        except ValueError as e:
+            raise SystemExit(f"HTTP: {e}")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"HTTP en http://{http_host}:{http_port}/jobs")
+
+    def printer():
+        while True:
+            print_event(events.get())
+
+    threading.Thread(target=printer, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: service.stop())
+    print(f"Servicio: {queue_dir} con {service.workers} núcleo(s)")
+    t0 = time.perf_counter()
+    try:
+        service.run(until_empty=not keep_alive)
+    except KeyboardInterrupt:
+        print("\nDetenido")
+    time.sleep(0.1)  # Dejar que se impriman los últimos eventos
+    elapsed = time.perf_counter() - t0
+    jobs = service.status()
+    done = sum(job['state'] == 'done' for job in jobs)
+    failed = sum(job['state'] == 'failed' for job in jobs)
+    print(f"\n{done} terminados, {failed} fallidos en {elapsed:.1f} s")
+
+
+def status(queue_dir):
+    queue = JobQueue(queue_dir)
+    jobs = [job for job in map(queue.load, queue.ids()) if job is not None]
+    if not jobs:
+        print("Cola vacía")
+        return
+    print(f"{'id':<11}{'nombre':<16}{'estado':<9}{'RMS':>8}{'vistas':>8}{'s':>8}  detalle")
+    for job in jobs:
+        rms = f"{job['rms']:.4f}" if job.get('rms') is not None else '-'
+        elapsed = (f"{job['finished'] - job['started']:.1f}"
+                   if job.get('finished') and job.get('started') else '-')
+        detail = job.get('error') or job.get('result') or ''
+        print(f"{job['id']:<11}{job['name'][:15]:<16}{job['state']:<9}{rms:>8}"
+              f"{job.get('views', '-'):>8}{elapsed:>8}  {detail}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('submit', help='encolar trabajos')
+    p.add_argument('queue', help='carpeta de la cola')
+    p.add_argument('--images', help='carpeta con las imágenes de una cámara')
+    p.add_argument('--pattern', default='*.jpg', help='patrón de las imágenes dentro de la carpeta')
+    p.add_argument('--board', type=int, nargs=2, metavar=('COLS', 'ROWS'),
+                   help='esquinas internas del tablero')
+    p.add_argument('--square', type=float, help='lado del cuadro (mm)')
+    p.add_argument('--name', help='nombre del trabajo (por defecto, el de la carpeta)')
+    p.add_argument('--dataset', help='carpeta de synthetic_dataset.py: un trabajo por cámara')
+    p.add_argument('--jobs', help='archivo con una especificación JSON por línea')
+    p.add_argument('--pyramid-levels', type=int, default=0)
+    p.add_argument('--max-views', type=int)
+    p.add_argument('--solver', choices=('opencv', 'sparse'))
+    p.add_argument('--job-workers', type=int, default=1, help='núcleos por trabajo')
+    p.add_argument('--memory-mb', type=int, help='límite de memoria por trabajo')
+    p.add_argument('--timeout', type=float, help='tiempo máximo por trabajo (s)')
+
+    p = sub.add_parser('run', help='procesar la cola')
+    p.add_argument('queue')
+    p.add_argument('--workers', type=int, help='núcleos del servicio (por defecto, todos)')
+    p.add_argument('--http', type=int, metavar='PORT', help='front end HTTP en 127.0.0.1:PORT')
+    p.add_argument('--http-host', default='127.0.0.1',
+                   help='dirección del front end HTTP (fuera de loopback exige --allow-remote)')
+    p.add_argument('--allow-remote', action='store_true',
+                   help='permitir --http-host fuera de loopback (sin autenticación)')
+    p.add_argument('--keep-alive', action='store_true',
+                   help='seguir esperando trabajos nuevos con la cola vacía (Ctrl+C para salir)')
+
+    p = sub.add_parser('status', help='estado de los trabajos')
+    p.add_argument('queue')
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        queue = JobQueue(args.queue)
+        try:
+            jobs = [queue.submit(spec) for spec in job_specs(args)]
+        except ValueError as e:
+            raise SystemExit(f"Trabajo inválido: {e}")
+        for job in jobs:
+            print(f"{job['id']}: {job['name']} ({job['images']})")
+    elif args.command == 'run':
+        run(args.queue, args.workers, args.http, args.keep_alive, args.http_host,
+            args.allow_remote)
+    else:
+        status(args.queue)
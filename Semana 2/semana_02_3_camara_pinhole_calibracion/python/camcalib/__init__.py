@@ -0,0 +1,24 @@
+"""
+camcalib: calibración de cámara pinhole como biblioteca
+Las funciones de los scripts 04 y 05 sin efectos al importar: no se crean
+carpetas, no se escriben imágenes y no se carga matplotlib (las gráficas
+viven en camcalib.plots y lo importan solo al graficar).
+
+    from camcalib import calibrate_camera, apply_undistortion
+    result = calibrate_camera('fotos/*.jpg', (9, 6), 25.0, workers=None)
+"""
+
+from .bundle import load_bundle, save_bundle
+from .bundle_adjustment import calibrate_sparse
+from .calibration import calibrate_camera, detect_with_cache, generate_chessboard_image
+from .projection import project_points
+from .refinement import refine_calibration
+from .reprojection import project_views, reprojection_errors
+from .undistorter import Undistorter
+from .validation import apply_undistortion, compute_reprojection_error
+
+__all__ = [
+    'load_bundle', 'save_bundle', 'calibrate_sparse', 'calibrate_camera', 'detect_with_cache', 'generate_chessboard_image',
+    'project_points', 'refine_calibration', 'project_views', 'reprojection_errors',
+    'Undistorter', 'apply_undistortion', 'compute_reprojection_error',
+]
@@ -0,0 +1,201 @@
+"""
+Corrección de distorsión por lotes (directorios de imágenes o videos)
+Pipeline acotado: leer → undistort/recorte → escribir
+    - decodificación y codificación JPEG en pools de hilos
+      (cv2 libera el GIL, así la E/S de disco se solapa con el remap)
+    - como mucho `depth` imágenes en vuelo por etapa: memoria acotada
+    - cada imagen terminada se anota en un diario (.done) dentro de la
+      carpeta de salida; con resume=True se saltan las ya escritas
+Línea de comandos: batch_undistort.py
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .undistorter import Undistorter
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+JOURNAL_NAME = '.done'
+
+
+def read_journal(out_dir):
+    """Nombres de salida ya escritos en una ejecución anterior."""
+    path = os.path.join(out_dir, JOURNAL_NAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def input_images(src):
+    """Imágenes de la carpeta src, en orden alfabético."""
+    return sorted(p for p in glob.glob(os.path.join(src, '*'))
+                  if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def output_names(paths, ext):
+    """
+    Nombre de salida de cada imagen: su nombre sin extensión + ext. Dos
+    entradas con el mismo nombre (a.jpg y a.png) se pisarían en la salida y
+    en el diario, así que se rechazan.
+    """
+    names = [os.path.splitext(os.path.basename(p))[0] + ext for p in paths]
+    repeated = sorted(n for n, c in Counter(n.lower() for n in names).items() if c > 1)
+    if repeated:
+        clashes = [os.path.basename(p) for p, n in zip(paths, names) if n.lower() in repeated]
+        raise ValueError(f"imágenes con el mismo nombre de salida ({', '.join(clashes)}): "
+                         "renombrarlas o separarlas en carpetas distintas")
+    return names
+
+
+def directory_frames(paths, out_names, decode_pool, depth):
+    """
+    Genera (nombre_salida, imagen) en orden, con como mucho `depth`
+    decodificaciones en vuelo en el pool.
+    """
+    pending = deque()
+    items = iter(zip(paths, out_names))
+    for path, name in items:
+        pending.append((name, path, decode_pool.submit(cv2.imread, path)))
+        if len(pending) >= depth:
+            break
+    while pending:
+        name, path, future = pending.popleft()
+        img = future.result()
+        for next_path, next_name in items:
+            pending.append((next_name, next_path, decode_pool.submit(cv2.imread, next_path)))
+            break
+        if img is None:
+            print(f"No se pudo leer: {path}")
+            continue
+        yield name, img
+
+
+def video_frames(path, done, ext, depth):
+    """
+    Genera (nombre_salida, frame) de un video. Un hilo lector decodifica
+    por delante del consumidor, con una cola de tamaño fijo.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"No se pudo abrir el video: {path}")
+
+    # Reanudar: saltar directamente al primer frame que falta
+    index = 0
+    while f'frame_{index:06d}{ext}' in done:
+        index += 1
+    if index:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    frames = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def reader(index):
+        while not stop.is_set():
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.put((f'frame_{index:06d}{ext}', frame))
+            index += 1
+        frames.put(None)
+
+    thread = threading.Thread(target=reader, args=(index,), daemon=True)
+    thread.start()
+    try:
+        while (item := frames.get()) is not None:
+            if item[0] not in done:
+                yield item
+    finally:
+        stop.set()
+        while thread.is_alive():  # Desbloquear al lector si la cola está llena
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                thread.join(0.05)
+        cap.release()
+
+
+def encode_and_write(img, out_path, params):
+    """Codifica y escribe de forma atómica (un corte no deja archivos a medias)."""
+    ok, buf = cv2.imencode(os.path.splitext(out_path)[1], img, params)
+    if not ok:
+        raise RuntimeError(f"No se pudo codificar: {out_path}")
+    tmp = out_path + '.part'
+    with open(tmp, 'wb') as f:
+        f.write(buf.tobytes())
+    os.replace(tmp, out_path)
+    return os.path.basename(out_path)
+
+
+def run(src, out_dir, K, dist, alpha=1, crop=False, decode_workers=4,
+        encode_workers=4, depth=16, resume=False, ext='.jpg', quality=95,
+        cache_dir=None, undistorter=None):
+    """
+    Ejecuta el pipeline completo y retorna el número de imágenes escritas.
+    undistorter: corrector ya construido (p. ej. Undistorter.from_bundle);
+                 si se da, K, dist, alpha y cache_dir se ignoran
+    """
+    if os.path.isdir(src):
+        paths = input_images(src)
+        names = output_names(paths, ext)
+
+    os.makedirs(out_dir, exist_ok=True)
+    done = read_journal(out_dir) if resume else set()
+    if undistorter is None:
+        undistorter = Undistorter(K, dist, alpha=alpha, cache_dir=cache_dir)
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in ('.jpg', '.jpeg') else []
+
+    decode_pool = ThreadPoolExecutor(max_workers=decode_workers)
+    encode_pool = ThreadPoolExecutor(max_workers=encode_workers)
+    journal = open(os.path.join(out_dir, JOURNAL_NAME), 'a' if resume else 'w')
+
+    if os.path.isdir(src):
+        todo = [(p, n) for p, n in zip(paths, names) if n not in done]
+        print(f"{len(paths)} imágenes, {len(paths) - len(todo)} ya corregidas")
+        frames = directory_frames([p for p, _ in todo], [n for _, n in todo],
+                                  decode_pool, depth)
+    else:
+        frames = video_frames(src, done, ext, depth)
+
+    written = 0
+    in_flight = deque()
+    t0 = last_report = time.perf_counter()
+
+    def finish_oldest():
+        name = in_flight.popleft().result()
+        journal.write(name + '\n')
+        journal.flush()
+
+    try:
+        for name, img in frames:
+            corrected = undistorter.undistort(img, crop=crop)
+            in_flight.append(encode_pool.submit(
+                encode_and_write, corrected, os.path.join(out_dir, name), params))
+            while len(in_flight) >= depth:
+                finish_oldest()
+                written += 1
+
+            now = time.perf_counter()
+            if now - last_report >= 2.0:
+                print(f"  {written} imágenes, {written / (now - t0):.1f} fps")
+                last_report = now
+        while in_flight:
+            finish_oldest()
+            written += 1
+    finally:
+        journal.close()
+        decode_pool.shutdown(cancel_futures=True)
+        encode_pool.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    fps = written / elapsed if elapsed > 0 else 0.0
+    print(f"Escritas {written} imágenes en {elapsed:.2f} s ({fps:.1f} fps)")
+    return written
@@ -0,0 +1,175 @@
+"""
+Paquete de calibración en un solo archivo (.calib)
+Reemplaza a calibration_K.npy + calibration_dist.npy: guarda K, dist, el
+tamaño de imagen, el RMS, los rvecs/tvecs y las esquinas de cada vista y
+los mapas de corrección ya calculados.
+
+Formato:
+    'CAMCALIB' | versión (uint32 LE) | largo del encabezado (uint32 LE)
+    encabezado JSON: escalares + tabla de secciones {nombre: dtype, shape, offset}
+    secciones de arreglos crudos, cada una alineada a 64 bytes
+
+Como los arreglos están crudos y alineados, load_bundle(mmap=True) los
+devuelve como vistas de un np.memmap de solo lectura: varios procesos que
+cargan el mismo archivo comparten una sola copia de los mapas en la caché
+de páginas del sistema operativo, y solo se lee lo que se usa.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+MAGIC = b'CAMCALIB'
+BUNDLE_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct('<8sII')
+
+CalibrationBundle = namedtuple('CalibrationBundle', [
+    'version', 'image_size', 'rms', 'K', 'dist', 'rvecs', 'tvecs',
+    'obj_points', 'img_points', 'names', 'alpha', 'fixed_point',
+    'new_K', 'roi', 'map1', 'map2', 'meta'])
+
+
+def _concat_views(points, width):
+    """Lista de vistas (N_i, ...) → arreglo concatenado (T, width) + offsets (V+1,)."""
+    arrays = [np.asarray(p, dtype=np.float32).reshape(-1, width) for p in points]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in arrays])
+    flat = np.concatenate(arrays) if arrays else np.zeros((0, width), np.float32)
+    return flat, offsets
+
+
+def save_bundle(path, K, dist, image_size, rms=None, rvecs=None, tvecs=None,
+                obj_points=None, img_points=None, names=None, alpha=1,
+                fixed_point=True, with_maps=True, meta=None):
+    """
+    Escribe el paquete de calibración en `path` (escritura atómica).
+
+    image_size: (width, height) de las imágenes de calibración
+    rvecs, tvecs, obj_points, img_points: como los usa cv2.calibrateCamera;
+        con ellos 05_undistort_validation.py calcula el error de reproyección
+    alpha, fixed_point: como en Undistorter; con with_maps=True se guardan
+        los mapas de corrección para image_size
+    meta: diccionario JSON con información extra (fecha, origen, etc.)
+    """
+    width, height = (int(v) for v in image_size)
+    meta = dict(meta or {})
+    meta.setdefault('created', time.strftime('%Y-%m-%dT%H:%M:%S'))
+    arrays = {
+        'K': np.asarray(K, dtype=np.float64).reshape(3, 3),
+        'dist': np.asarray(dist, dtype=np.float64).ravel(),
+    }
+    if rvecs is not None:
+        arrays['rvecs'] = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3, 1)
+        arrays['tvecs'] = np.asarray(tvecs, dtype=np.float64).reshape(-1, 3, 1)
+    if obj_points is not None:
+        arrays['obj_points'], arrays['view_offsets'] = _concat_views(obj_points, 3)
+        arrays['img_points'], _ = _concat_views(img_points, 2)
+    if with_maps:
+        new_K, roi = cv2.getOptimalNewCameraMatrix(arrays['K'], arrays['dist'],
+                                                   (width, height), alpha=alpha)
+        m1type = cv2.CV_16SC2 if fixed_point else cv2.CV_32FC1
+        map1, map2 = cv2.initUndistortRectifyMap(arrays['K'], arrays['dist'], None,
+                                                 new_K, (width, height), m1type)
+        arrays.update(new_K=new_K, roi=np.array(roi, dtype=np.int32),
+                      map1=map1, map2=map2)
+
+    # Tabla de secciones: cada arreglo empieza en un múltiplo de ALIGN
+    sections = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        sections[name] = {'dtype': arr.dtype.str, 'shape': list(arr.shape),
+                          'offset': offset, 'nbytes': arr.nbytes,
+                          'blake2b': hashlib.blake2b(arr.data, digest_size=12).hexdigest()}
+        offset += -(-arr.nbytes // ALIGN) * ALIGN
+
+    header = {
+        'image_size': [width, height],
+        'rms': None if rms is None else float(rms),
+        'alpha': alpha,
+        'fixed_point': bool(fixed_point),
+        'names': list(names) if names is not None else None,
+        'meta': meta,
+        'sections': sections,
+    }
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(_PREFIX.size + len(header_bytes)) // ALIGN) * ALIGN
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, BUNDLE_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + sections[name]['offset'])
+            f.write(arr.data)
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return path
+
+
+def read_header(path):
+    """Lee solo el encabezado: retorna (versión, dict, inicio de los datos)."""
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path}: archivo demasiado corto")
+        magic, version, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es un paquete de calibración")
+        if version > BUNDLE_VERSION:
+            raise ValueError(f"{path}: versión {version} no soportada "
+                             f"(máximo {BUNDLE_VERSION})")
+        header = json.loads(f.read(header_len))
+    data_start = -(-(_PREFIX.size + header_len) // ALIGN) * ALIGN
+    return version, header, data_start
+
+
+def load_bundle(path, mmap=True, verify=False):
+    """
+    Carga un paquete escrito con save_bundle.
+
+    mmap: los arreglos son vistas de solo lectura de un np.memmap (los mapas
+          se comparten entre procesos y se leen bajo demanda); False = copia
+          en memoria
+    verify: comprobar el hash de cada sección (lee el archivo completo)
+    Las secciones ausentes (p. ej. sin mapas) quedan en None.
+    """
+    version, header, data_start = read_header(path)
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            raw = np.frombuffer(f.read(), dtype=np.uint8)
+
+    arrays = {}
+    for name, sec in header['sections'].items():
+        start = data_start + sec['offset']
+        chunk = raw[start:start + sec['nbytes']]
+        if len(chunk) != sec['nbytes']:
+            raise ValueError(f"{path}: sección '{name}' truncada")
+        if verify and hashlib.blake2b(chunk, digest_size=12).hexdigest() != sec['blake2b']:
+            raise ValueError(f"{path}: sección '{name}' corrupta")
+        arrays[name] = chunk.view(np.dtype(sec['dtype'])).reshape(sec['shape'])
+
+    obj_points = img_points = None
+    if 'view_offsets' in arrays:
+        bounds = arrays['view_offsets'][1:-1]
+        obj_points = np.split(arrays['obj_points'], bounds)
+        img_points = [p.reshape(-1, 1, 2) for p in np.split(arrays['img_points'], bounds)]
+    roi = tuple(int(v) for v in arrays['roi']) if 'roi' in arrays else None
+
+    return CalibrationBundle(
+        version=version, image_size=tuple(header['image_size']), rms=header['rms'],
+        K=arrays['K'], dist=arrays['dist'], rvecs=arrays.get('rvecs'),
+        tvecs=arrays.get('tvecs'), obj_points=obj_points, img_points=img_points,
+        names=header['names'], alpha=header['alpha'], fixed_point=header['fixed_point'],
+        new_K=arrays.get('new_K'), roi=roi, map1=arrays.get('map1'),
+        map2=arrays.get('map2'), meta=header['meta'])
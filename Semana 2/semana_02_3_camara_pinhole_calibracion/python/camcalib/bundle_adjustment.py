@@ -0,0 +1,323 @@
+"""
+Calibración por ajuste de haces con Jacobiano disperso
+cv2.calibrateCamera resuelve Levenberg-Marquardt sobre la matriz normal
+densa de todos los parámetros (9 intrínsecos + 6 por vista). Pero cada
+residuo depende solo de los intrínsecos y de la pose de SU vista, así que el
+Jacobiano tiene estructura de bloques
+
+        intrínsecos   vista 1   vista 2   ...
+    [       A_1     |   B_1   |         |     ]
+    [       A_2     |         |   B_2   |     ]
+    [       ...     |         |         | ... ]
+
+y el paso de Levenberg-Marquardt se resuelve con el complemento de Schur:
+los bloques 6x6 de cada vista se invierten por lotes y queda un sistema de
+9x9 para los intrínsecos. Residuos, Jacobiano (analítico) y estimación
+inicial (homografías por DLT) se evalúan para todas las vistas a la vez en
+NumPy: tiempo y memoria lineales en el número de vistas.
+
+Mismo modelo que cv2.calibrateCamera con flags=0: fx, fy, cx, cy y
+dist = [k1, k2, p1, p2, k3].
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from .reprojection import _flatten, rodrigues
+
+SparseCalibration = namedtuple('SparseCalibration', [
+    'rms', 'K', 'dist', 'rvecs', 'tvecs',  # Como cv2.calibrateCamera
+    'iterations',
+    'converged',
+])
+
+N_INTRINSICS = 9  # fx, fy, cx, cy, k1, k2, p1, p2, k3
+
+
+class _Views:
+    """Puntos de todas las vistas concatenados y cómo agruparlos por vista."""
+
+    def __init__(self, obj_points, img_points):
+        self.obj, self.view_index = _flatten(obj_points, 3)
+        self.img, _ = _flatten(img_points, 2)
+        self.n = len(obj_points)
+        self.counts = np.bincount(self.view_index, minlength=self.n)
+        # Todas las vistas con el mismo número de puntos (un tablero): los
+        # bloques por vista son un reshape, sin copias
+        self.uniform = bool(np.all(self.counts == self.counts[0]))
+        if not self.uniform:
+            starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+            slot = np.arange(self.counts.max())
+            self.valid = slot[None, :] < self.counts[:, None]
+            self.take = np.where(self.valid, starts[:, None] + slot[None, :], 0)
+
+    def blocks(self, arr):
+        """(T, ...) → (V, N_max, ...); las vistas con menos puntos se rellenan con ceros."""
+        if self.uniform:
+            return arr.reshape(self.n, -1, *arr.shape[1:])
+        out = arr[self.take]
+        out[~self.valid] = 0
+        return out
+
+    def matmul(self, X, M):
+        """X (T, k, 3) @ M (V, 3, m) con la M de la vista de cada punto → (T, k, m)."""
+        if self.uniform:
+            n, k = X.shape[:2]
+            return (X.reshape(self.n, -1, 3) @ M).reshape(n, k, -1)
+        return X @ M[self.view_index]
+
+    def mean(self, values):
+        """Promedio por vista de values (T,) o (T, d) → (V, d)."""
+        values = values.reshape(len(values), -1)
+        sums = np.stack([np.bincount(self.view_index, values[:, j], self.n)
+                         for j in range(values.shape[1])], axis=1)
+        return sums / self.counts[:, None]
+
+
+def _skew(v):
+    """Vectores (n, 3) → matrices antisimétricas [v]x (n, 3, 3)."""
+    s = np.zeros((len(v), 3, 3))
+    s[:, 0, 1], s[:, 0, 2] = -v[:, 2], v[:, 1]
+    s[:, 1, 0], s[:, 1, 2] = v[:, 2], -v[:, 0]
+    s[:, 2, 0], s[:, 2, 1] = -v[:, 1], v[:, 0]
+    return s
+
+
+def _left_jacobian(rvecs):
+    """
+    Jacobiano izquierdo de SO(3) (V, 3, 3): R(r + dr) ≈ exp([J dr]x) R(r),
+    así dP/dr = -[R X]x J para P = R X + t.
+    """
+    theta = np.linalg.norm(rvecs, axis=1)
+    small = theta < 1e-8
+    t = np.where(small, 1.0, theta)
+    a = np.where(small, 0.5, (1 - np.cos(t)) / t ** 2)
+    b = np.where(small, 1 / 6, (t - np.sin(t)) / t ** 3)
+    kx = _skew(rvecs)
+    return np.eye(3) + a[:, None, None] * kx + b[:, None, None] * (kx @ kx)
+
+
+def _rotation_vectors(R):
+    """Matrices de rotación (V, 3, 3) → vectores de Rodrigues (V, 3), como cv2.Rodrigues."""
+    cos = np.clip((np.trace(R, axis1=1, axis2=2) - 1) / 2, -1, 1)
+    theta = np.arccos(cos)
+    w = np.stack([R[:, 2, 1] - R[:, 1, 2], R[:, 0, 2] - R[:, 2, 0],
+                  R[:, 1, 0] - R[:, 0, 1]], axis=1)
+    sin = np.sin(theta)
+    ok = sin > 1e-6
+    rvecs = w * np.where(ok, theta / (2 * np.where(ok, sin, 1.0)), 0.5)[:, None]
+    for i in np.flatnonzero(~ok & (cos < 0)):  # Cerca de 180°: caso aparte
+        rvecs[i] = cv2.Rodrigues(R[i])[0].ravel()
+    return rvecs
+
+
+def _residuals_and_jacobian(intrinsics, rvecs, tvecs, views, jacobian=True):
+    """
+    Residuos proyectado - detectado (T, 2) de todas las vistas y, si
+    jacobian=True, sus derivadas: A (T, 2, 9) respecto a los intrínsecos y
+    B (T, 2, 6) respecto a la pose (rvec, tvec) de la vista de cada punto.
+    """
+    fx, fy, cx, cy, k1, k2, p1, p2, k3 = intrinsics
+    RX = views.matmul(views.obj[:, None, :], rodrigues(rvecs).transpose(0, 2, 1))[:, 0]
+    P = RX + tvecs[views.view_index]
+    iz = 1.0 / P[:, 2]
+    x, y = P[:, 0] * iz, P[:, 1] * iz
+
+    r2 = x * x + y * y
+    radial = 1 + r2 * (k1 + r2 * (k2 + r2 * k3))
+    xy2 = 2 * x * y
+    xd = x * radial + p1 * xy2 + p2 * (r2 + 2 * x * x)
+    yd = y * radial + p1 * (r2 + 2 * y * y) + p2 * xy2
+    res = np.stack([fx * xd + cx - views.img[:, 0], fy * yd + cy - views.img[:, 1]], axis=1)
+    if not jacobian:
+        return res
+
+    n = len(P)
+    r4 = r2 * r2
+    A = np.zeros((n, 2, N_INTRINSICS))
+    A[:, 0, 0], A[:, 0, 2] = xd, 1.0
+    A[:, 1, 1], A[:, 1, 3] = yd, 1.0
+    A[:, 0, 4], A[:, 0, 5], A[:, 0, 8] = fx * x * r2, fx * x * r4, fx * x * r4 * r2
+    A[:, 1, 4], A[:, 1, 5], A[:, 1, 8] = fy * y * r2, fy * y * r4, fy * y * r4 * r2
+    A[:, 0, 6], A[:, 0, 7] = fx * xy2, fx * (r2 + 2 * x * x)
+    A[:, 1, 6], A[:, 1, 7] = fy * (r2 + 2 * y * y), fy * xy2
+
+    # (u, v) respecto a (x, y) normalizados, y (x, y) respecto al punto en la cámara
+    d_radial = k1 + r2 * (2 * k2 + 3 * k3 * r2)
+    cross = xy2 * d_radial + 2 * p1 * x + 2 * p2 * y
+    D = np.empty((n, 2, 2))
+    D[:, 0, 0] = fx * (radial + 2 * x * x * d_radial + 2 * p1 * y + 6 * p2 * x)
+    D[:, 0, 1] = fx * cross
+    D[:, 1, 0] = fy * cross
+    D[:, 1, 1] = fy * (radial + 2 * y * y * d_radial + 6 * p1 * y + 2 * p2 * x)
+    dxy = np.zeros((n, 2, 3))
+    dxy[:, 0, 0] = dxy[:, 1, 1] = iz
+    dxy[:, 0, 2], dxy[:, 1, 2] = -x * iz, -y * iz
+    dP = D @ dxy
+
+    B = np.empty((n, 2, 6))
+    B[:, :, 3:] = dP
+    # Cada fila a de dP por -[RX]x es RX × a
+    B[:, :, :3] = views.matmul(np.cross(RX[:, None, :], dP), _left_jacobian(rvecs))
+    return res, A, B
+
+
+def _homographies(views, img):
+    """Homografía plano del tablero → imagen de cada vista (DLT normalizada, por lotes)."""
+    vi = views.view_index
+
+    def normalize(p):
+        mean = views.mean(p)
+        d = p - mean[vi]
+        s = np.sqrt(2) / views.mean(np.hypot(d[:, 0], d[:, 1]))[:, 0]
+        T = np.zeros((views.n, 3, 3))
+        T[:, 0, 0] = T[:, 1, 1] = s
+        T[:, :2, 2] = -s[:, None] * mean
+        T[:, 2, 2] = 1
+        return d * s[vi, None], T
+
+    XY, Tx = normalize(views.obj[:, :2])
+    uv, Tu = normalize(img)
+    X = np.column_stack([XY, np.ones(len(XY))])
+    rows = np.zeros((len(X), 2, 9))
+    rows[:, 0, :3] = rows[:, 1, 3:6] = -X
+    rows[:, 0, 6:] = uv[:, :1] * X
+    rows[:, 1, 6:] = uv[:, 1:] * X
+    M = views.blocks(rows).reshape(views.n, -1, 9)
+    _, vecs = np.linalg.eigh(M.transpose(0, 2, 1) @ M)
+    H = np.linalg.inv(Tu) @ vecs[:, :, 0].reshape(-1, 3, 3) @ Tx
+    return H / H[:, 2:, 2:]
+
+
+def _camera_from_homographies(H, image_size):
+    """
+    K con el punto principal en el centro, como cv2.initCameraMatrix2D: los
+    ejes del tablero y sus diagonales deben ser ortogonales en el espacio.
+    """
+    cx, cy = (image_size[0] - 1) / 2, (image_size[1] - 1) / 2
+    Hc = H.copy()
+    Hc[:, 0] -= cx * Hc[:, 2]
+    Hc[:, 1] -= cy * Hc[:, 2]
+    h1, h2 = Hc[:, :, 0], Hc[:, :, 1]
+    rows = []
+    for a, b in ((h1, h2), (h1 + h2, h1 - h2)):
+        a = a / np.linalg.norm(a, axis=1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+        rows.append(a * b)
+    ab = np.concatenate(rows)  # a0 b0 / fx² + a1 b1 / fy² + a2 b2 = 0
+    inv_f2, *_ = np.linalg.lstsq(ab[:, :2], -ab[:, 2], rcond=None)
+    fx, fy = np.sqrt(1 / np.abs(inv_f2))
+    return np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]])
+
+
+def _initial_guess(views, image_size, K, dist):
+    """
+    K por homografías (como initCameraMatrix2D) y la pose de cada vista
+    descomponiendo su homografía: todo por lotes, sin un solvePnP por vista.
+    """
+    if np.any(views.obj[:, 2] != 0):
+        raise ValueError("La estimación inicial requiere un patrón plano (Z=0); "
+                         "pasar rvecs y tvecs iniciales")
+    img = views.img
+    if K is not None and np.any(dist):
+        img = cv2.undistortPoints(img.reshape(-1, 1, 2), K, dist, P=K).reshape(-1, 2)
+    H = _homographies(views, img)
+    if K is None:
+        K = _camera_from_homographies(H, image_size)
+
+    Bm = np.linalg.inv(K) @ H
+    lam = 2 / (np.linalg.norm(Bm[:, :, 0], axis=1) + np.linalg.norm(Bm[:, :, 1], axis=1))
+    lam *= np.sign(Bm[:, 2, 2])  # El tablero delante de la cámara (t_z > 0)
+    r1, r2, t = (Bm[:, :, j] * lam[:, None] for j in range(3))
+    U, _, Vt = np.linalg.svd(np.stack([r1, r2, np.cross(r1, r2)], axis=2))
+    R = U @ Vt  # La rotación más cercana
+    return K, _rotation_vectors(R), t
+
+
+def calibrate_sparse(obj_points, img_points, image_size, K=None, dist=None,
+                     rvecs=None, tvecs=None, max_iter=100, tol=1e-12, verbose=False):
+    """
+    Alternativa a cv2.calibrateCamera para miles de vistas.
+
+    obj_points, img_points, image_size: como en cv2.calibrateCamera
+    K, dist: estimación inicial (por defecto la de initCameraMatrix2D y sin distorsión)
+    rvecs, tvecs: poses iniciales (por defecto, de la homografía de cada vista)
+    tol: se detiene cuando el costo baja menos que tol (relativo)
+    Retorna SparseCalibration; los cinco primeros campos tienen el formato
+    de cv2.calibrateCamera.
+    """
+    views = _Views(obj_points, img_points)
+    n_views = views.n
+    dist0 = np.zeros(5)
+    if dist is not None:
+        d = np.asarray(dist, dtype=np.float64).ravel()[:5]
+        dist0[:len(d)] = d
+    if rvecs is None or tvecs is None:
+        K, rvecs, tvecs = _initial_guess(views, image_size, K, dist0)
+    rvecs = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3).copy()
+    tvecs = np.asarray(tvecs, dtype=np.float64).reshape(-1, 3).copy()
+    intr = np.concatenate([np.asarray(K, dtype=np.float64)[[0, 1, 0, 1], [0, 1, 2, 2]], dist0])
+
+    def per_view(arr):
+        """(T, 2, k) → (V, 2*N_max, k): filas de cada vista (el relleno no suma)."""
+        return views.blocks(arr).reshape(n_views, -1, arr.shape[-1])
+
+    res, A, B = _residuals_and_jacobian(intr, rvecs, tvecs, views)
+    cost = float(np.sum(res ** 2))
+    lam = 1e-3
+    converged = False
+    for iteration in range(1, max_iter + 1):
+        # Ecuaciones normales por bloques: [U W; Wᵀ V] [dA; dB] = -[gA; gB]
+        Af = A.reshape(-1, N_INTRINSICS)
+        U = Af.T @ Af
+        gA = Af.T @ res.ravel()
+        Av, Bv, rv = per_view(A), per_view(B), per_view(res[:, :, None])
+        Bt = Bv.transpose(0, 2, 1)
+        V = Bt @ Bv                         # (V, 6, 6)
+        W = Av.transpose(0, 2, 1) @ Bv      # (V, 9, 6)
+        gB = (Bt @ rv)[:, :, 0]             # (V, 6)
+
+        while True:
+            # Marquardt: amortiguar en proporción a la diagonal (escalas muy distintas)
+            Ud = U + lam * np.diag(np.maximum(np.diag(U), 1e-12))
+            Vd = V + lam * np.maximum(np.diagonal(V, axis1=1, axis2=2), 1e-12)[:, :, None] * np.eye(6)
+            Vinv = np.linalg.inv(Vd)
+            WVinv = W @ Vinv
+            S = Ud - np.einsum('vij,vkj->ik', WVinv, W)
+            dA = np.linalg.solve(S, -gA + np.einsum('vij,vj->i', WVinv, gB))
+            dB = -np.einsum('vij,vj->vi', Vinv, gB + np.einsum('vji,j->vi', W, dA))
+
+            new_intr = intr + dA
+            new_r, new_t = rvecs + dB[:, :3], tvecs + dB[:, 3:]
+            new_res = _residuals_and_jacobian(new_intr, new_r, new_t, views, jacobian=False)
+            new_cost = float(np.sum(new_res ** 2))
+            if new_cost < cost:
+                lam = max(lam / 10, 1e-12)
+                break
+            lam *= 10
+            if lam > 1e12:
+                break
+
+        if new_cost >= cost:
+            converged = True  # Ningún paso mejora: mínimo local
+            break
+        improvement = (cost - new_cost) / cost
+        intr, rvecs, tvecs = new_intr, new_r, new_t
+        res, A, B = _residuals_and_jacobian(intr, rvecs, tvecs, views)
+        cost = new_cost
+        if verbose:
+            print(f"  iteración {iteration}: RMS = {np.sqrt(cost / len(res)):.6f} px, "
+                  f"lambda = {lam:.1e}")
+        if improvement < tol:
+            converged = True
+            break
+
+    fx, fy, cx, cy = intr[:4]
+    K = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]])
+    return SparseCalibration(
+        rms=float(np.sqrt(cost / len(res))), K=K, dist=intr[4:].reshape(1, 5),
+        rvecs=tuple(r.reshape(3, 1) for r in rvecs),
+        tvecs=tuple(t.reshape(3, 1) for t in tvecs),
+        iterations=iteration, converged=converged)
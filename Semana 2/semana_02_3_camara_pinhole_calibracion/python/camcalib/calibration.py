@@ -0,0 +1,278 @@
+"""
+Calibración de cámara con patrón de ajedrez
+Detección de esquinas (con caché y en paralelo), selección de vistas,
+cv2.calibrateCamera (o el ajuste de haces disperso de bundle_adjustment)
+con refinamiento opcional e incertidumbre por remuestreo. Sin matplotlib:
+las gráficas están en camcalib.plots.
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from . import metrics
+from .bundle_adjustment import calibrate_sparse
+from .corner_detection import detect_all
+from .detection_cache import DetectionCache
+from .refinement import SOLVERS, print_refinement_report, refine_calibration
+from .tracking import track_all
+from .uncertainty import METHODS, calibration_uncertainty, print_uncertainty_report
+from .view_selection import select_views
+
+
+def generate_chessboard_image(save_path, cols=10, rows=7, square_size=80):
+    """
+    Genera y guarda una imagen de patrón de ajedrez digital.
+    Puedes imprimirla o usarla en pantalla para fotografiarla.
+    cols, rows: número de CUADROS (no esquinas)
+    """
+    img_h = rows * square_size
+    img_w = cols * square_size
+    img = np.zeros((img_h, img_w), dtype=np.uint8)
+    
+    for r in range(rows):
+        for c in range(cols):
+            if (r + c) % 2 == 0:
+                y1, y2 = r * square_size, (r + 1) * square_size
+                x1, x2 = c * square_size, (c + 1) * square_size
+                img[y1:y2, x1:x2] = 255
+    
+    cv2.imwrite(save_path, img)
+    print(f"Patrón generado: {save_path}")
+    return img
+
+
+def detect_with_cache(fnames, chessboard_size, workers=1, executor='process',
+                      cache=None, keep_images=None, pyramid_levels=0,
+                      reduced_decode=False, tracking=False):
+    """
+    Igual que detect_all, pero consulta primero la caché de detecciones.
+    
+    Genera (fname, img, img_size, corners, found, elapsed, from_cache) en el
+    orden de fnames. Para las imágenes en caché no se lee la imagen (img=None).
+    keep_images, pyramid_levels, reduced_decode: como en detect_all
+    tracking: fnames son cuadros consecutivos; se siguen las esquinas de un
+              cuadro al siguiente (camcalib.tracking) en lugar de detectar
+              cada uno desde cero (en serie: workers y executor se ignoran)
+    """
+    cached, keys = {}, {}
+    if cache is not None:
+        for fname in fnames:
+            keys[fname] = cache.key_for(fname)
+            hit = cache.get(keys[fname])
+            if hit is not None:
+                cached[fname] = hit
+        print(f"Caché: {len(cached)} imágenes ya detectadas, "
+              f"{len(fnames) - len(cached)} por detectar")
+    
+    todo = [f for f in fnames if f not in cached]
+    if tracking:
+        pending = track_all(todo, chessboard_size, keep_images=keep_images,
+                            pyramid_levels=pyramid_levels)
+    else:
+        pending = detect_all(todo, chessboard_size, workers=workers, executor=executor,
+                             keep_images=keep_images, pyramid_levels=pyramid_levels,
+                             reduced_decode=reduced_decode)
+    for fname in fnames:
+        if fname in cached:
+            size, corners, found = cached[fname]
+            yield fname, None, size, corners, found, 0.0, True
+            continue
+        
+        fname, img, size, corners, found, elapsed = next(pending)
+        if cache is not None and size is not None:
+            cache.put(keys[fname], size, corners, found)
+        yield fname, img, size, corners, found, elapsed, False
+
+
+def calibrate_camera(images_path, chessboard_size, square_size_mm,
+                     workers=1, executor='process', cache_path=None,
+                     streaming=False, preview_size=6, pyramid_levels=0,
+                     refine_threshold=None, refine_rounds=5, max_views=None,
+                     uncertainty=None, resamples=200, reduced_decode=False,
+                     tracking=False, solver='opencv', progress=None):
+    """
+    Calibra la cámara usando imágenes del patrón de ajedrez.
+    
+    workers: número de workers para la detección de esquinas
+             (1 = en serie, None = todos los núcleos)
+    executor: 'process' o 'thread'
+    cache_path: índice .npz de esquinas ya detectadas (None = sin caché).
+                Las imágenes en caché no se leen: su entrada en
+                detection_results lleva img=None.
+    streaming: si es True, detection_results solo conserva la imagen de las
+               primeras `preview_size` entradas; el resto lleva img=None y
+               se vuelve a leer del disco si hace falta visualizarla.
+               La memoria pico no crece con el número de imágenes.
+    pyramid_levels: si es > 0, busca el tablero primero en copias reducidas
+                    a la mitad y refina las esquinas hasta la resolución completa
+    reduced_decode: con pyramid_levels > 0, decodifica el nivel grueso
+                    reducido y descarta sin decodificar completa la imagen
+                    si ahí no aparece el tablero (ver detect_corners)
+    tracking: las imágenes son cuadros consecutivos de un video (en orden
+              alfabético); las esquinas se siguen con flujo óptico y solo se
+              detectan desde cero cuando se pierde el seguimiento
+    refine_threshold: si se da (px), descarta iterativamente las vistas con
+                      error de reproyección mayor y recalibra (hasta
+                      refine_rounds veces); obj_points, img_points, rvecs y
+                      tvecs retornados solo contienen las vistas conservadas
+    max_views: si hay más detecciones, calibra solo con las max_views vistas
+               más informativas (cobertura de la imagen + diversidad de pose)
+    solver: 'opencv' (cv2.calibrateCamera) o 'sparse' (ajuste de haces con
+            Jacobiano disperso, camcalib.bundle_adjustment: lineal en el
+            número de vistas, para miles de ellas)
+    progress: progress(etapa, hechas, total), llamada por cada imagen
+              ('detection') y al empezar cada etapa siguiente
+              ('calibrate', 'uncertainty'): para reportar el avance
+    uncertainty: 'bootstrap' o 'kfold' para recalibrar `resamples` veces con
+                 subconjuntos de vistas (en `workers` procesos) e imprimir
+                 intervalos de confianza de fx, fy, cx, cy y la distorsión
+    
+    Retorna:
+        ret: error RMS de reproyección
+        K: matriz intrínseca 3x3
+        dist: coeficientes de distorsión [k1,k2,p1,p2,k3]
+        rvecs, tvecs: vectores de rotación y traslación por imagen
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver debe ser 'opencv' o 'sparse', no {solver!r}")
+    if uncertainty is not None and uncertainty not in METHODS:
+        raise ValueError(f"uncertainty debe ser uno de {METHODS}, no {uncertainty!r}")
+    cols, rows = chessboard_size
+    
+    # Puntos 3D del patrón en el mundo real
+    # El patrón está en el plano Z=0
+    objp = np.zeros((rows * cols, 3), dtype=np.float32)
+    objp[:, :2] = np.mgrid[0:cols, 0:rows].T.reshape(-1, 2)
+    objp *= square_size_mm  # Escalar a unidades reales (mm)
+    
+    obj_points = []  # Puntos 3D reales
+    img_points = []  # Puntos 2D detectados en imagen
+    view_names = []  # Archivo de cada vista
+    
+    images = glob.glob(images_path)
+    if not images:
+        print(f"No se encontraron imágenes en: {images_path}")
+        return None
+    
+    print(f"Encontradas {len(images)} imágenes para calibración")
+    
+    successful = 0
+    processed = 0
+    img_shape = None
+    detection_results = []
+    image_times = []
+    t_start = time.perf_counter()
+    
+    cache = (DetectionCache(cache_path, (cols, rows), pyramid_levels=pyramid_levels,
+                            reduced_decode=reduced_decode, tracking=tracking)
+             if cache_path else None)
+    
+    # Detectar y refinar esquinas (en paralelo si workers != 1).
+    # Los resultados llegan en el orden de sorted(images).
+    for fname, img, size, corners_refined, found, elapsed, from_cache in detect_with_cache(
+            sorted(images), (cols, rows), workers=workers, executor=executor,
+            cache=cache, keep_images=preview_size if streaming else None,
+            pyramid_levels=pyramid_levels, reduced_decode=reduced_decode,
+            tracking=tracking):
+        processed += 1
+        if progress is not None:
+            progress('detection', processed, len(images))
+        if size is None:
+            print(f"No se pudo leer: {fname}")
+            metrics.count('calib_images_total', result='unreadable')
+            continue
+        
+        timing = 'caché' if from_cache else f'{elapsed*1000:.1f} ms'
+        if not from_cache:
+            image_times.append(elapsed)
+            metrics.observe('calib_image_detection_seconds', elapsed)
+        metrics.count('calib_images_total', result='cached' if from_cache else
+                      'found' if found else 'not_found')
+        
+        if found:
+            # Solo de imágenes decodificadas completas: sin tablero, con
+            # reduced_decode el tamaño sale del encabezado JPEG, que ignora
+            # la orientación EXIF que imdecode sí aplica
+            img_shape = size  # (width, height)
+            obj_points.append(objp)
+            img_points.append(corners_refined)
+            view_names.append(fname)
+            successful += 1
+            detection_results.append((fname, img, corners_refined, True))
+            print(f"  ✓ {os.path.basename(fname)}: esquinas detectadas ({timing})")
+        else:
+            detection_results.append((fname, img, None, False))
+            print(f"  ✗ {os.path.basename(fname)}: esquinas NO detectadas ({timing})")
+    
+    if cache is not None:
+        cache.save()
+    
+    wall = time.perf_counter() - t_start
+    metrics.observe('calib_stage_seconds', wall, stage='detection')
+    if image_times:
+        print(f"Detección: {len(image_times)} imágenes en {wall:.2f} s "
+              f"({np.mean(image_times)*1000:.1f} ms/imagen, "
+              f"aceleración x{sum(image_times) / wall:.1f})")
+    
+    if successful < 3:
+        print(f"Se necesitan al menos 3 imágenes exitosas. Solo {successful} funcionaron.")
+        return None
+    
+    if max_views is not None and successful > max_views:
+        with metrics.timer('calib_stage_seconds', stage='view_selection'):
+            chosen = sorted(select_views(obj_points, img_points, img_shape, max_views))
+        obj_points = [obj_points[i] for i in chosen]
+        img_points = [img_points[i] for i in chosen]
+        view_names = [view_names[i] for i in chosen]
+        print(f"\nSeleccionadas {max_views} de {successful} vistas "
+              f"(cobertura de la imagen + diversidad de pose)")
+        successful = max_views
+    
+    print(f"\nCalibrando con {successful} imágenes...")
+    if progress is not None:
+        progress('calibrate', 0, successful)
+    
+    if refine_threshold is None:
+        # ¡La función clave!
+        with metrics.timer('calib_stage_seconds', stage='calibrate'):
+            if solver == 'sparse':
+                ret, K, dist, rvecs, tvecs = calibrate_sparse(
+                    obj_points, img_points, img_shape)[:5]
+            else:
+                ret, K, dist, rvecs, tvecs = cv2.calibrateCamera(
+                    obj_points, img_points, img_shape, None, None
+                )
+    else:
+        with metrics.timer('calib_stage_seconds', stage='calibrate'):
+            refined = refine_calibration(obj_points, img_points, img_shape,
+                                         threshold=refine_threshold,
+                                         max_rounds=refine_rounds, names=view_names,
+                                         solver=solver)
+        print_refinement_report(refined)
+        ret, K, dist, rvecs, tvecs = refined[:5]
+        obj_points = [obj_points[i] for i in refined.kept]
+        img_points = [img_points[i] for i in refined.kept]
+    
+    print(f"\n{'='*50}")
+    print("RESULTADOS DE CALIBRACIÓN")
+    print(f"{'='*50}")
+    print(f"Error RMS de reproyección: {ret:.4f} píxeles")
+    print(f"\nMatriz Intrínseca K:")
+    print(K)
+    print(f"\nCoeficientes de distorsión [k1, k2, p1, p2, k3]:")
+    print(dist)
+    
+    if uncertainty is not None:
+        if progress is not None:
+            progress('uncertainty', 0, resamples)
+        with metrics.timer('calib_stage_seconds', stage='uncertainty'):
+            result = calibration_uncertainty(obj_points, img_points, img_shape,
+                                             method=uncertainty, resamples=resamples,
+                                             workers=workers)
+        print_uncertainty_report(result)
+    
+    return ret, K, dist, rvecs, tvecs, obj_points, img_points, img_shape, detection_results
@@ -0,0 +1,293 @@
+"""
+Captura en tiempo real: hilo lector, buffer circular y detección en segundo plano
+El bucle de la interfaz no debe bloquearse ni en cap.read() ni en la
+detección del tablero ni en cv2.imwrite, o la vista previa cae por debajo
+de los fps de la cámara. Aquí cada trabajo vive en su propio hilo (OpenCV
+libera el GIL en read, findChessboardCorners e imwrite):
+
+    Grabber         cámara → FrameRing (los cuadros viejos se sobrescriben)
+    DetectionWorker último cuadro → tablero en una copia reducida (o, con un
+                    CornerTracker, seguido desde el cuadro anterior)
+    AsyncSaver      cola acotada → imwrite atómico
+
+PoseNovelty decide si una detección es una pose suficientemente distinta de
+las ya guardadas (para la captura automática).
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from .corner_detection import refine_in_roi
+
+FrameItem = namedtuple('FrameItem', ['seq', 't_grab', 'frame'])
+Detection = namedtuple('Detection', ['seq', 't_grab', 't_done', 'found', 'corners', 'frame'])
+
+DETECT_FLAGS = (cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE |
+                cv2.CALIB_CB_FAST_CHECK)
+
+
+class FrameRing:
+    """
+    Buffer circular de los últimos `size` cuadros.
+    put() nunca bloquea: si nadie leyó a tiempo, el cuadro más viejo se
+    descarta. latest() espera un cuadro más nuevo que `after`.
+
+    lossless=True (fuentes de archivo sin interfaz): put() espera a que el
+    consumidor de next() libere espacio, así no se pierde ningún cuadro.
+    """
+
+    def __init__(self, size=8, lossless=False):
+        self._frames = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self.lossless = lossless
+        self.closed = False
+        self._consumed = -1
+
+    def put(self, item):
+        with self._cond:
+            if self.lossless:
+                self._cond.wait_for(lambda: self.closed or
+                                    item.seq - self._consumed <= self._frames.maxlen)
+            self._frames.append(item)
+            self._cond.notify_all()
+
+    def latest(self, after=-1, timeout=None):
+        """Cuadro más reciente con seq > after, o None si vence timeout o se cerró."""
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: self.closed or (self._frames and self._frames[-1].seq > after),
+                timeout)
+            if ok and self._frames and self._frames[-1].seq > after:
+                return self._frames[-1]
+            return None
+
+    def next(self, after=-1, timeout=None):
+        """Cuadro siguiente a `after` (el más viejo sin leer), o None."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.closed or (self._frames and self._frames[-1].seq > after),
+                timeout)
+            for item in self._frames:
+                if item.seq > after:
+                    self._consumed = item.seq
+                    self._cond.notify_all()
+                    return item
+            return None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class Grabber(threading.Thread):
+    """
+    Lee cuadros de `source` al ring: cualquier objeto con read() → (ok, frame),
+    como cv2.VideoCapture o las fuentes de camcalib.sources.
+    """
+
+    def __init__(self, source, ring):
+        super().__init__(daemon=True)
+        self.source = source
+        self.ring = ring
+        self.grabbed = 0
+        self.fps = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        t_last = time.perf_counter()
+        while not self._stop_event.is_set():
+            ok, frame = self.source.read()
+            if not ok:
+                break
+            now = time.perf_counter()
+            self.ring.put(FrameItem(self.grabbed, now, frame))
+            self.grabbed += 1
+            # fps de la cámara (promedio móvil exponencial)
+            dt = now - t_last
+            t_last = now
+            if dt > 0:
+                self.fps = 1.0 / dt if self.fps == 0 else 0.9 * self.fps + 0.1 / dt
+        self.ring.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def detect_downscaled(frame, chessboard_size, detect_width=640):
+    """
+    Busca el tablero en una copia reducida a `detect_width` píxeles de ancho
+    y retorna (found, esquinas en coordenadas del cuadro original).
+    Sin cornerSubPix: basta para la vista previa y para decidir capturas.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    scale = min(1.0, detect_width / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale,
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    found, corners = cv2.findChessboardCorners(small, chessboard_size, DETECT_FLAGS)
+    if not found:
+        return False, None
+    return True, corners / scale
+
+
+class DetectionWorker(threading.Thread):
+    """
+    Detecta el tablero siempre en el cuadro más reciente del ring (los
+    intermedios se saltan; con un ring lossless, en todos los cuadros en
+    orden) y publica el resultado en `self.result`.
+    on_result(detection) se llama desde este hilo.
+    tracker: un camcalib.tracking.CornerTracker; las esquinas se siguen de un
+             cuadro al siguiente (ya con precisión subpíxel) y solo se busca
+             el tablero desde cero, en la copia reducida, al perderlo.
+    """
+
+    def __init__(self, ring, chessboard_size, detect_width=640, on_result=None,
+                 tracker=None):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.chessboard_size = chessboard_size
+        self.detect_width = detect_width
+        self.on_result = on_result
+        self.tracker = tracker
+        if tracker is not None and tracker.detect is None:
+            tracker.detect = self._detect_refined
+        self.result = None
+        self.latency = 0.0  # Segundos desde la lectura del cuadro hasta el resultado
+        self.processed = 0
+        self.found = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last_seq = -1
+        while not self._stop_event.is_set():
+            take = self.ring.next if self.ring.lossless else self.ring.latest
+            item = take(after=last_seq, timeout=0.1)
+            if item is None:
+                if self.ring.closed:
+                    break
+                continue
+            last_seq = item.seq
+            if self.tracker is not None:
+                frame = item.frame
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+                found, corners, _ = self.tracker.track(gray)
+            else:
+                found, corners = detect_downscaled(item.frame, self.chessboard_size,
+                                                   self.detect_width)
+            now = time.perf_counter()
+            self.result = Detection(item.seq, item.t_grab, now, found, corners, item.frame)
+            self.latency = now - item.t_grab
+            self.processed += 1
+            self.found += found
+            if self.on_result is not None:
+                self.on_result(self.result)
+
+    def _detect_refined(self, gray):
+        """Detección reducida + cornerSubPix: el punto de partida del seguimiento."""
+        found, corners = detect_downscaled(gray, self.chessboard_size, self.detect_width)
+        if not found:
+            return False, None
+        return True, refine_in_roi(gray, corners.astype(np.float32))
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class AsyncSaver:
+    """
+    Guarda imágenes en un hilo aparte. save() nunca bloquea: si la cola
+    (max_pending) está llena, la imagen se descarta y se cuenta en `skipped`.
+    """
+
+    def __init__(self, max_pending=8, params=None):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.params = params or [cv2.IMWRITE_JPEG_QUALITY, 95]
+        self.saved = 0
+        self.skipped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, frame, path):
+        try:
+            self._queue.put_nowait((frame, path))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            frame, path = job
+            # Escritura atómica: un archivo a medias nunca queda con el nombre final
+            root, ext = os.path.splitext(path)
+            tmp = f'{root}.part{ext}'
+            if cv2.imwrite(tmp, frame, self.params):
+                os.replace(tmp, path)
+                self.saved += 1
+            else:
+                print(f"No se pudo guardar: {path}")
+
+    def close(self):
+        """Espera a que se escriban las imágenes pendientes."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class PoseNovelty:
+    """
+    ¿Es esta detección una pose nueva?
+
+    Cada pose se describe por las 4 esquinas exteriores del tablero en la
+    imagen, normalizadas por la diagonal. Una detección es nueva si alguna
+    esquina se movió más de `min_change` respecto a todas las poses ya
+    aceptadas, y estable si entre esta detección y la anterior se movió
+    menos de `max_motion` (evita guardar cuadros movidos). max_motion=None
+    no exige estabilidad (cuadros que son fotos fijas, p. ej. una carpeta).
+    """
+
+    def __init__(self, image_size, chessboard_size, min_change=0.05, max_motion=0.01):
+        self.diag = float(np.hypot(*image_size))
+        cols, rows = chessboard_size
+        self._outer = [0, cols - 1, cols * rows - cols, cols * rows - 1]
+        self.min_change = min_change
+        self.max_motion = max_motion
+        self.accepted = []
+        self._previous = None
+
+    def descriptor(self, corners):
+        return corners.reshape(-1, 2)[self._outer] / self.diag
+
+    def _distance(self, a, b):
+        # La detección puede numerar el tablero en sentido inverso (180°)
+        return min(np.linalg.norm(a - b, axis=1).max(),
+                   np.linalg.norm(a - b[::-1], axis=1).max())
+
+    def is_new(self, corners):
+        desc = self.descriptor(corners)
+        stable = self.max_motion is None or (
+            self._previous is not None and
+            self._distance(desc, self._previous) < self.max_motion)
+        self._previous = desc
+        if not stable:
+            return False
+        return all(self._distance(desc, old) > self.min_change for old in self.accepted)
+
+    def accept(self, corners):
+        self.accepted.append(self.descriptor(corners))
+
+    def reset_motion(self):
+        """Llamar cuando se pierde el tablero."""
+        self._previous = None
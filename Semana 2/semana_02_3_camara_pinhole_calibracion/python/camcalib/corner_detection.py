@@ -0,0 +1,235 @@
+"""
+Detección de esquinas del patrón de ajedrez por imagen
+Etapa de detección de 04_calibration.py, ejecutable en serie o en paralelo
+(los workers de un pool de procesos necesitan un módulo importable)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from . import metrics
+from .decode import loader
+
+# Criterio de parada del refinamiento subpíxel (el mismo de siempre)
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+SUBPIX_WINDOW   = (11, 11)
+COARSE_FLAGS    = (cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE |
+                   cv2.CALIB_CB_FAST_CHECK)
+
+
+def refine_in_roi(gray, corners, criteria=SUBPIX_CRITERIA, window=SUBPIX_WINDOW):
+    """
+    cornerSubPix restringido al rectángulo que contiene las esquinas
+    (más un margen igual a la ventana de búsqueda).
+    """
+    margin = max(window) + 2
+    x0, y0 = np.maximum(np.floor(corners.reshape(-1, 2).min(axis=0)) - margin, 0).astype(int)
+    x1, y1 = np.ceil(corners.reshape(-1, 2).max(axis=0)).astype(int) + margin + 1
+    roi = gray[y0:y1, x0:x1]
+
+    offset = np.array([x0, y0], dtype=np.float32)
+    local = (corners.reshape(-1, 1, 2) - offset).astype(np.float32)
+    local = cv2.cornerSubPix(roi, local, window, (-1, -1), criteria)
+    return local.reshape(-1, 1, 2) + offset
+
+
+def find_corners_pyramid(gray, chessboard_size, levels=2, criteria=SUBPIX_CRITERIA,
+                         coarse=None):
+    """
+    Detección coarse-to-fine del tablero.
+
+    Busca el patrón en la copia más reducida de la pirámide (cada nivel es
+    la mitad del anterior); si no lo encuentra, prueba el nivel siguiente,
+    hasta llegar a la resolución completa. Las esquinas encontradas se
+    escalan nivel a nivel y se refinan con cornerSubPix en cada uno,
+    terminando en la imagen original.
+
+    levels: profundidad de la pirámide (0 = detección directa a resolución completa)
+    coarse: esquinas ya encontradas en el nivel `levels` (p. ej. en una
+            decodificación reducida); se omite la búsqueda y solo se refinan
+    Retorna (found, corners) como findChessboardCorners + cornerSubPix.
+    """
+    # INTER_AREA conserva los bordes del tablero más nítidos que pyrDown,
+    # y findChessboardCorners es mucho más rápido con bordes nítidos
+    pyramid = [gray]
+    # Con `coarse` el nivel más reducido ya se usó: solo hacen falta los intermedios
+    for _ in range(levels if coarse is None else levels - 1):
+        if coarse is None and min(pyramid[-1].shape) < 2 * 64:  # Demasiado pequeña para detectar
+            break
+        pyramid.append(cv2.resize(pyramid[-1], None, fx=0.5, fy=0.5,
+                                  interpolation=cv2.INTER_AREA))
+
+    if coarse is not None:
+        found, corners, level = True, coarse, levels
+    else:
+        with metrics.timer('calib_stage_seconds', stage='find_chessboard'):
+            for level in range(len(pyramid) - 1, -1, -1):
+                flags = COARSE_FLAGS if level > 0 else None
+                found, corners = cv2.findChessboardCorners(pyramid[level], chessboard_size, flags)
+                if found:
+                    break
+        if not found:
+            return False, None
+
+    with metrics.timer('calib_stage_seconds', stage='corner_subpix'):
+        corners = corners.reshape(-1, 1, 2).astype(np.float32)
+        for finer in range(level - 1, -1, -1):
+            # Reducción x2 con INTER_AREA: el píxel (x, y) cubre [2x, 2x+2)
+            corners = corners * 2 + 0.5
+            if finer > 0:
+                corners = refine_in_roi(pyramid[finer], corners, criteria, (5, 5))
+        return True, refine_in_roi(gray, corners, criteria)
+
+
+def find_corners(gray, chessboard_size, criteria=SUBPIX_CRITERIA, pyramid_levels=0):
+    """
+    Detecta y refina las esquinas en una imagen en escala de grises.
+    pyramid_levels: > 0 usa find_corners_pyramid con esa profundidad
+    Retorna (found, corners) con corners en forma (N, 1, 2) o None.
+    """
+    if pyramid_levels > 0:
+        return find_corners_pyramid(gray, chessboard_size, pyramid_levels, criteria)
+
+    with metrics.timer('calib_stage_seconds', stage='find_chessboard'):
+        found, corners = cv2.findChessboardCorners(gray, chessboard_size, None)
+    if not found:
+        return False, None
+    with metrics.timer('calib_stage_seconds', stage='corner_subpix'):
+        corners = cv2.cornerSubPix(gray, corners, SUBPIX_WINDOW, (-1, -1), criteria)
+    # Forma clásica (N, 1, 2), sin importar la versión de OpenCV
+    return True, corners.reshape(-1, 1, 2)
+
+
+def detect_corners(fname, chessboard_size, criteria=SUBPIX_CRITERIA,
+                   return_image=True, pyramid_levels=0, reduced_decode=False):
+    """
+    Lee una imagen, detecta las esquinas del ajedrez y las refina a subpíxel.
+
+    La imagen se decodifica directamente en escala de grises (camcalib.decode).
+    pyramid_levels: ver find_corners
+    reduced_decode: con pyramid_levels > 0, el nivel grueso se decodifica
+                    reducido (IMREAD_REDUCED_GRAYSCALE, hasta 1/8) y si ahí no
+                    aparece el tablero la imagen se descarta sin decodificarla
+                    completa. Mucho más rápido con imágenes sin tablero, pero
+                    pierde tableros que solo se ven a resolución completa.
+    Retorna (fname, img, img_size, corners, found, elapsed):
+        img: imagen en gris leída (None si no se pudo leer, si return_image=False
+             o si reduced_decode la descartó sin decodificarla completa)
+        img_size: (width, height), None si no se pudo leer
+        corners: esquinas refinadas (N, 1, 2) o None si no se detectaron
+        elapsed: segundos empleados en esta imagen
+    """
+    t0 = time.perf_counter()
+    reader = loader()
+    with metrics.timer('calib_stage_seconds', stage='imread'):
+        data = reader.read_bytes(fname)
+
+    coarse = None
+    levels = min(pyramid_levels, 3) if reduced_decode else 0
+    header_size = reader.image_size(data) if levels else None
+    if header_size is not None:
+        # Mismo límite que find_corners_pyramid: niveles de al menos 128 px
+        while levels and min(header_size) >> levels < 2 * 64:
+            levels -= 1
+    if levels:
+        factor = 2 ** levels
+        with metrics.timer('calib_stage_seconds', stage='imread'):
+            small = reader.decode_gray(data, factor)
+        if small is None:
+            return fname, None, None, None, False, time.perf_counter() - t0
+        with metrics.timer('calib_stage_seconds', stage='find_chessboard'):
+            found, coarse = cv2.findChessboardCorners(small, chessboard_size, COARSE_FLAGS)
+        if not found:
+            img_size = reader.image_size(data, small, factor)
+            return fname, None, img_size, None, False, time.perf_counter() - t0
+        # El escalado DCT suaviza distinto que INTER_AREA y findChessboardCorners
+        # puede errar por unos píxeles: refinar ya en el nivel grueso
+        with metrics.timer('calib_stage_seconds', stage='corner_subpix'):
+            coarse = refine_in_roi(small, coarse.reshape(-1, 1, 2).astype(np.float32),
+                                   criteria, (5, 5))
+
+    with metrics.timer('calib_stage_seconds', stage='imread'):
+        gray = reader.decode_gray(data)
+    if gray is None:
+        return fname, None, None, None, False, time.perf_counter() - t0
+
+    img_size = gray.shape[1::-1]
+    if coarse is not None:
+        found, corners = find_corners_pyramid(gray, chessboard_size, levels, criteria,
+                                              coarse=coarse)
+    else:
+        found, corners = find_corners(gray, chessboard_size, criteria, pyramid_levels)
+
+    if not return_image:
+        gray = None  # No viaja de vuelta al proceso principal
+    return fname, gray, img_size, corners, bool(found), time.perf_counter() - t0
+
+
+def _init_worker(metrics_enabled=False):
+    # Un hilo de OpenCV por proceso: el paralelismo lo pone el pool,
+    # y así no se sobresuscriben los núcleos
+    cv2.setNumThreads(1)
+    if metrics_enabled:
+        metrics.enable()
+
+
+def _detect_star(args):
+    return detect_corners(*args)
+
+
+def _detect_with_metrics(args):
+    # En un proceso worker las métricas viajan de vuelta junto al resultado
+    return detect_corners(*args), metrics.drain()
+
+
+def detect_all(fnames, chessboard_size, workers=1, executor='process',
+               criteria=SUBPIX_CRITERIA, keep_images=None, pyramid_levels=0,
+               reduced_decode=False):
+    """
+    Ejecuta detect_corners sobre todas las imágenes.
+
+    workers: número de workers (None = todos los núcleos, 1 = en serie)
+    executor: 'process' o 'thread'
+    keep_images: cuántas imágenes decodificadas devolver (las primeras);
+                 None = todas. Las demás llegan con img=None.
+    pyramid_levels: profundidad de la detección coarse-to-fine (0 = desactivada)
+    reduced_decode: ver detect_corners
+    Genera los resultados en el MISMO orden de fnames, sin importar
+    el orden en que terminen los workers.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(fnames)))
+    tasks = [(fname, chessboard_size, criteria, keep_images is None or i < keep_images,
+              pyramid_levels, reduced_decode)
+             for i, fname in enumerate(fnames)]
+
+    if workers == 1:
+        for task in tasks:
+            yield _detect_star(task)
+        return
+
+    if executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(metrics.enabled(),))
+        # Bloques de varias imágenes por tarea para amortizar el IPC
+        chunksize = max(1, len(tasks) // (workers * 4))
+    elif executor == 'thread':
+        # cv2 libera el GIL durante la decodificación y la detección
+        pool = ThreadPoolExecutor(max_workers=workers)
+        chunksize = 1
+    else:
+        raise ValueError("executor debe ser 'process' o 'thread'")
+
+    with pool:
+        # map() conserva el orden de entrada
+        if executor == 'process' and metrics.enabled():
+            for result, state in pool.map(_detect_with_metrics, tasks, chunksize=chunksize):
+                metrics.merge(state)
+                yield result
+        else:
+            yield from pool.map(_detect_star, tasks, chunksize=chunksize)
@@ -0,0 +1,226 @@
+"""
+Generador de datasets sintéticos de calibración a gran escala
+Muestrea (a partir de una semilla) muchos modelos de cámara —resolución,
+focal, punto principal, k1, k2, p1, p2, k3— y miles de poses del tablero,
+renderiza las imágenes en un pool de procesos con render_chessboard y
+escribe un manifiesto JSON con la verdad de terreno de cada imagen
+(K, dist, rvec, tvec y esquinas proyectadas).
+
+Con la misma semilla el resultado es idéntico sin importar el número de
+workers: cada imagen tiene su propia semilla derivada (SeedSequence.spawn).
+Línea de comandos: synthetic_dataset.py
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .synthetic import euler_to_rvec, render_chessboard
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+DEFAULT_RESOLUTIONS = ((640, 480), (1280, 960), (1920, 1080))
+
+# Rangos de los parámetros de cámara muestreados
+FOCAL_RANGE = (0.6, 1.3)        # fx / ancho de la imagen
+PRINCIPAL_JITTER = 0.03         # desvío de (cx, cy) respecto al centro, fracción del tamaño
+ASPECT_JITTER = 0.01            # |fy/fx - 1|
+DIST_RANGES = {                 # coeficientes [k1, k2, p1, p2, k3]
+    'k1': (-0.30, 0.10),
+    'k2': (-0.05, 0.15),
+    'p1': (-0.002, 0.002),
+    'p2': (-0.002, 0.002),
+    'k3': (-0.05, 0.05),
+}
+
+# Rangos de las poses del tablero
+ANGLE_RANGE = (35, 35, 20)      # |rot_x|, |rot_y|, |rot_z| máximos (grados)
+COVERAGE_RANGE = (0.3, 0.8)     # ancho del tablero / ancho de la imagen
+MARGIN_PX = 10                  # las esquinas deben quedar a este margen del borde
+
+
+def sample_camera(rng, resolutions=DEFAULT_RESOLUTIONS):
+    """Modelo de cámara aleatorio: dict con width, height, K (3x3) y dist (5,)."""
+    w, h = resolutions[rng.integers(len(resolutions))]
+    fx = rng.uniform(*FOCAL_RANGE) * w
+    fy = fx * (1 + rng.uniform(-ASPECT_JITTER, ASPECT_JITTER))
+    cx = w / 2 + rng.uniform(-PRINCIPAL_JITTER, PRINCIPAL_JITTER) * w
+    cy = h / 2 + rng.uniform(-PRINCIPAL_JITTER, PRINCIPAL_JITTER) * h
+    K = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    dist = np.array([rng.uniform(*DIST_RANGES[k]) for k in ('k1', 'k2', 'p1', 'p2', 'k3')])
+    return {'width': int(w), 'height': int(h), 'K': K, 'dist': dist}
+
+
+def sample_pose(rng, camera, objp, cols, rows, square_size, max_tries=1000):
+    """
+    Pose aleatoria del tablero con todas las esquinas dentro de la imagen.
+    Retorna (rvec, tvec, esquinas proyectadas (N, 2)).
+    """
+    w, h = camera['width'], camera['height']
+    K, dist = camera['K'], camera['dist']
+    board_w = (cols + 1) * square_size
+    center = objp.mean(axis=0)
+    for _ in range(max_tries):
+        rvec = euler_to_rvec(*rng.uniform(-1, 1, 3) * ANGLE_RANGE)
+        tz = K[0, 0] * board_w / (rng.uniform(*COVERAGE_RANGE) * w)
+        # Centro del tablero en cualquier punto del campo de visión
+        u, v = rng.uniform(0.2, 0.8) * w, rng.uniform(0.2, 0.8) * h
+        R, _ = cv2.Rodrigues(rvec)
+        tvec = (np.array([(u - K[0, 2]) / K[0, 0], (v - K[1, 2]) / K[1, 1], 1.0]) * tz
+                - R @ center).reshape(3, 1)
+
+        if np.any((objp @ R.T + tvec.ravel())[:, 2] <= 0):
+            continue
+        proj, _ = cv2.projectPoints(objp, rvec, tvec, K, dist)
+        proj = proj.reshape(-1, 2)
+        if (np.all(proj[:, 0] > MARGIN_PX) and np.all(proj[:, 0] < w - MARGIN_PX) and
+                np.all(proj[:, 1] > MARGIN_PX) and np.all(proj[:, 1] < h - MARGIN_PX)):
+            return rvec, tvec, proj
+    raise RuntimeError("No se encontró una pose con el tablero dentro de la imagen")
+
+
+def _init_worker():
+    # Un hilo de OpenCV por proceso: el paralelismo lo pone el pool
+    cv2.setNumThreads(1)
+
+
+def _render_task(task):
+    """Renderiza y guarda una imagen; todo lo aleatorio sale de su propia semilla."""
+    (path, camera, rvec, tvec, board, noise_sigma, supersample, quality, seed) = task
+    cols, rows, square_size = board
+    img = render_chessboard(rvec, tvec, camera['K'], camera['dist'], camera['width'],
+                            camera['height'], cols, rows, square_size,
+                            supersample=supersample)
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal(img.shape, dtype=np.float32)
+    noise *= noise_sigma
+    noise += img
+    img = np.clip(noise, 0, 255, out=noise).astype(np.uint8)
+
+    ok, buf = cv2.imencode(os.path.splitext(path)[1], img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError(f"No se pudo codificar: {path}")
+    tmp = path + '.part'
+    with open(tmp, 'wb') as f:
+        f.write(buf.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def _render_batch(batch):
+    """Tareas de una sola cámara: el worker calcula sus rayos una sola vez."""
+    return [_render_task(task) for task in batch]
+
+
+def generate_dataset(out_dir, n_cameras=4, views_per_camera=50, seed=0,
+                     resolutions=DEFAULT_RESOLUTIONS, board=(9, 6, 30.0),
+                     noise_sigma=3.0, supersample=2, quality=95, workers=None):
+    """
+    Genera el dataset en out_dir (una carpeta por cámara) y retorna el manifiesto.
+
+    board: (esquinas internas en x, en y, lado del cuadro en mm)
+    workers: procesos del pool (None = todos los núcleos, 1 = en serie)
+    """
+    if n_cameras < 1:
+        raise ValueError(f"n_cameras debe ser >= 1, no {n_cameras}")
+    if views_per_camera < 1:
+        raise ValueError(f"views_per_camera debe ser >= 1, no {views_per_camera}")
+    cols, rows, square_size = board
+    objp = np.zeros((rows * cols, 3), dtype=np.float64)
+    objp[:, :2] = np.mgrid[0:cols, 0:rows].T.reshape(-1, 2) * square_size
+
+    # Semillas independientes para cámaras, poses y ruido de cada imagen
+    root = np.random.SeedSequence(seed)
+    camera_seq, pose_seq, noise_seq = root.spawn(3)
+    camera_rng = np.random.default_rng(camera_seq)
+    pose_seqs = pose_seq.spawn(n_cameras)
+    noise_seqs = noise_seq.spawn(n_cameras * views_per_camera)
+
+    cameras, images, tasks = [], [], []
+    for c in range(n_cameras):
+        camera = sample_camera(camera_rng, resolutions)
+        cameras.append(camera)
+        cam_dir = os.path.join(out_dir, f'cam_{c:02d}')
+        os.makedirs(cam_dir, exist_ok=True)
+        pose_rng = np.random.default_rng(pose_seqs[c])
+        for v in range(views_per_camera):
+            rvec, tvec, corners = sample_pose(pose_rng, camera, objp, cols, rows, square_size)
+            name = os.path.join(f'cam_{c:02d}', f'img_{v:05d}.jpg')
+            images.append({'file': name, 'camera': c,
+                           'rvec': rvec.ravel().tolist(), 'tvec': tvec.ravel().tolist(),
+                           'corners': np.round(corners, 6).tolist()})
+            tasks.append((os.path.join(out_dir, name), camera, rvec, tvec, board,
+                          noise_sigma, supersample, quality,
+                          noise_seqs[c * views_per_camera + v]))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    t0 = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            _render_task(task)
+    else:
+        # Lotes de una sola cámara: cada worker calcula los rayos por píxel
+        # (caros, ~segundos a 1080p) una vez por lote y la caché de
+        # synthetic.pixel_rays no necesita guardar más que la cámara en curso.
+        # Cada cámara se parte en los lotes justos para ocupar a todos los workers
+        parts = -(-workers // n_cameras)
+        size = -(-views_per_camera // parts)
+        batches = [tasks[i:min(i + size, end)]
+                   for end in range(views_per_camera, len(tasks) + 1, views_per_camera)
+                   for i in range(end - views_per_camera, end, size)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for paths in pool.map(_render_batch, batches):
+                if (done + len(paths)) // 500 > done // 500:
+                    print(f"  {done + len(paths)}/{len(tasks)} imágenes")
+                done += len(paths)
+    elapsed = time.perf_counter() - t0
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'seed': seed,
+        'board': {'cols': cols, 'rows': rows, 'square_size': square_size},
+        'noise_sigma': noise_sigma,
+        'supersample': supersample,
+        'cameras': [{'id': c, 'width': cam['width'], 'height': cam['height'],
+                     'K': cam['K'].tolist(), 'dist': cam['dist'].tolist()}
+                    for c, cam in enumerate(cameras)],
+        'images': images,
+    }
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + '.part', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.part', path)
+
+    rate = f"{len(tasks) / elapsed * 60:.0f} imágenes/min, " if elapsed > 0 else ''
+    print(f"Generadas {len(tasks)} imágenes de {n_cameras} cámaras en {elapsed:.1f} s "
+          f"({rate}{workers} workers)")
+    return manifest
+
+
+def load_manifest(out_dir):
+    """Lee el manifiesto y convierte K, dist, rvec, tvec y esquinas a arreglos."""
+    with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Versión de manifiesto no soportada: {manifest.get('version')}")
+    for cam in manifest['cameras']:
+        cam['K'] = np.array(cam['K'])
+        cam['dist'] = np.array(cam['dist'])
+    for img in manifest['images']:
+        img['rvec'] = np.array(img['rvec']).reshape(3, 1)
+        img['tvec'] = np.array(img['tvec']).reshape(3, 1)
+        img['corners'] = np.array(img['corners'], dtype=np.float32).reshape(-1, 1, 2)
+    return manifest
+
+
+def parse_resolution(text):
+    """'1280x960' → (1280, 960)."""
+    w, h = text.lower().split('x')
+    return int(w), int(h)
@@ -0,0 +1,119 @@
+"""
+Lectura de imágenes para la detección: escala de grises directa y reducida
+La detección solo usa la luminancia, así que decodificar a BGR y después
+convertir con cvtColor es trabajo (y memoria: 3 bytes por píxel más la copia
+gris) desperdiciado. El decodificador JPEG puede entregar directamente el
+canal Y (IMREAD_GRAYSCALE) y, con IMREAD_REDUCED_GRAYSCALE_2/4/8, escalar
+en el dominio DCT sin decodificar la imagen completa: ideal para el nivel
+grueso de la detección coarse-to-fine.
+
+ImageLoader lee el archivo una sola vez a un buffer que se reutiliza entre
+imágenes (crece solo cuando llega un archivo más grande); del mismo buffer
+salen la decodificación reducida y la completa, y el tamaño se lee del
+encabezado JPEG sin decodificar. Hay un ImageLoader por hilo (loader()).
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+REDUCED_GRAY = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Marcadores SOF (inicio de cuadro) de JPEG: traen alto y ancho
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data):
+    """(width, height) leído del encabezado JPEG, o None si no es un JPEG válido."""
+    data = memoryview(data)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Relleno entre marcadores
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+class ImageLoader:
+    """
+    Lector con buffer de archivo reutilizable.
+
+        loader = ImageLoader()
+        data = loader.read_bytes(path)        # vista del buffer interno
+        small = loader.decode_gray(data, 4)   # 1/4 de resolución
+        gray = loader.decode_gray(data)       # resolución completa
+
+    La vista que retorna read_bytes es válida hasta la siguiente lectura.
+    """
+
+    def __init__(self, initial_size=1 << 20):
+        self._buf = np.empty(initial_size, dtype=np.uint8)
+        self.reallocations = 0
+
+    def read_bytes(self, path):
+        """Lee el archivo al buffer interno; None si no se pudo abrir."""
+        try:
+            with open(path, 'rb') as f:
+                size = f.seek(0, 2)
+                f.seek(0)
+                if size > len(self._buf):
+                    # Crecer al doble: pocas realocaciones aunque los tamaños varíen
+                    self._buf = np.empty(max(size, 2 * len(self._buf)), dtype=np.uint8)
+                    self.reallocations += 1
+                n = f.readinto(memoryview(self._buf)[:size])
+        except OSError:
+            return None
+        return self._buf[:n]
+
+    @staticmethod
+    def decode_gray(data, reduce=1):
+        """Decodifica a escala de grises, reducida por 1, 2, 4 u 8; None si falla."""
+        if data is None or len(data) == 0:
+            return None
+        return cv2.imdecode(data, REDUCED_GRAY[reduce])
+
+    def read_gray(self, path, reduce=1):
+        """read_bytes + decode_gray."""
+        return self.decode_gray(self.read_bytes(path), reduce)
+
+    @staticmethod
+    def image_size(data, decoded=None, reduce=1):
+        """
+        (width, height) a resolución completa: del encabezado JPEG o, si no
+        es JPEG, de la imagen ya decodificada (aproximado si reduce > 1).
+        """
+        size = jpeg_size(data) if data is not None else None
+        if size is None and decoded is not None:
+            size = (decoded.shape[1] * reduce, decoded.shape[0] * reduce)
+        return size
+
+
+_local = threading.local()
+
+
+def loader():
+    """ImageLoader propio del hilo (cada worker reutiliza su buffer)."""
+    if not hasattr(_local, 'loader'):
+        _local.loader = ImageLoader()
+    return _local.loader
+
+
+def read_gray(path, reduce=1):
+    """Imagen en escala de grises (reducida por `reduce`) o None si no se pudo leer."""
+    return loader().read_gray(path, reduce)
@@ -0,0 +1,158 @@
+"""
+Caché en disco de esquinas detectadas
+Evita repetir findChessboardCorners + cornerSubPix en imágenes ya procesadas.
+Todo se guarda en un único índice .npz
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from .corner_detection import SUBPIX_CRITERIA, SUBPIX_WINDOW
+
+# Subir este número invalida todas las entradas (p. ej. si cambia la detección)
+CACHE_VERSION = 1
+
+MAX_AGE_DAYS = 90        # Entradas sin usar por más tiempo se descartan al guardar
+MAX_ENTRIES = 50_000     # Tope del índice (~25 MB); se descartan las menos recientes
+
+
+def file_hash(fname, chunk_size=1 << 20):
+    """Hash del CONTENIDO del archivo (no de su nombre ni su fecha)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DetectionCache:
+    """
+    Índice clave → (tamaño de imagen, esquinas refinadas, detectado).
+
+    La clave combina el hash del contenido de la imagen con el tamaño del
+    tablero, los parámetros subpíxel y la profundidad de la pirámide, así que una imagen modificada o un
+    cambio de configuración nunca reutilizan resultados viejos.
+    Al guardar se conservan las entradas de ejecuciones anteriores (otras
+    carpetas o configuraciones que comparten el archivo) y solo se descartan
+    las que llevan más de max_age_days sin usarse o, por encima de
+    max_entries, las usadas hace más tiempo.
+
+    Formato del .npz (compacto, sin pickle):
+        keys:    (M,)   claves hexadecimales
+        sizes:   (M, 2) tamaño de imagen (width, height)
+        found:   (M,)   esquinas detectadas o no
+        offsets: (M+1,) inicio de las esquinas de cada entrada en `corners`
+        corners: (T, 2) float32, todas las esquinas concatenadas
+        used:    (M,)   último uso de cada entrada (segundos Unix)
+        memo_*:  ruta, (tamaño, mtime), hash y último uso de cada archivo,
+                 para no volver a leer archivos que no han cambiado
+    """
+
+    def __init__(self, path, chessboard_size, criteria=SUBPIX_CRITERIA,
+                 window=SUBPIX_WINDOW, pyramid_levels=0, reduced_decode=False,
+                 tracking=False, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_age = max_age_days * 86400.0
+        self.max_entries = max_entries
+        self.params = (f'v{CACHE_VERSION}|{chessboard_size[0]}x{chessboard_size[1]}'
+                       f'|{tuple(criteria)}|{tuple(window)}|p{pyramid_levels}'
+                       + ('|reduced' if reduced_decode else '')
+                       + ('|tracking' if tracking else ''))
+        self.entries = {}   # clave → (size, corners, found)
+        self.memo = {}      # ruta → ((tamaño, mtime_ns), hash)
+        self.last_used = {}  # clave o ruta → último uso (segundos Unix)
+        self.used = set()
+        self.seen_paths = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                keys, sizes, found = data['keys'], data['sizes'], data['found']
+                offsets, corners = data['offsets'], data['corners']
+                memo_paths, memo_stats = data['memo_paths'], data['memo_stats']
+                memo_hashes = data['memo_hashes']
+                # Índices anteriores sin fechas de uso: cuentan como usados ahora
+                now = time.time()
+                used = data['used'] if 'used' in data.files else np.full(len(keys), now)
+                memo_used = (data['memo_used'] if 'memo_used' in data.files
+                             else np.full(len(memo_paths), now))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Caché ilegible, se ignora ({self.path}): {e}")
+            return
+
+        for i, key in enumerate(keys):
+            pts = corners[offsets[i]:offsets[i + 1]].reshape(-1, 1, 2)
+            self.entries[str(key)] = (tuple(int(v) for v in sizes[i]),
+                                      pts if found[i] else None,
+                                      bool(found[i]))
+            self.last_used[str(key)] = float(used[i])
+        for p, st, h, t in zip(memo_paths, memo_stats, memo_hashes, memo_used):
+            self.memo[str(p)] = ((int(st[0]), int(st[1])), str(h))
+            self.last_used[str(p)] = float(t)
+
+    def key_for(self, fname):
+        """Clave de caché de una imagen (solo relee el archivo si cambió)."""
+        fname = os.path.abspath(fname)
+        self.seen_paths.add(fname)
+        st = os.stat(fname)
+        stamp = (st.st_size, st.st_mtime_ns)
+        memo = self.memo.get(fname)
+        if memo is not None and memo[0] == stamp:
+            content = memo[1]
+        else:
+            content = file_hash(fname)
+            self.memo[fname] = (stamp, content)
+        return hashlib.blake2b(f'{content}|{self.params}'.encode(),
+                               digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Retorna (size, corners, found) o None si no está en caché."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.used.add(key)
+        return entry
+
+    def put(self, key, image_size, corners, found):
+        self.entries[key] = (tuple(image_size),
+                             None if corners is None else np.asarray(corners, np.float32),
+                             bool(found))
+        self.used.add(key)
+
+    def _keep(self, names, now):
+        """Las entradas que sobreviven: recientes y, como mucho, max_entries."""
+        names = [n for n in names if now - self.last_used.get(n, now) <= self.max_age]
+        names.sort(key=lambda n: self.last_used.get(n, now), reverse=True)
+        return sorted(names[:self.max_entries])
+
+    def save(self):
+        """Escribe el índice de forma atómica, descartando lo viejo (ver la clase)."""
+        now = time.time()
+        for name in self.used | self.seen_paths:
+            self.last_used[name] = now
+        keys = self._keep(list(self.entries), now)
+        sizes = np.array([self.entries[k][0] for k in keys], dtype=np.int32).reshape(-1, 2)
+        found = np.array([self.entries[k][2] for k in keys], dtype=bool)
+        blocks = [self.entries[k][1].reshape(-1, 2) if self.entries[k][2]
+                  else np.empty((0, 2), np.float32) for k in keys]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in blocks])
+        corners = np.concatenate(blocks) if blocks else np.empty((0, 2), np.float32)
+
+        memo_paths = self._keep(list(self.memo), now)
+        tmp = self.path + '.tmp.npz'
+        np.savez(tmp,
+                 keys=np.array(keys, dtype='U32'), sizes=sizes, found=found,
+                 offsets=offsets, corners=corners.astype(np.float32),
+                 used=np.array([self.last_used[k] for k in keys], dtype=np.float64),
+                 memo_paths=np.array(memo_paths, dtype=str),
+                 memo_stats=np.array([self.memo[p][0] for p in memo_paths],
+                                     dtype=np.int64).reshape(-1, 2),
+                 memo_hashes=np.array([self.memo[p][1] for p in memo_paths], dtype='U32'),
+                 memo_used=np.array([self.last_used[p] for p in memo_paths], dtype=np.float64))
+        os.replace(tmp, self.path)
@@ -0,0 +1,196 @@
+"""
+Instrumentación liviana del pipeline de calibración
+Contadores e histogramas (con cronómetros) por etapa, desactivados por
+defecto: apagados, timer() retorna un contexto vacío compartido y count()/
+observe() solo consultan una bandera, así que el costo es casi nulo.
+
+Se activan con enable() o con la variable de entorno CALIB_METRICS=1, y se
+exportan como líneas JSON (export_jsonl) o en el formato de texto de
+Prometheus (export_prometheus, p. ej. para el textfile collector de
+node_exporter).
+
+    from camcalib import metrics
+    metrics.enable()
+    with metrics.timer('calib_stage_seconds', stage='calibrate'):
+        cv2.calibrateCamera(...)
+    metrics.export_prometheus('calib.prom')
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Límites (s) de los histogramas: de 1 ms a 1 min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'calib_stage_seconds': 'Duración de cada etapa del pipeline',
+    'calib_image_detection_seconds': 'Latencia de detección por imagen',
+    'calib_images_total': 'Imágenes procesadas por resultado',
+    'undistort_images_total': 'Imágenes corregidas',
+}
+
+_enabled = os.environ.get('CALIB_METRICS', '') not in ('', '0')
+_lock = threading.Lock()
+_counters = {}    # (nombre, etiquetas) → valor
+_histograms = {}  # (nombre, etiquetas) → [conteos por bucket + inf, suma, n]
+_NULL = nullcontext()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def count(name, value=1, **labels):
+    """Suma `value` al contador `name` con esas etiquetas."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Registra un valor (p. ej. segundos) en el histograma `name`."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * (len(DEFAULT_BUCKETS) + 1), 0.0, 0]
+        hist[0][bisect_left(DEFAULT_BUCKETS, value)] += 1
+        hist[1] += value
+        hist[2] += 1
+
+
+class _Timer:
+    __slots__ = ('name', 'labels', 't0')
+
+    def __init__(self, name, labels):
+        self.name, self.labels = name, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0, **self.labels)
+
+
+def timer(name, **labels):
+    """Cronómetro para usar con `with`; registra la duración en el histograma `name`."""
+    if not _enabled:
+        return _NULL
+    return _Timer(name, labels)
+
+
+def snapshot():
+    """Copia del estado: {'counters': {...}, 'histograms': {...}} con las mismas claves."""
+    with _lock:
+        return {'counters': dict(_counters),
+                'histograms': {k: [list(h[0]), h[1], h[2]] for k, h in _histograms.items()}}
+
+
+def drain():
+    """Retorna snapshot() y deja el registro vacío (para enviarlo desde un worker)."""
+    with _lock:
+        state = {'counters': dict(_counters),
+                 'histograms': {k: [list(h[0]), h[1], h[2]] for k, h in _histograms.items()}}
+        _counters.clear()
+        _histograms.clear()
+    return state
+
+
+def merge(state):
+    """Suma al registro el estado de otro proceso (resultado de drain)."""
+    with _lock:
+        for key, value in state['counters'].items():
+            _counters[key] = _counters.get(key, 0) + value
+        for key, (buckets, total, n) in state['histograms'].items():
+            hist = _histograms.setdefault(key, [[0] * (len(DEFAULT_BUCKETS) + 1), 0.0, 0])
+            hist[0] = [a + b for a, b in zip(hist[0], buckets)]
+            hist[1] += total
+            hist[2] += n
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def export_jsonl(path):
+    """Agrega al archivo una línea JSON por serie (contador o histograma)."""
+    state = snapshot()
+    ts = time.time()
+    with open(path, 'a') as f:
+        for (name, labels), value in sorted(state['counters'].items()):
+            f.write(json.dumps({'ts': ts, 'name': name, 'type': 'counter',
+                                'labels': dict(labels), 'value': value}) + '\n')
+        for (name, labels), (buckets, total, n) in sorted(state['histograms'].items()):
+            f.write(json.dumps({'ts': ts, 'name': name, 'type': 'histogram',
+                                'labels': dict(labels), 'count': n, 'sum': total,
+                                'buckets': dict(zip([*map(str, DEFAULT_BUCKETS), '+Inf'],
+                                                    buckets))}) + '\n')
+
+
+def _format_labels(labels, extra=()):
+    items = [*labels, *extra]
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+def prometheus_text():
+    """Estado actual en el formato de texto de exposición de Prometheus."""
+    state = snapshot()
+    lines = []
+    by_name = {}
+    for (name, labels), value in state['counters'].items():
+        by_name.setdefault((name, 'counter'), []).append((labels, value))
+    for (name, labels), value in state['histograms'].items():
+        by_name.setdefault((name, 'histogram'), []).append((labels, value))
+
+    for (name, kind), series in sorted(by_name.items()):
+        if name in HELP:
+            lines.append(f'# HELP {name} {HELP[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series):
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            buckets, total, n = value
+            cumulative = 0
+            for le, c in zip([*map(str, DEFAULT_BUCKETS), '+Inf'], buckets):
+                cumulative += c
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {n}')
+    return '\n'.join(lines) + '\n'
+
+
+def export_prometheus(path):
+    """Escribe prometheus_text() de forma atómica (el collector nunca lee un archivo a medias)."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
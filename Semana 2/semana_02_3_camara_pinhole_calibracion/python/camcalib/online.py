@@ -0,0 +1,127 @@
+"""
+Calibración incremental (en línea) a partir de un flujo de detecciones
+En lugar de juntar todas las imágenes y calibrar al final, cada conjunto de
+esquinas nuevo entra a un conjunto acotado de vistas y se recalibra partiendo
+de la estimación anterior (CALIB_USE_INTRINSIC_GUESS), que converge en pocas
+iteraciones. Conjunto de vistas:
+    'reservoir': muestreo de reservorio, una muestra uniforme de todo lo visto
+    'sliding':   solo las últimas max_views (sigue cambios, p. ej. de foco)
+
+La estimación se declara convergida cuando fx, fy, cx, cy cambian menos de
+`tol` (relativo) durante `patience` resoluciones seguidas y la desviación
+estándar de fx y fy (de calibrateCameraExtended) es menor que `std_tol`.
+"""
+
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+OnlineEstimate = namedtuple('OnlineEstimate', [
+    'seen', 'views', 'rms', 'K', 'dist', 'std', 'change', 'converged'])
+
+# Los de cv2.calibrateCamera; con buena semilla bastan pocas iteraciones
+COLD_CRITERIA = (cv2.TERM_CRITERIA_COUNT + cv2.TERM_CRITERIA_EPS, 30, np.finfo(float).eps)
+WARM_CRITERIA = (cv2.TERM_CRITERIA_COUNT + cv2.TERM_CRITERIA_EPS, 10, 1e-6)
+
+
+class OnlineCalibrator:
+    """
+    image_size: (width, height); chessboard_size: esquinas internas (cols, rows)
+    max_views: tamaño del conjunto de vistas con que se recalibra
+    strategy: 'reservoir' o 'sliding'
+    min_views: vistas necesarias para la primera calibración
+    solve_every: recalibrar cada N vistas nuevas
+    """
+
+    def __init__(self, image_size, chessboard_size, square_size, max_views=30,
+                 strategy='reservoir', min_views=5, solve_every=1, tol=2e-3,
+                 std_tol=5e-3, patience=3, flags=0, seed=0):
+        if strategy not in ('reservoir', 'sliding'):
+            raise ValueError(f"strategy debe ser 'reservoir' o 'sliding', no {strategy!r}")
+        cols, rows = chessboard_size
+        self.objp = np.zeros((rows * cols, 3), dtype=np.float32)
+        self.objp[:, :2] = np.mgrid[0:cols, 0:rows].T.reshape(-1, 2) * square_size
+        self.image_size = tuple(int(v) for v in image_size)
+        self.max_views = max_views
+        self.strategy = strategy
+        self.min_views = max(3, min_views)
+        self.solve_every = solve_every
+        self.tol = tol
+        self.std_tol = std_tol
+        self.patience = patience
+        self.flags = flags
+        self.rng = np.random.default_rng(seed)
+
+        self.views = deque(maxlen=max_views) if strategy == 'sliding' else []
+        self.seen = 0
+        self.estimate = None
+        self._stable = 0
+        self._since_solve = 0
+
+    def _keep(self, corners):
+        """Agrega la vista al conjunto; retorna False si el reservorio la descartó."""
+        if self.strategy == 'sliding' or len(self.views) < self.max_views:
+            self.views.append(corners)
+            return True
+        j = self.rng.integers(0, self.seen)  # seen ya cuenta esta vista
+        if j < self.max_views:
+            self.views[j] = corners
+            return True
+        return False
+
+    def add(self, corners):
+        """
+        Agrega un conjunto de esquinas (N, 1, 2) en píxeles del tamaño completo.
+        Retorna la nueva OnlineEstimate si se recalibró, o None.
+        """
+        self.seen += 1
+        if not self._keep(np.asarray(corners, dtype=np.float32).reshape(-1, 1, 2)):
+            return None
+        self._since_solve += 1
+        if len(self.views) < self.min_views or self._since_solve < self.solve_every:
+            return None
+        self._since_solve = 0
+        return self.solve()
+
+    def solve(self):
+        """Recalibra con el conjunto actual de vistas (semilla: la estimación anterior)."""
+        views = list(self.views)
+        obj_points = [self.objp] * len(views)
+        previous = self.estimate
+        if previous is None:
+            K0 = cv2.initCameraMatrix2D(obj_points, views, self.image_size)
+            dist0, criteria = np.zeros(5), COLD_CRITERIA
+        else:
+            K0, dist0, criteria = previous.K.copy(), previous.dist.copy(), WARM_CRITERIA
+
+        rms, K, dist, _, _, std, _, _ = cv2.calibrateCameraExtended(
+            obj_points, views, self.image_size, K0, dist0,
+            flags=self.flags | cv2.CALIB_USE_INTRINSIC_GUESS, criteria=criteria)
+        std = std.ravel()[:4]
+
+        params = K[[0, 1, 0, 1], [0, 1, 2, 2]]
+        if previous is None:
+            change = np.inf
+        else:
+            old = previous.K[[0, 1, 0, 1], [0, 1, 2, 2]]
+            change = float(np.max(np.abs(params - old) / np.abs(old)))
+        self._stable = self._stable + 1 if change < self.tol else 0
+        converged = bool(self._stable >= self.patience and
+                         np.all(std[:2] / params[:2] < self.std_tol))
+
+        self.estimate = OnlineEstimate(self.seen, len(views), float(rms), K,
+                                       dist.ravel(), std, change, converged)
+        return self.estimate
+
+    @property
+    def converged(self):
+        return self.estimate is not None and self.estimate.converged
+
+
+def format_estimate(est):
+    """Una línea de estado (consola o superpuesta en la vista previa)."""
+    fx, fy, cx, cy = est.K[[0, 1, 0, 1], [0, 1, 2, 2]]
+    status = 'CONVERGIDA' if est.converged else f'cambio {est.change:.2%}'
+    return (f"{est.views}/{est.seen} vistas | fx={fx:.1f}±{est.std[0]:.1f} "
+            f"fy={fy:.1f} cx={cx:.1f} cy={cy:.1f} | RMS {est.rms:.3f} | {status}")
@@ -0,0 +1,101 @@
+"""
+Gráficas de la calibración
+matplotlib se importa dentro de cada función: importar camcalib (p. ej. en
+un worker de un servicio) no lo carga si nunca se grafica.
+"""
+
+import os
+
+import cv2
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def visualize_detections(detection_results, chessboard_size, save_path, show=True):
+    """Visualiza las detecciones de esquinas (las primeras 6 imágenes)."""
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+    fig.suptitle('Detección de Esquinas del Patrón de Ajedrez', fontsize=13)
+    
+    for idx, ax in enumerate(axes.flat):
+        if idx >= len(detection_results):
+            ax.axis('off')
+            continue
+        
+        fname, img, corners, found = detection_results[idx]
+        if img is None:
+            # Modo streaming o detección tomada de la caché: se lee solo ahora
+            img = cv2.imread(fname)
+            if img is None:
+                # Borrada o ilegible desde la detección: como en calibrate_camera
+                print(f"No se pudo leer: {fname}")
+                ax.set_title(f'{os.path.basename(fname)}\n✗ No se pudo leer', color='red')
+                ax.axis('off')
+                continue
+        # La detección decodifica en gris: se convierte solo para dibujar en color
+        img_draw = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if img.ndim == 2 else img.copy()
+        
+        if found and corners is not None:
+            cv2.drawChessboardCorners(img_draw, chessboard_size, corners, found)
+            status = '✓ Detectado'
+            color_title = 'green'
+        else:
+            status = '✗ No detectado'
+            color_title = 'red'
+        
+        ax.imshow(cv2.cvtColor(img_draw, cv2.COLOR_BGR2RGB))
+        ax.set_title(f'{os.path.basename(fname)}\n{status}', color=color_title)
+        ax.axis('off')
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    if show:
+        plt.show()
+
+
+def plot_undistortion_comparison(img_orig, img_undist, save_path, show=True):
+    """Imagen original y corregida lado a lado."""
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    fig.suptitle('Corrección de Distorsión', fontsize=14)
+    
+    axes[0].imshow(cv2.cvtColor(img_orig, cv2.COLOR_BGR2RGB))
+    axes[0].set_title('Original (con distorsión)', fontsize=12)
+    axes[0].axis('off')
+    
+    axes[1].imshow(cv2.cvtColor(img_undist, cv2.COLOR_BGR2RGB))
+    axes[1].set_title('Corregida (sin distorsión)', fontsize=12)
+    axes[1].axis('off')
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    if show:
+        plt.show()
+
+
+def plot_distortion_coefficients(dist, save_path, show=True):
+    """Gráfico de barras de [k1, k2, p1, p2, k3]: azul = positivo, salmón = negativo."""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    params = ['k1', 'k2', 'p1', 'p2', 'k3']
+    values = dist.flatten()[:5]
+    colors = ['steelblue' if v >= 0 else 'salmon' for v in values]
+    
+    bars = ax.bar(params, values, color=colors, edgecolor='black', linewidth=0.8)
+    ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
+    ax.set_title('Coeficientes de Distorsión de la Lente', fontsize=13)
+    ax.set_ylabel('Valor del coeficiente')
+    ax.grid(True, axis='y', alpha=0.3)
+    
+    for bar, val in zip(bars, values):
+        ax.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.001,
+                f'{val:.5f}', ha='center', va='bottom', fontsize=9)
+    
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    if show:
+        plt.show()
@@ -0,0 +1,148 @@
+"""
+Motor de proyección pinhole por lotes
+Proyecta N puntos 3D a través de M cámaras (K, R, t apilados) en una sola
+llamada. Es la misma matemática de project_pinhole (01), project_with_K (02)
+y project_full (03):
+
+    P_cam = R @ P_world + t
+    x = X/Z,  y = Y/Z
+    p_img = K @ [x, y, 1]
+
+Frente al bucle de una pose por llamada de project_full, en un núcleo y con
+1M de puntos x 30 poses (bench_projection.py): 3x más rápido en float64 y
+5x en float32. Con workers > 1 las cámaras se reparten entre hilos; esa
+ganancia depende de los núcleos y del ancho de banda de memoria, y
+bench_projection.py la mide contra un solo hilo.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Qué hacer con los puntos con Z <= 0 (detrás de la cámara)
+Z_POLICIES = ('zero', 'clip', 'nan')
+
+# Puntos por bloque: los temporales de un bloque caben en la caché L2
+BLOCK_POINTS = 1 << 15
+
+
+def focal_K(focal_length, dtype=np.float64):
+    """Matriz K equivalente al modelo pinhole básico: f, sin punto principal."""
+    return np.array([[focal_length, 0, 0],
+                     [0, focal_length, 0],
+                     [0, 0, 1]], dtype=dtype)
+
+
+def _stack(a, shape, m, dtype):
+    """Lleva K, R o t a la forma apilada (M, *shape)."""
+    a = np.asarray(a, dtype=dtype)
+    if a.shape == shape:
+        a = a[None]
+    if a.shape[1:] != shape or a.shape[0] not in (1, m):
+        raise ValueError(f"se esperaba forma {shape} o (M, *{shape}), llegó {a.shape}")
+    return np.broadcast_to(a, (m,) + shape)
+
+
+def project_points(points, K, R=None, t=None, out=None, dtype=None,
+                   z_policy='clip', eps=1e-6, visible=None, workers=1):
+    """
+    Proyecta puntos 3D a píxeles con una o varias cámaras.
+
+    points: (N, 3) puntos en coordenadas del mundo
+    K: (3, 3) o (M, 3, 3)
+    R: (3, 3) o (M, 3, 3); None = identidad (puntos ya en coordenadas de cámara)
+    t: (3,) o (M, 3); None = sin traslación
+    out: buffer preasignado (M, N, 2) — o (N, 2) si hay una sola cámara —
+         donde se escribe el resultado; se usa tal cual, sin copias
+    dtype: np.float32 o np.float64 (por defecto el de `out`, o float64)
+    z_policy: tratamiento de los puntos con Z <= 0 (detrás de la cámara)
+        'zero' → solo Z == 0 se reemplaza por eps (como project_pinhole/project_with_K)
+        'clip' → Z <= 0 se reemplaza por eps (como project_full)
+        'nan'  → la proyección de esos puntos es NaN
+    visible: buffer booleano opcional (M, N) o (N,), recibe Z > 0
+    workers: hilos para repartir las cámaras (NumPy libera el GIL; None = todos
+             los núcleos). Solo ayuda con M > 1 y varios núcleos
+
+    Retorna `out` con las coordenadas (u, v) en píxeles.
+    """
+    if z_policy not in Z_POLICIES:
+        raise ValueError(f"z_policy debe ser uno de {Z_POLICIES}")
+    if dtype is None:
+        dtype = out.dtype if out is not None else np.float64
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("dtype debe ser float32 o float64")
+
+    # Estructura de arreglos (3, N): cada coordenada contigua en memoria
+    points_T = np.ascontiguousarray(np.asarray(points, dtype=dtype).T)
+    K = np.asarray(K, dtype=dtype)
+    single = K.ndim == 2 and (R is None or np.ndim(R) == 2) and (t is None or np.ndim(t) == 1)
+    m = max(K.shape[0] if K.ndim == 3 else 1,
+            np.shape(R)[0] if R is not None and np.ndim(R) == 3 else 1,
+            np.shape(t)[0] if t is not None and np.ndim(t) == 2 else 1)
+    n = points_T.shape[1]
+
+    K = _stack(K, (3, 3), m, dtype)
+    R = None if R is None else _stack(R, (3, 3), m, dtype)
+    t = None if t is None else _stack(t, (3,), m, dtype)
+
+    if out is None:
+        out = np.empty((n, 2) if single else (m, n, 2), dtype=dtype)
+    shapes = [(m, n, 2)] + ([(n, 2)] if m == 1 else [])
+    if out.dtype != dtype or out.shape not in shapes:
+        raise ValueError(f"out debe ser {dtype} con forma {shapes[-1]}")
+    out3 = out.reshape(m, n, 2)
+    vis3 = None if visible is None else visible.reshape(m, n)
+
+    def run(cam):
+        for start in range(0, n, BLOCK_POINTS):
+            stop = min(start + BLOCK_POINTS, n)
+            _project_block(points_T[:, start:stop], K[cam],
+                           None if R is None else R[cam],
+                           None if t is None else t[cam],
+                           out3[cam, start:stop], z_policy, eps,
+                           None if vis3 is None else vis3[cam, start:stop])
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 1 and m > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, m)) as pool:
+            list(pool.map(run, range(m)))
+    else:
+        for cam in range(m):
+            run(cam)
+    return out
+
+
+def _project_block(pts, K, R, t, out, z_policy, eps, visible):
+    """
+    Proyecta un bloque de puntos (3, B) con una cámara, escribiendo en `out`.
+    Los temporales son filas contiguas de tamaño B, que caben en caché.
+    """
+    P = pts.copy() if R is None else R @ pts
+    if t is not None:
+        P[0] += t[0]
+        P[1] += t[1]
+        P[2] += t[2]
+    X, Y, Z = P
+
+    if visible is not None:
+        np.greater(Z, 0, out=visible)
+    behind = Z <= 0
+    if z_policy == 'zero':
+        Z[Z == 0] = eps
+    elif z_policy == 'clip':
+        Z[behind] = eps
+
+    np.divide(X, Z, out=X)  # x = X/Z
+    np.divide(Y, Z, out=Y)  # y = Y/Z
+    # p_img = K @ [x, y, 1] (solo las dos primeras filas; los términos
+    # nulos de K se omiten, no cambian el resultado)
+    for row, dst in ((0, out[:, 0]), (1, out[:, 1])):
+        np.multiply(K[row, 0], X, out=dst)
+        if K[row, 1] != 0:
+            dst += K[row, 1] * Y
+        dst += K[row, 2]
+
+    if z_policy == 'nan':
+        out[behind] = np.nan
@@ -0,0 +1,97 @@
+"""
+Refinamiento iterativo de la calibración
+Calibra, mide el error de reproyección de cada vista, descarta las vistas
+por encima del umbral y recalibra partiendo de la K/dist anterior
+(CALIB_USE_INTRINSIC_GUESS), hasta que ninguna vista supere el umbral.
+"""
+
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from .bundle_adjustment import calibrate_sparse
+from .reprojection import reprojection_errors
+
+SOLVERS = ('opencv', 'sparse')
+
+RefinementResult = namedtuple('RefinementResult', [
+    'rms', 'K', 'dist', 'rvecs', 'tvecs',
+    'kept',      # índices (en las listas de entrada) de las vistas conservadas
+    'rejected',  # lista de dicts: view, name, round, error, threshold, reason
+    'history',   # lista de (ronda, vistas usadas, RMS)
+])
+
+
+def refine_calibration(obj_points, img_points, img_shape, threshold=1.0,
+                       max_rounds=5, min_views=3, names=None, flags=0, solver='opencv'):
+    """
+    Calibra descartando vistas atípicas.
+
+    threshold: error RMS por vista (px) a partir del cual se descarta la vista
+    max_rounds: máximo de recalibraciones después de la primera
+    min_views: nunca se baja de este número de vistas
+    names: nombre de cada vista para el reporte (p. ej. el archivo)
+    flags: flags adicionales para cv2.calibrateCamera
+    solver: 'opencv' (cv2.calibrateCamera) o 'sparse' (calibrate_sparse, sin flags)
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver debe ser 'opencv' o 'sparse', no {solver!r}")
+    if solver == 'sparse' and flags:
+        raise ValueError("El solver 'sparse' no admite flags de cv2.calibrateCamera")
+    if names is None:
+        names = [f'vista {i}' for i in range(len(obj_points))]
+    kept = list(range(len(obj_points)))
+    rejected, history = [], []
+    K = dist = None
+
+    for round_ in range(max_rounds + 1):
+        round_flags = flags
+        if K is not None:
+            # Arranque en caliente: las rondas siguientes parten de la solución anterior
+            round_flags |= cv2.CALIB_USE_INTRINSIC_GUESS
+            K, dist = K.copy(), dist.copy()
+
+        if solver == 'sparse':
+            rms, K, dist, rvecs, tvecs = calibrate_sparse(
+                [obj_points[i] for i in kept], [img_points[i] for i in kept],
+                img_shape, K, dist)[:5]
+        else:
+            rms, K, dist, rvecs, tvecs = cv2.calibrateCamera(
+                [obj_points[i] for i in kept], [img_points[i] for i in kept],
+                img_shape, K, dist, flags=round_flags)
+        history.append((round_, len(kept), rms))
+
+        errors = reprojection_errors([obj_points[i] for i in kept],
+                                     [img_points[i] for i in kept],
+                                     rvecs, tvecs, K, dist).per_view
+        bad = [j for j in np.argsort(errors)[::-1] if errors[j] > threshold]
+        if not bad or round_ == max_rounds:
+            break
+        # Quitar primero las peores, sin bajar de min_views
+        bad = bad[:max(0, len(kept) - min_views)]
+        if not bad:
+            break
+
+        for j in bad:
+            rejected.append({
+                'view': kept[j], 'name': names[kept[j]], 'round': round_,
+                'error': float(errors[j]), 'threshold': threshold,
+                'reason': f'error de reproyección {errors[j]:.3f} px > umbral {threshold:.3f} px',
+            })
+        bad_views = {kept[j] for j in bad}
+        kept = [i for i in kept if i not in bad_views]
+
+    return RefinementResult(rms, K, dist, rvecs, tvecs, kept, rejected, history)
+
+
+def print_refinement_report(result):
+    """Imprime las rondas de calibración y las vistas descartadas con su motivo."""
+    print("\nRefinamiento de la calibración:")
+    for round_, n_views, rms in result.history:
+        print(f"  Ronda {round_}: {n_views} vistas, RMS = {rms:.4f} px")
+    if not result.rejected:
+        print("  Ninguna vista descartada")
+    for r in result.rejected:
+        print(f"  ✗ {os.path.basename(str(r['name']))} (ronda {r['round']}): {r['reason']}")
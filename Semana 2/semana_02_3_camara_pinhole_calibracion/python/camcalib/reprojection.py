@@ -0,0 +1,107 @@
+"""
+Error de reproyección vectorizado
+Reproyecta las esquinas de TODAS las vistas en una sola pasada de NumPy
+(el mismo modelo que cv2.projectPoints: pinhole + distorsión Brown–Conrady)
+y retorna los residuos por punto, por imagen y globales como arreglos.
+La impresión de resultados queda en print_reprojection_report.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .distortion import distort_normalized
+
+ReprojectionErrors = namedtuple('ReprojectionErrors', [
+    'residuals',   # (T, 2) proyectado - detectado, todos los puntos de todas las vistas
+    'per_point',   # (T,)   distancia euclidiana de cada punto (px)
+    'view_index',  # (T,)   vista a la que pertenece cada punto
+    'per_view',    # (V,)   RMS por imagen: sqrt(mean(|e|²)) de sus puntos
+    'rms',         # RMS global (el mismo que retorna cv2.calibrateCamera)
+    'mean',        # promedio de per_view
+])
+
+
+def rodrigues(rvecs):
+    """Vectores de rotación (V, 3) → matrices (V, 3, 3), como cv2.Rodrigues."""
+    rvecs = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3)
+    theta = np.linalg.norm(rvecs, axis=1)
+    small = theta < 1e-12
+    k = rvecs / np.where(small, 1.0, theta)[:, None]
+
+    # Matriz antisimétrica [k]x
+    kx = np.zeros((len(rvecs), 3, 3))
+    kx[:, 0, 1], kx[:, 0, 2] = -k[:, 2], k[:, 1]
+    kx[:, 1, 0], kx[:, 1, 2] = k[:, 2], -k[:, 0]
+    kx[:, 2, 0], kx[:, 2, 1] = -k[:, 1], k[:, 0]
+
+    cos, sin = np.cos(theta)[:, None, None], np.sin(theta)[:, None, None]
+    R = (cos * np.eye(3) + (1 - cos) * k[:, :, None] * k[:, None, :] + sin * kx)
+    R[small] = np.eye(3)
+    return R
+
+
+def _flatten(points_per_view, dim):
+    """Lista de arreglos por vista → (T, dim) concatenado + índice de vista."""
+    arrays = [np.asarray(p, dtype=np.float64).reshape(-1, dim) for p in points_per_view]
+    counts = np.array([len(a) for a in arrays])
+    return np.concatenate(arrays), np.repeat(np.arange(len(arrays)), counts)
+
+
+def project_views(obj_points, rvecs, tvecs, K, dist, view_index=None):
+    """
+    Proyecta los puntos de todas las vistas a la vez.
+
+    obj_points: lista de (N_i, 3) o arreglo (T, 3) ya concatenado (con view_index)
+    rvecs, tvecs: (V, 3) o listas de (3, 1) como las de cv2.calibrateCamera
+    Retorna (T, 2) en píxeles.
+    """
+    if view_index is None:
+        obj_points, view_index = _flatten(obj_points, 3)
+    R = rodrigues(rvecs)
+    t = np.asarray(tvecs, dtype=np.float64).reshape(-1, 3)
+
+    # P_cam = R @ P + t con la R de cada vista
+    n_views = len(R)
+    if len(obj_points) % n_views == 0 and np.all(
+            view_index == np.repeat(np.arange(n_views), len(obj_points) // n_views)):
+        # Todas las vistas con el mismo número de puntos (p. ej. un tablero):
+        # un solo matmul por lotes (V, N, 3) @ (V, 3, 3)
+        P = obj_points.reshape(n_views, -1, 3) @ R.transpose(0, 2, 1) + t[:, None, :]
+        P = P.reshape(-1, 3)
+    else:
+        P = np.einsum('tij,tj->ti', R[view_index], obj_points) + t[view_index]
+    x = P[:, 0] / P[:, 2]
+    y = P[:, 1] / P[:, 2]
+    xd, yd = distort_normalized(x, y, dist)
+
+    K = np.asarray(K, dtype=np.float64)
+    return np.stack([K[0, 0] * xd + K[0, 2], K[1, 1] * yd + K[1, 2]], axis=1)
+
+
+def reprojection_errors(obj_points, img_points, rvecs, tvecs, K, dist):
+    """Residuos de reproyección de todas las vistas en una pasada vectorizada."""
+    obj_flat, view_index = _flatten(obj_points, 3)
+    img_flat, _ = _flatten(img_points, 2)
+    n_views = len(obj_points)
+
+    residuals = project_views(obj_flat, rvecs, tvecs, K, dist, view_index) - img_flat
+    sq = np.einsum('ti,ti->t', residuals, residuals)
+    counts = np.bincount(view_index, minlength=n_views)
+    per_view = np.sqrt(np.bincount(view_index, weights=sq, minlength=n_views) / counts)
+
+    return ReprojectionErrors(residuals=residuals, per_point=np.sqrt(sq),
+                              view_index=view_index, per_view=per_view,
+                              rms=float(np.sqrt(sq.mean())),
+                              mean=float(per_view.mean()))
+
+
+def print_reprojection_report(errors):
+    """Imprime el error por imagen y el resumen de calidad de la calibración."""
+    for i, error in enumerate(errors.per_view):
+        print(f"  Imagen {i+1}: error de reproyección = {error:.4f} px")
+
+    print(f"\nError promedio total: {errors.mean:.4f} px")
+    print("  < 0.5 px = Excelente calibración")
+    print("  0.5-1.0 px = Buena calibración")
+    print("  > 1.0 px = Calibración mejorable")
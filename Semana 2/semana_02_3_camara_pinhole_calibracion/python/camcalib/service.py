@@ -0,0 +1,666 @@
+"""
+Servicio local de calibración por lotes: cola de trabajos para muchas cámaras
+Cada trabajo es una carpeta de imágenes más el tablero (esquinas internas y
+lado del cuadro) y opciones de calibrate_camera; el servicio los reparte en
+un pool de procesos y guarda cada resultado como un paquete .calib
+(camcalib.bundle).
+
+La cola vive en disco (queue_dir), así se pueden encolar trabajos desde
+otro proceso mientras el servicio corre, y detenerlo y reanudarlo:
+    jobs/<id>.json       especificación + estado: queued, running, done, failed
+    results/<id>.calib   resultado de cada trabajo terminado
+    logs/<id>.log        salida de calibrate_camera del trabajo
+
+Cada trabajo corre en su propio proceso (y grupo de procesos) con sus
+límites: `workers` (núcleos que ocupa: workers de detección e hilos de
+OpenCV), `memory_mb` (memoria residente SUMADA de todos los procesos del
+trabajo, incluidos sus pools de detección e incertidumbre: el planificador la
+mide en /proc y termina el grupo entero al pasarse; además cada proceso tiene
+RLIMIT_AS = memory_mb) y `timeout_s` (pasado ese tiempo se termina). El
+planificador arranca los trabajos en orden mientras la suma de sus
+`workers` no supere los núcleos del servicio. El avance llega como eventos
+(dicts) a los suscriptores: la línea de comandos los imprime y el front end
+HTTP (serve_http, solo en localhost) los transmite como Server-Sent Events.
+"""
+
+import ipaddress
+import json
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import wait
+from urllib.parse import urlparse
+
+from .refinement import SOLVERS
+from .uncertainty import METHODS
+
+try:
+    import resource
+except ImportError:  # Windows: sin límite de memoria por trabajo
+    resource = None
+
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+
+def _is_int(v, low):
+    return type(v) is int and v >= low
+
+
+def _is_positive(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0
+
+
+# Opciones de calibrate_camera que acepta un trabajo: (válido(valor), descripción)
+OPTION_CHECKS = {
+    'pyramid_levels': (lambda v: _is_int(v, 0), "un entero >= 0"),
+    'reduced_decode': (lambda v: isinstance(v, bool), "true o false"),
+    'tracking': (lambda v: isinstance(v, bool), "true o false"),
+    'solver': (lambda v: v in SOLVERS, " o ".join(SOLVERS)),
+    'refine_threshold': (lambda v: v is None or _is_positive(v), "null o un número > 0 (px)"),
+    'refine_rounds': (lambda v: _is_int(v, 1), "un entero >= 1"),
+    'max_views': (lambda v: v is None or _is_int(v, 3), "null o un entero >= 3"),
+    'uncertainty': (lambda v: v is None or v in METHODS, "null, " + " o ".join(METHODS)),
+    'resamples': (lambda v: _is_int(v, 2), "un entero >= 2"),
+}
+CALIBRATION_OPTIONS = tuple(OPTION_CHECKS)
+LIMIT_DEFAULTS = {'workers': 1, 'memory_mb': None, 'timeout_s': None}
+PROGRESS_INTERVAL = 0.5  # s entre eventos de avance de un mismo trabajo
+UNREADABLE_GRACE = 5.0   # s que puede tardar en escribirse un registro nuevo
+
+_JOB_ID = re.compile(r'job_\d{5,}')
+
+
+def _group_rss_mb():
+    """
+    Memoria residente (MB) por grupo de procesos, leída de /proc: pgid → MB.
+    None donde no hay /proc (ahí solo rige RLIMIT_AS de cada proceso).
+    """
+    if not os.path.isdir('/proc'):
+        return None
+    page_mb = os.sysconf('SC_PAGE_SIZE') / 2**20
+    totals = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                pgrp = int(f.read().rsplit(')', 1)[1].split()[2])
+            with open(f'/proc/{pid}/statm') as f:
+                rss = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):  # El proceso ya terminó
+            continue
+        totals[pgrp] = totals.get(pgrp, 0.0) + rss * page_mb
+    return totals
+
+
+def make_job(spec):
+    """
+    Valida una especificación de trabajo y completa los valores por defecto.
+
+        {"images": "../fotos/cam_A", "board": [9, 6], "square_size": 25.0,
+         "name": "cam_A", "pattern": "*.jpg",
+         "options": {"pyramid_levels": 2, "max_views": 60},
+         "limits": {"workers": 2, "memory_mb": 2048, "timeout_s": 600}}
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Cada trabajo debe ser un objeto JSON")
+    allowed = {'images', 'board', 'square_size', 'name', 'pattern', 'options', 'limits'}
+    unknown = set(spec) - allowed
+    if unknown:
+        raise ValueError(f"Campos desconocidos en el trabajo: {sorted(unknown)}")
+    if 'images' not in spec:
+        raise ValueError("El trabajo necesita 'images' (carpeta o patrón glob)")
+    board = spec.get('board')
+    if (not isinstance(board, (list, tuple)) or len(board) != 2 or
+            not all(isinstance(v, int) and v >= 2 for v in board)):
+        raise ValueError("'board' debe ser [cols, rows]: esquinas internas, enteros >= 2")
+    square_size = spec.get('square_size')
+    if not isinstance(square_size, (int, float)) or square_size <= 0:
+        raise ValueError("'square_size' debe ser el lado del cuadro (> 0)")
+    if not isinstance(spec['images'], str) or not isinstance(spec.get('pattern', ''), str):
+        raise ValueError("'images' y 'pattern' deben ser texto")
+    for field in ('options', 'limits'):
+        if not isinstance(spec.get(field) or {}, dict):
+            raise ValueError(f"'{field}' debe ser un objeto JSON")
+    options = dict(spec.get('options') or {})
+    unknown = set(options) - set(CALIBRATION_OPTIONS)
+    if unknown:
+        raise ValueError(f"Opciones no soportadas: {sorted(unknown)} "
+                         f"(válidas: {', '.join(CALIBRATION_OPTIONS)})")
+    for name, value in options.items():
+        valid, expected = OPTION_CHECKS[name]
+        if not valid(value):
+            raise ValueError(f"'options.{name}' debe ser {expected}, no {value!r}")
+    limits = dict(LIMIT_DEFAULTS, **(spec.get('limits') or {}))
+    unknown = set(limits) - set(LIMIT_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Límites desconocidos: {sorted(unknown)}")
+    if not _is_int(limits['workers'], 1):
+        raise ValueError("'limits.workers' debe ser un entero >= 1")
+    for name in ('memory_mb', 'timeout_s'):
+        if limits[name] is not None and not _is_positive(limits[name]):
+            raise ValueError(f"'limits.{name}' debe ser null o un número > 0")
+
+    images = os.path.abspath(spec['images'])
+    return {
+        'name': spec.get('name') or os.path.basename(images.rstrip(os.sep)),
+        'images': images,
+        'pattern': spec.get('pattern', '*.jpg'),
+        'board': [int(v) for v in board],
+        'square_size': float(square_size),
+        'options': options,
+        'limits': limits,
+    }
+
+
+def _write_json(path, obj):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+
+class JobQueue:
+    """Trabajos y resultados en disco (ver el docstring del módulo)."""
+
+    def __init__(self, queue_dir):
+        self.dir = os.path.abspath(queue_dir)
+        for sub in ('jobs', 'results', 'logs'):
+            os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+
+    def job_path(self, job_id):
+        return os.path.join(self.dir, 'jobs', job_id + '.json')
+
+    def result_path(self, job_id):
+        return os.path.join(self.dir, 'results', job_id + '.calib')
+
+    def log_path(self, job_id):
+        return os.path.join(self.dir, 'logs', job_id + '.log')
+
+    def ids(self):
+        """Ids de todos los trabajos, en orden de llegada."""
+        names = os.listdir(os.path.join(self.dir, 'jobs'))
+        return sorted(n[:-5] for n in names if n.endswith('.json') and _JOB_ID.fullmatch(n[:-5]))
+
+    def submit(self, spec):
+        """Valida y encola un trabajo; retorna el registro con su id."""
+        job = make_job(spec)
+        # El id se reserva creando el archivo en modo exclusivo: varios
+        # procesos pueden encolar a la vez sin pisarse
+        n = len(self.ids()) + 1
+        while True:
+            job_id = f'job_{n:05d}'
+            try:
+                os.close(os.open(self.job_path(job_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                n += 1
+        job.update(id=job_id, state='queued', submitted=time.time(), started=None,
+                   finished=None, attempts=0, result=None, error=None)
+        self.save(job)
+        return job
+
+    def load(self, job_id):
+        """Registro del trabajo, o None si no existe (o se está escribiendo)."""
+        try:
+            with open(self.job_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return job if isinstance(job, dict) and job.get('state') in JOB_STATES else None
+
+    def save(self, job):
+        _write_json(self.job_path(job['id']), job)
+
+    def quarantine(self, job_id):
+        """
+        Aparta un registro ilegible (queda como jobs/<id>.json.bad) y lo
+        reemplaza por uno fallido; retorna ese registro.
+        """
+        path = self.job_path(job_id)
+        try:
+            os.replace(path, path + '.bad')
+        except OSError:
+            pass
+        now = time.time()
+        job = {'id': job_id, 'name': job_id, 'state': 'failed', 'submitted': None,
+               'started': now, 'finished': now, 'attempts': 0, 'result': None,
+               'error': f"registro ilegible (apartado en {job_id}.json.bad)"}
+        self.save(job)
+        return job
+
+
+def _run_job(job, result_path, log_path, events):
+    """
+    Proceso de un trabajo: aplica los límites, calibra y guarda el resultado.
+    events: extremo de escritura de un Pipe propio del trabajo.
+    """
+    import cv2
+
+    from .bundle import save_bundle
+    from .calibration import calibrate_camera
+
+    limits = job['limits']
+    if hasattr(os, 'setpgrp'):
+        # Grupo propio: los pools que arranque calibrate_camera quedan en él,
+        # y el planificador mide y termina el trabajo completo
+        os.setpgrp()
+    if limits['memory_mb'] and resource is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (int(limits['memory_mb']) << 20, hard))
+    cv2.setNumThreads(limits['workers'])
+
+    last = [0.0]
+
+    def progress(stage, done, total):
+        now = time.perf_counter()
+        if stage == 'detection' and done < total and now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        events.send({'event': 'progress', 'id': job['id'], 'stage': stage,
+                     'done': done, 'total': total})
+
+    with open(log_path, 'w') as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            # streaming sin vista previa: las imágenes decodificadas no se
+            # acumulan (ni vuelven de los workers), la memoria no crece con
+            # el número de imágenes
+            result = calibrate_camera(
+                os.path.join(job['images'], job['pattern']), tuple(job['board']),
+                job['square_size'], workers=limits['workers'], streaming=True,
+                preview_size=0, progress=progress, **job['options'])
+            if result is None:
+                raise RuntimeError("no hay suficientes imágenes con el tablero (ver el log)")
+            ret, K, dist, rvecs, tvecs, obj_points, img_points, img_shape, _ = result
+            save_bundle(result_path, K, dist, img_shape, rms=ret, rvecs=rvecs, tvecs=tvecs,
+                        obj_points=obj_points, img_points=img_points,
+                        meta={'job': job['id'], 'name': job['name'],
+                              'chessboard': job['board'],
+                              'square_size_mm': job['square_size']})
+            events.send({'event': 'done', 'id': job['id'], 'rms': float(ret),
+                         'views': len(rvecs), 'image_size': list(img_shape),
+                         'K': K.tolist(), 'dist': dist.ravel().tolist()})
+        except MemoryError:
+            events.send({'event': 'failed', 'id': job['id'],
+                         'error': f"memoria agotada (límite {limits['memory_mb']} MB)"})
+        except Exception as e:
+            traceback.print_exc()
+            events.send({'event': 'failed', 'id': job['id'], 'error': f"{type(e).__name__}: {e}"})
+        finally:
+            sys.stdout.flush()
+            events.close()
+
+
+class CalibrationService:
+    """
+    Planificador de la cola: corre hasta `workers` núcleos de trabajos a la vez.
+
+        service = CalibrationService('../cola', workers=8)
+        service.submit({'images': '../fotos/cam_A', 'board': [9, 6], 'square_size': 25})
+        events = service.subscribe()      # queue.Queue de eventos (dicts)
+        service.run()                     # hasta vaciar la cola
+    """
+
+    def __init__(self, queue_dir, workers=None, poll=0.2):
+        self.queue = JobQueue(queue_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.poll = poll
+        # spawn: cada trabajo arranca en un intérprete limpio (sin los hilos
+        # del servidor HTTP ni el estado de OpenCV del proceso padre)
+        self._ctx = multiprocessing.get_context('spawn')
+        # id → [proceso, registro, inicio, conexión]. Cada trabajo tiene su
+        # propio Pipe: matar un proceso a mitad de un envío solo corrompe el
+        # suyo, nunca un canal compartido con los demás trabajos
+        self._running = {}
+        self._finished = {}    # id → registro (done/failed: ya no cambian)
+        self._unreadable = {}  # id → desde cuándo su JSON no se puede leer
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ── Eventos ──────────────────────────────────────────────
+    def subscribe(self, maxsize=10000):
+        q = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _publish(self, event):
+        event.setdefault('time', time.time())
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:  # Un suscriptor lento no frena al servicio
+                pass
+
+    # ── Trabajos ─────────────────────────────────────────────
+    def submit(self, spec):
+        job = self.queue.submit(spec)
+        self._publish({'event': 'queued', 'id': job['id'], 'name': job['name']})
+        return job
+
+    def job(self, job_id):
+        """Registro del trabajo (con el avance en vivo si está corriendo)."""
+        with self._lock:
+            if job_id in self._running:
+                return dict(self._running[job_id][1])
+        return self.queue.load(job_id)
+
+    def status(self):
+        return [job for job in map(self.job, self.queue.ids()) if job is not None]
+
+    def _finish(self, job, state, **fields):
+        job.update(state=state, finished=time.time(), **fields)
+        job.pop('progress', None)
+        self.queue.save(job)
+        self._finished[job['id']] = job
+        elapsed = job['finished'] - job['started']
+        self._publish(dict(fields, event=state, id=job['id'], name=job['name'],
+                           elapsed=elapsed))
+
+    def _load(self, job_id):
+        """
+        Registro del trabajo; None si todavía no se puede leer. Un JSON que
+        sigue ilegible después de UNREADABLE_GRACE s se aparta como fallido
+        (si no, run(until_empty=True) lo esperaría para siempre).
+        """
+        job = self.queue.load(job_id)
+        if job is not None:
+            self._unreadable.pop(job_id, None)
+            return job
+        first = self._unreadable.setdefault(job_id, time.monotonic())
+        if (time.monotonic() - first > UNREADABLE_GRACE and
+                os.path.exists(self.queue.job_path(job_id))):
+            del self._unreadable[job_id]
+            job = self.queue.quarantine(job_id)
+            self._finished[job_id] = job
+            self._publish({'event': 'failed', 'id': job_id, 'name': job['name'],
+                           'error': job['error'], 'elapsed': 0.0})
+        return None
+
+    def _recover(self):
+        """Los trabajos 'running' de una ejecución interrumpida vuelven a la cola."""
+        for job_id in self.queue.ids():
+            job = self.queue.load(job_id)
+            if job is not None and job['state'] == 'running':
+                job['state'] = 'queued'
+                self.queue.save(job)
+
+    def _schedule(self):
+        used = sum(job['limits']['workers'] for _, job, _, _ in self._running.values())
+        for job_id in self.queue.ids():
+            if job_id in self._running or job_id in self._finished:
+                continue
+            job = self._load(job_id)
+            if job is None or job['state'] != 'queued':
+                if job is not None and job['state'] in ('done', 'failed'):
+                    self._finished[job_id] = job
+                continue
+            # Un trabajo que pide más núcleos que el servicio corre solo
+            need = min(job['limits']['workers'], self.workers)
+            if self._running and used + need > self.workers:
+                break  # En orden de llegada: no adelantar trabajos más chicos
+            job.update(state='running', started=time.time(), attempts=job['attempts'] + 1)
+            self.queue.save(job)
+            receiver, sender = self._ctx.Pipe(duplex=False)
+            proc = self._ctx.Process(
+                target=_run_job, name=job_id,
+                args=(job, self.queue.result_path(job_id), self.queue.log_path(job_id),
+                      sender))
+            proc.start()
+            sender.close()  # Solo el hijo escribe: EOF en cuanto sale
+            with self._lock:
+                self._running[job_id] = [proc, job, time.perf_counter(), receiver]
+            used += need
+            self._publish({'event': 'started', 'id': job_id, 'name': job['name'],
+                           'pid': proc.pid})
+
+    def _handle(self, job, event):
+        if event['event'] == 'progress':
+            job['progress'] = {k: event[k] for k in ('stage', 'done', 'total')}
+            self._publish(dict(event, name=job['name']))
+        elif event['event'] == 'done':
+            self._finish(job, 'done', result=self.queue.result_path(job['id']),
+                         **{k: event[k] for k in ('rms', 'views', 'image_size', 'K', 'dist')})
+        elif event['event'] == 'failed':
+            self._finish(job, 'failed', error=event['error'])
+
+    def _receive(self, entry):
+        """Procesa todo lo que haya en el Pipe del trabajo; lo cierra en EOF."""
+        conn = entry[3]
+        while conn.poll():
+            try:
+                event = conn.recv()
+            except Exception:  # EOF, o un mensaje cortado por kill()
+                conn.close()
+                entry[3] = None
+                return
+            self._handle(entry[1], event)
+
+    def _drain(self, timeout):
+        """Procesa los eventos de los trabajos (espera hasta `timeout` por el primero)."""
+        conns = {entry[3]: entry for entry in self._running.values() if entry[3] is not None}
+        if not conns:
+            self._stop.wait(timeout)
+            return
+        for conn in wait(list(conns), timeout):
+            self._receive(conns[conn])
+
+    def _discard(self, entry):
+        """
+        Termina el trabajo (su grupo de procesos completo: también los
+        workers de sus pools) y descarta su Pipe (puede quedar a medio escribir).
+        """
+        proc, conn = entry[0], entry[3]
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:  # Todavía no creó su grupo, o ya terminó
+                pass
+        proc.kill()
+        proc.join()
+        if conn is not None:
+            conn.close()
+
+    def _reap(self):
+        """
+        Termina los trabajos vencidos o que se pasan de memoria y recoge los
+        procesos que salieron.
+        """
+        rss = (_group_rss_mb() if any(entry[1]['limits']['memory_mb']
+                                      for entry in self._running.values()) else None)
+        for job_id, entry in list(self._running.items()):
+            proc, job, t0, _ = entry
+            timeout, memory_mb = job['limits']['timeout_s'], job['limits']['memory_mb']
+            used_mb = rss.get(proc.pid, 0.0) if rss is not None and memory_mb else 0.0
+            if proc.is_alive() and timeout and time.perf_counter() - t0 > timeout:
+                self._discard(entry)
+                self._finish(job, 'failed', error=f"tiempo límite ({timeout} s)")
+            elif proc.is_alive() and memory_mb and used_mb > memory_mb:
+                self._discard(entry)
+                self._finish(job, 'failed', error=f"memoria agotada ({used_mb:.0f} MB entre "
+                                                  f"todos sus procesos, límite {memory_mb} MB)")
+            elif not proc.is_alive():
+                proc.join()
+                if entry[3] is not None:
+                    self._receive(entry)  # Eventos enviados justo antes de salir (hasta EOF)
+                if entry[3] is not None:
+                    entry[3].close()
+                if job['state'] == 'running':
+                    error = f"el proceso terminó con código {proc.exitcode}"
+                    if proc.exitcode < 0 and job['limits']['memory_mb']:
+                        # Sin memoria, OpenCV suele abortar en vez de lanzar MemoryError
+                        error += f" (¿límite de memoria de {job['limits']['memory_mb']} MB?)"
+                    self._finish(job, 'failed', error=error)
+            else:
+                continue
+            with self._lock:
+                del self._running[job_id]
+
+    def run(self, until_empty=True):
+        """
+        Planifica hasta que la cola quede vacía (until_empty=True) o hasta
+        stop(). Con Ctrl+C los trabajos en curso se terminan y vuelven a la cola.
+        """
+        self._recover()
+        try:
+            while not self._stop.is_set():
+                self._schedule()
+                self._drain(self.poll)
+                self._reap()
+                if until_empty and not self._running and not any(
+                        job_id not in self._finished for job_id in self.queue.ids()):
+                    break
+        finally:
+            for job_id, entry in list(self._running.items()):
+                self._discard(entry)
+                job = entry[1]
+                job['state'] = 'queued'
+                job.pop('progress', None)
+                self.queue.save(job)
+                self._publish({'event': 'requeued', 'id': job_id, 'name': job['name']})
+            with self._lock:
+                self._running.clear()
+
+    def stop(self):
+        self._stop.set()
+
+
+def _is_loopback(host):
+    try:
+        return host == 'localhost' or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_http(service, host='127.0.0.1', port=8765, allow_remote=False):
+    """
+    Front end HTTP mínimo sobre el servicio (retorna el servidor; correr
+    serve_forever en un hilo). Sin autenticación: solo para localhost.
+    Para que tampoco lo alcance una página abierta en el navegador local:
+    se rechazan los pedidos cuyo Host no sea 127.0.0.1, localhost o [::1]
+    con el puerto del servidor (DNS rebinding), y POST exige
+    Content-Type: application/json (un formulario de otro sitio no puede
+    enviarlo sin permiso CORS). Escuchar en una dirección que no sea de
+    loopback requiere allow_remote=True, y entonces el Host no se revisa.
+
+        GET  /jobs               lista de trabajos
+        GET  /jobs/<id>          un trabajo (con su avance si está corriendo)
+        GET  /jobs/<id>/result   el paquete .calib del trabajo terminado
+        POST /jobs               encola una especificación JSON (o una lista)
+        GET  /events             avance en vivo (Server-Sent Events)
+    """
+
+    if not (allow_remote or _is_loopback(host)):
+        raise ValueError(f"el front end HTTP solo escucha en loopback, no en {host!r} "
+                         "(allow_remote=True para permitirlo)")
+
+    class Handler(BaseHTTPRequestHandler):
+        def _trusted(self):
+            """Host de loopback con nuestro puerto; si no, responde 403."""
+            if allow_remote:
+                return True
+            port = self.server.server_address[1]
+            if self.headers.get('Host', '') in {f'{name}:{port}' for name in
+                                                ('127.0.0.1', 'localhost', '[::1]')}:
+                return True
+            self._json(403, {'error': 'Host no permitido'})
+            return False
+
+        def _json(self, code, obj):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if not self._trusted():
+                return
+            path = urlparse(self.path).path.rstrip('/')
+            parts = path.split('/')[1:]
+            if parts == ['jobs']:
+                self._json(200, service.status())
+            elif len(parts) in (2, 3) and parts[0] == 'jobs' and _JOB_ID.fullmatch(parts[1]):
+                job = service.job(parts[1])
+                if job is None:
+                    self._json(404, {'error': 'trabajo inexistente'})
+                elif len(parts) == 2:
+                    self._json(200, job)
+                elif parts[2] == 'result' and job['state'] == 'done':
+                    with open(job['result'], 'rb') as f:
+                        data = f.read()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/octet-stream')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._json(404, {'error': 'sin resultado'})
+            elif parts == ['events']:
+                self._events()
+            else:
+                self._json(404, {'error': 'ruta desconocida'})
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            events = service.subscribe()
+            try:
+                while True:
+                    try:
+                        event = events.get(timeout=15)
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except OSError:  # El cliente cerró la conexión
+                pass
+            finally:
+                service.unsubscribe(events)
+
+        def do_POST(self):
+            if not self._trusted():
+                return
+            if urlparse(self.path).path.rstrip('/') != '/jobs':
+                self._json(404, {'error': 'ruta desconocida'})
+                return
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type != 'application/json':
+                self._json(415, {'error': 'se espera Content-Type: application/json'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                specs = body if isinstance(body, list) else [body]
+                for spec in specs:  # Validar todo antes de encolar nada
+                    make_job(spec)
+                ids = [service.submit(spec)['id'] for spec in specs]
+            except ValueError as e:
+                self._json(400, {'error': str(e)})
+                return
+            self._json(201, {'ids': ids})
+
+        def log_message(self, *args):
+            pass  # Sin una línea por petición en la consola
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,242 @@
+"""
+Fuentes de cuadros intercambiables: cámara, video o carpeta de imágenes
+Todas exponen la interfaz de cv2.VideoCapture que usa el resto del código
+(read() → (ok, frame) y release()), así la captura y la calibración se
+pueden ejecutar sin cámara ni ventana (CI) o reproducir una sesión grabada:
+
+    open_source(0)                        cámara en vivo
+    open_source('sesion.mp4', fps=30)     video, al ritmo de una cámara de 30 fps
+    open_source('../synthetic/cam_00')    imágenes (p. ej. de generate_synthetic_calibration.py
+                                          o synthetic_dataset.py), lo más rápido posible
+
+PrefetchReader decodifica por delante del consumidor en un hilo y FrameSkip
+descarta cuadros (uno de cada N, o por encima de max_fps).
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .batch import IMAGE_EXTENSIONS, directory_frames
+
+
+class FrameSource:
+    """
+    Interfaz común. live=True indica una fuente que no espera al
+    consumidor (una cámara): si no se lee a tiempo, los cuadros se pierden.
+    """
+
+    live = False
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            ok, frame = self.read()
+            if not ok:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _Pacer:
+    """Espera entre cuadros para emular una cámara de `fps` (None = sin esperar)."""
+
+    def __init__(self, fps):
+        self.period = 1.0 / fps if fps else 0.0
+        self._next = None
+
+    def wait(self):
+        if not self.period:
+            return
+        now = time.perf_counter()
+        if self._next is not None and now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(now, self._next or now) + self.period
+
+
+class DeviceSource(FrameSource):
+    """Cámara conectada (índice de cv2.VideoCapture)."""
+
+    live = True
+
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+        if not self.cap.isOpened():
+            raise OSError(f"No se pudo abrir la cámara {index}")
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoSource(FrameSource):
+    """Archivo de video; fps emula el ritmo de una cámara (None = lo más rápido posible)."""
+
+    def __init__(self, path, fps=None, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise OSError(f"No se pudo abrir el video: {path}")
+        self._pacer = _Pacer(fps)
+
+    def read(self):
+        self._pacer.wait()
+        ok, frame = self.cap.read()
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource(FrameSource):
+    """
+    Imágenes de una carpeta en orden alfabético (pattern admite '**' para
+    subcarpetas). decode_workers > 1 decodifica varias a la vez en un pool
+    de hilos, manteniendo el orden.
+    """
+
+    def __init__(self, path, pattern='*', fps=None, loop=False, decode_workers=1, depth=8):
+        self.paths = sorted(p for p in glob.glob(os.path.join(path, pattern), recursive=True)
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise FileNotFoundError(f"No hay imágenes en: {path}")
+        self.loop = loop
+        self.depth = depth
+        self._pool = ThreadPoolExecutor(max_workers=decode_workers)
+        self._pacer = _Pacer(fps)
+        self._frames = self._generate()
+        self.current = None  # Ruta del último cuadro leído
+
+    def _generate(self):
+        while True:
+            yield from directory_frames(self.paths, self.paths, self._pool, self.depth)
+            if not self.loop:
+                return
+
+    def read(self):
+        self._pacer.wait()
+        item = next(self._frames, None)
+        if item is None:
+            return False, None
+        self.current, frame = item
+        return True, frame
+
+    def release(self):
+        self._frames.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PrefetchReader(FrameSource):
+    """
+    Lee `source` en un hilo con hasta `depth` cuadros por delante del
+    consumidor (la decodificación se solapa con el procesamiento).
+    """
+
+    def __init__(self, source, depth=8):
+        self.source = source
+        self.live = source.live
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    def _reader(self):
+        while not self._stop.is_set():
+            ok, frame = self.source.read()
+            if not ok:
+                break
+            self._queue.put(frame)
+        self._queue.put(None)
+
+    def read(self):
+        if self._stop.is_set():
+            return False, None
+        frame = self._queue.get()
+        if frame is None:
+            self._stop.set()
+            return False, None
+        return True, frame
+
+    def release(self):
+        self._stop.set()
+        while self._thread.is_alive():  # Desbloquear al lector si la cola está llena
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                self._thread.join(0.05)
+        self.source.release()
+
+
+class FrameSkip(FrameSource):
+    """
+    Política de descarte: conserva uno de cada `every` cuadros y, si se da
+    max_fps, descarta los que llegan antes de 1/max_fps del último conservado.
+    """
+
+    def __init__(self, source, every=1, max_fps=None):
+        self.source = source
+        self.live = source.live
+        self.every = max(1, int(every))
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.skipped = 0
+        self._index = 0
+        self._last = None
+
+    def read(self):
+        while True:
+            ok, frame = self.source.read()
+            if not ok:
+                return ok, frame
+            index = self._index
+            self._index += 1
+            now = time.perf_counter()
+            if index % self.every == 0 and (
+                    self._last is None or now - self._last >= self.min_interval):
+                self._last = now
+                return True, frame
+            self.skipped += 1
+
+    def release(self):
+        self.source.release()
+
+
+def open_source(spec, fps=None, loop=False, prefetch=0, every=1, max_fps=None,
+                pattern='*', decode_workers=1):
+    """
+    Abre una fuente según `spec`: entero (o texto numérico) = cámara,
+    carpeta = imágenes, otro = video. prefetch > 0 agrega un PrefetchReader
+    (solo en fuentes de archivo: una cámara no puede adelantarse).
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        source = DeviceSource(int(spec))
+    elif os.path.isdir(spec):
+        source = ImageDirSource(spec, pattern=pattern, fps=fps, loop=loop,
+                                decode_workers=decode_workers)
+    else:
+        source = VideoSource(spec, fps=fps, loop=loop)
+    if every > 1 or max_fps:
+        source = FrameSkip(source, every=every, max_fps=max_fps)
+    if prefetch and not source.live:
+        source = PrefetchReader(source, depth=prefetch)
+    return source
@@ -0,0 +1,181 @@
+"""
+Renderizado sintético del patrón de ajedrez
+Renderiza el tablero píxel a píxel desde su pose (rvec, tvec) y la cámara
+(K, dist), de modo que los bordes de los cuadros se curvan con la distorsión
+de la lente. Lo usan generate_synthetic_calibration.py, el generador de
+datasets (dataset.py) y los benchmarks.
+"""
+
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def euler_to_rvec(rx_deg, ry_deg, rz_deg):
+    """Convierte ángulos de Euler (grados) a vector de rotación de Rodrigues."""
+    rx = np.radians(rx_deg)
+    ry = np.radians(ry_deg)
+    rz = np.radians(rz_deg)
+
+    Rx = np.array([[1, 0, 0],
+                   [0, np.cos(rx), -np.sin(rx)],
+                   [0, np.sin(rx),  np.cos(rx)]])
+    Ry = np.array([[ np.cos(ry), 0, np.sin(ry)],
+                   [0,           1, 0          ],
+                   [-np.sin(ry), 0, np.cos(ry)]])
+    Rz = np.array([[np.cos(rz), -np.sin(rz), 0],
+                   [np.sin(rz),  np.cos(rz), 0],
+                   [0,           0,          1]])
+
+    R = Rz @ Ry @ Rx
+    rvec, _ = cv2.Rodrigues(R)
+    return rvec
+
+
+# Criterio de la inversión de la distorsión (píxel → rayo normalizado)
+UNDISTORT_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 50, 1e-9)
+
+# Rayos por (sub)píxel de las últimas cámaras usadas: solo dependen de K,
+# dist y el tamaño. Ocupan ~80 MB por cámara a 1080p con supersample=2, así
+# que se guardan pocas (LRU): dos cámaras, cada una con y sin supermuestreo
+RAY_CACHE_SIZE = 4
+_RAY_CACHE = OrderedDict()
+
+
+def pixel_rays(K, dist, img_w, img_h, supersample=1):
+    """
+    Coordenadas normalizadas SIN distorsión (x, y) de cada subpíxel.
+    Retorna dos arreglos float32 de forma (supersample², img_h, img_w).
+    Se calculan una sola vez por cámara con cv2.undistortPoints.
+    """
+    K = np.asarray(K, dtype=np.float64)
+    dist = np.asarray(dist, dtype=np.float64).ravel()
+    key = (K.tobytes(), dist.tobytes(), img_w, img_h, supersample)
+    rays = _RAY_CACHE.get(key)
+    if rays is not None:
+        _RAY_CACHE.move_to_end(key)
+        return rays
+    while len(_RAY_CACHE) >= RAY_CACHE_SIZE:
+        _RAY_CACHE.popitem(last=False)  # Liberar antes de calcular: acota el pico
+
+    # Centros de los subpíxeles: desplazamientos (i + 0.5)/s - 0.5 dentro del píxel
+    offsets = (np.arange(supersample) + 0.5) / supersample - 0.5
+    oy, ox = np.meshgrid(offsets, offsets, indexing='ij')
+    v, u = np.mgrid[0:img_h, 0:img_w]
+    pts = np.stack([u[None] + ox.reshape(-1, 1, 1), v[None] + oy.reshape(-1, 1, 1)], axis=-1)
+
+    src = pts.reshape(-1, 1, 2).astype(np.float64)
+    if hasattr(cv2, 'undistortPointsIter'):  # OpenCV 4.x
+        norm = cv2.undistortPointsIter(src, K, dist, None, None, UNDISTORT_CRITERIA)
+    else:
+        norm = cv2.undistortPoints(src, K, dist, None, None, None, UNDISTORT_CRITERIA)
+    norm = norm.reshape(supersample * supersample, img_h, img_w, 2).astype(np.float32)
+    rays = (np.ascontiguousarray(norm[..., 0]), np.ascontiguousarray(norm[..., 1]))
+    _RAY_CACHE[key] = rays
+    return rays
+
+
+def board_bbox(rvec, tvec, K, dist, img_w, img_h, cols, rows, square_size, border):
+    """
+    Recuadro (x0, y0, x1, y1) de la imagen que contiene el tablero y su marco
+    (border en unidades de cuadro), proyectando su contorno con distorsión.
+    None si el tablero cae fuera de la imagen.
+    """
+    t = np.linspace(0, 1, 17)
+    x_min, x_max = -1 - border, cols + border
+    y_min, y_max = -1 - border, rows + border
+    xs = np.concatenate([x_min + t * (x_max - x_min), np.full_like(t, x_max),
+                         x_max - t * (x_max - x_min), np.full_like(t, x_min)])
+    ys = np.concatenate([np.full_like(t, y_min), y_min + t * (y_max - y_min),
+                         np.full_like(t, y_max), y_max - t * (y_max - y_min)])
+    outline = np.stack([xs, ys, np.zeros_like(xs)], axis=1) * square_size
+
+    R, _ = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))
+    if np.any(outline @ R[2] + np.ravel(tvec)[2] <= 0):
+        return 0, 0, img_w, img_h  # Parte del contorno detrás de la cámara
+    proj, _ = cv2.projectPoints(outline, rvec, tvec, K, dist)
+    proj = proj.reshape(-1, 2)
+    x0, y0 = np.floor(proj.min(axis=0)).astype(int) - 2
+    x1, y1 = np.ceil(proj.max(axis=0)).astype(int) + 3
+    x0, x1 = max(x0, 0), min(x1, img_w)
+    y0, y1 = max(y0, 0), min(y1, img_h)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def _board_values(ray_x, ray_y, Hinv, cols, rows, border):
+    """Nivel de gris (0, 200 o 255) de cada rayo según dónde corta el tablero."""
+    w = Hinv[2, 0] * ray_x + Hinv[2, 1] * ray_y + Hinv[2, 2]
+    in_front = w > 0  # w = 1/Z: rayos que cortan el plano delante de la cámara
+    np.divide(1, w, out=w, where=in_front)
+    bx = (Hinv[0, 0] * ray_x + Hinv[0, 1] * ray_y + Hinv[0, 2]) * w
+    by = (Hinv[1, 0] * ray_x + Hinv[1, 1] * ray_y + Hinv[1, 2]) * w
+
+    # Las esquinas internas van de 0 a cols-1 (x) y de 0 a rows-1 (y):
+    # el tablero completo ocupa [-1, cols] x [-1, rows] cuadros
+    b = border
+    frame = in_front & (bx >= -1 - b) & (bx < cols + b) & (by >= -1 - b) & (by < rows + b)
+    board = frame & (bx >= -1) & (bx < cols) & (by >= -1) & (by < rows)
+
+    # Celda (i, j) = (floor(bx), floor(by)): negra si i + j es par, o sea la
+    # celda (-1, -1) junto a la esquina interna 0 es negra. Con esta paridad
+    # findChessboardCorners devuelve las esquinas en el orden de objp (el de
+    # 'corners' en el manifiesto); con la contraria las da invertidas
+    black = ((np.floor(bx).astype(np.int32) + np.floor(by).astype(np.int32)) & 1) == 0
+    return np.where(frame, np.where(board & black, 0, 255), 200).astype(np.uint8)
+
+
+def render_chessboard(rvec, tvec, K, dist, img_w, img_h, cols, rows,
+                      square_size, supersample=1, border=None):
+    """
+    Renderiza el tablero de ajedrez píxel a píxel.
+
+    Cada (sub)píxel se lleva a su rayo normalizado sin distorsión
+    (pixel_rays, que ya aplica K⁻¹ y quita la distorsión) y de ahí al plano
+    del tablero con la inversa de la homografía H = [r1 r2 t] (sin K);
+    el color sale de la paridad de la celda (x, y) que toca. Así los bordes
+    de los cuadros salen curvos, igual que los deforma la lente.
+    El supermuestreo se aplica solo a los píxeles de borde.
+
+    cols, rows: esquinas INTERNAS; el tablero tiene (cols+1) x (rows+1) cuadros
+    square_size: lado del cuadro en las mismas unidades que tvec
+    supersample: subpíxeles por lado (2-4 = bordes con antialiasing)
+    border: ancho del marco blanco alrededor del tablero (por defecto 0.15 cuadros)
+    """
+    if border is None:
+        border = 0.15 * square_size
+    b = border / square_size
+    img = np.full((img_h, img_w), 200, dtype=np.uint8)  # Fondo gris claro
+    box = board_bbox(rvec, tvec, K, dist, img_w, img_h, cols, rows, square_size, b)
+    if box is None:
+        return img
+    x0, y0, x1, y1 = box
+
+    # Inversa de la homografía plano del tablero → rayo normalizado
+    R, _ = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))
+    H = np.column_stack([R[:, 0], R[:, 1], np.asarray(tvec, dtype=np.float64).ravel()])
+    Hinv = np.linalg.inv(H)
+    Hinv[:2] /= square_size  # x, y del tablero en unidades de cuadro
+    Hinv = Hinv.astype(np.float32)
+
+    # Una muestra por píxel, solo en el recuadro que contiene al tablero
+    ray_x, ray_y = pixel_rays(K, dist, img_w, img_h)
+    value = _board_values(ray_x[0, y0:y1, x0:x1], ray_y[0, y0:y1, x0:x1],
+                          Hinv, cols, rows, b)
+
+    if supersample > 1:
+        # Supermuestreo solo donde cambia el color en la vecindad 3x3 (bordes):
+        # en el resto todas las submuestras darían el mismo valor
+        kernel = np.ones((3, 3), np.uint8)
+        ys, xs = np.nonzero(cv2.dilate(value, kernel) != cv2.erode(value, kernel))
+        sub_x, sub_y = pixel_rays(K, dist, img_w, img_h, supersample)
+        ys_img, xs_img = ys + y0, xs + x0
+        sub = _board_values(sub_x[:, ys_img, xs_img], sub_y[:, ys_img, xs_img],
+                            Hinv, cols, rows, b)
+        n = supersample * supersample
+        value[ys, xs] = (sub.sum(axis=0, dtype=np.uint32) + n // 2) // n
+
+    img[y0:y1, x0:x1] = value
+    return img
@@ -0,0 +1,164 @@
+"""
+Seguimiento temporal de las esquinas en secuencias de video
+Entre dos cuadros consecutivos el tablero se mueve pocos píxeles: en lugar
+de buscarlo desde cero con findChessboardCorners, las esquinas del cuadro
+anterior se propagan con flujo óptico (Lucas-Kanade piramidal) y se refinan
+con cornerSubPix en la región del tablero. El flujo se calcula solo en el
+recorte alrededor del tablero, diezmado a no más de `flow_width` píxeles de
+ancho: basta una predicción a pocos píxeles, la precisión la pone
+cornerSubPix a resolución completa. Solo si el seguimiento se pierde (algún
+punto sin flujo, error alto o una corrección subpíxel grande) se vuelve a
+la detección completa.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from . import metrics
+from .corner_detection import SUBPIX_CRITERIA, find_corners, refine_in_roi
+from .decode import loader
+
+LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+
+class CornerTracker:
+    """
+    Detector con memoria para cuadros consecutivos.
+
+    max_correction: desplazamiento máximo (px) entre la predicción del flujo
+                    y la esquina refinada (más el factor de reducción del
+                    flujo); más que eso = seguimiento perdido
+    flow_width: ancho máximo del recorte donde se calcula el flujo
+    search: margen del recorte (fracción del tamaño del tablero): el
+            movimiento máximo entre cuadros que se puede seguir
+    redetect_every: forzar una detección completa cada N cuadros (None = nunca)
+    pyramid_levels: para la detección completa (ver find_corners)
+    detect: detección completa alternativa, detect(gray) → (found, corners)
+            con esquinas ya refinadas (por defecto find_corners)
+    """
+
+    def __init__(self, chessboard_size, criteria=SUBPIX_CRITERIA, window=(7, 7),
+                 max_correction=2.0, max_flow_error=20.0, flow_width=480, search=0.25,
+                 redetect_every=None, pyramid_levels=0, detect=None):
+        self.chessboard_size = chessboard_size
+        self.criteria = criteria
+        self.window = window
+        self.max_correction = max_correction
+        self.max_flow_error = max_flow_error
+        self.flow_width = flow_width
+        self.search = search
+        self.redetect_every = redetect_every
+        self.pyramid_levels = pyramid_levels
+        self.detect = detect
+        self.tracked = 0    # Cuadros resueltos por seguimiento
+        self.detected = 0   # Cuadros que necesitaron detección completa
+        self.lost = 0       # Veces que se perdió el seguimiento
+        self.reset()
+
+    def reset(self):
+        """Olvidar el cuadro anterior (p. ej. al cambiar de secuencia)."""
+        self._prev_gray = None
+        self._prev_corners = None
+        self._since_detect = 0
+
+    def _flow(self, gray):
+        """Predicción de las esquinas en `gray` (N, 2) o None si el flujo falla."""
+        h, w = gray.shape
+        prev = self._prev_corners.reshape(-1, 2)
+        lo, hi = prev.min(axis=0), prev.max(axis=0)
+        pad = max(self.search * float((hi - lo).max()), 16.0)
+        x0, y0 = np.maximum(np.floor(lo - pad), 0).astype(int)
+        x1, y1 = np.minimum(np.ceil(hi + pad) + 1, (w, h)).astype(int)
+        factor = int(np.ceil((x1 - x0) / self.flow_width))
+        scale = 1.0 / factor
+
+        def crop(img):
+            # Diezmado por submuestreo (sin filtrar): con un tablero los bordes
+            # son grandes y basta una predicción gruesa; remuestrear el recorte
+            # completo costaría más que el propio flujo
+            roi = img[y0:y1:factor, x0:x1:factor]
+            return cv2.GaussianBlur(roi, (3, 3), 0) if factor > 1 else roi
+
+        offset = np.array([x0, y0], dtype=np.float32)
+        start = ((prev - offset) * scale).astype(np.float32).reshape(-1, 1, 2)
+        predicted, status, err = cv2.calcOpticalFlowPyrLK(
+            crop(self._prev_gray), crop(gray), start, None, **LK_PARAMS)
+        if predicted is None or not status.all() or err.max() > self.max_flow_error:
+            return None, scale
+        return predicted.reshape(-1, 2) / scale + offset, scale
+
+    def _track(self, gray):
+        with metrics.timer('calib_stage_seconds', stage='track_flow'):
+            pts, scale = self._flow(gray)
+        if pts is None:
+            return None
+        h, w = gray.shape
+        margin = max(self.window) + 1
+        if (pts.min() < margin or pts[:, 0].max() >= w - margin or
+                pts[:, 1].max() >= h - margin):
+            return None  # El tablero sale de la imagen
+        with metrics.timer('calib_stage_seconds', stage='corner_subpix'):
+            refined = refine_in_roi(gray, pts.reshape(-1, 1, 2), self.criteria,
+                                    self.window)
+        if np.abs(refined.reshape(-1, 2) - pts).max() > self.max_correction + 1 / scale:
+            return None
+        return refined
+
+    def track(self, gray):
+        """
+        Esquinas del tablero en `gray` (escala de grises).
+        Retorna (found, corners, tracked): tracked=True si salió del seguimiento.
+        """
+        corners = None
+        due = self.redetect_every is not None and self._since_detect >= self.redetect_every
+        if self._prev_corners is not None and not due:
+            corners = self._track(gray)
+            if corners is None:
+                self.lost += 1
+            else:
+                self.tracked += 1
+                self._since_detect += 1
+                self._prev_gray, self._prev_corners = gray, corners
+                return True, corners, True
+
+        if self.detect is not None:
+            found, corners = self.detect(gray)
+        else:
+            found, corners = find_corners(gray, self.chessboard_size, self.criteria,
+                                          self.pyramid_levels)
+        self.detected += 1
+        self._since_detect = 0
+        if found:
+            self._prev_gray, self._prev_corners = gray, corners.astype(np.float32)
+        else:
+            self.reset()
+        return found, corners, False
+
+
+def track_all(fnames, chessboard_size, criteria=SUBPIX_CRITERIA, keep_images=None,
+              pyramid_levels=0, tracker=None):
+    """
+    Como detect_all, pero en serie y con CornerTracker: fnames deben ser
+    cuadros consecutivos de una secuencia (p. ej. extraídos de un video).
+    Genera (fname, img, img_size, corners, found, elapsed) en el orden de fnames.
+    """
+    if tracker is None:
+        tracker = CornerTracker(chessboard_size, criteria, pyramid_levels=pyramid_levels)
+    reader = loader()
+    for i, fname in enumerate(fnames):
+        t0 = time.perf_counter()
+        with metrics.timer('calib_stage_seconds', stage='imread'):
+            gray = reader.read_gray(fname)
+        if gray is None:
+            tracker.reset()
+            yield fname, None, None, None, False, time.perf_counter() - t0
+            continue
+        found, corners, _ = tracker.track(gray)
+        keep = keep_images is None or i < keep_images
+        yield (fname, gray if keep else None, gray.shape[1::-1], corners, bool(found),
+               time.perf_counter() - t0)
+    print(f"Seguimiento: {tracker.tracked} cuadros seguidos, {tracker.detected} "
+          f"detecciones completas ({tracker.lost} pérdidas)")
@@ -0,0 +1,188 @@
+"""
+Incertidumbre de la calibración por remuestreo de vistas
+El RMS de cv2.calibrateCamera no dice cuánto se movería K si se hubieran
+tomado otras fotos. Aquí se recalibra muchas veces con subconjuntos de las
+vistas y se reportan intervalos de confianza de fx, fy, cx, cy y de cada
+coeficiente de distorsión:
+    - 'bootstrap': cada remuestreo elige V vistas con reemplazo
+    - 'kfold': k-fold repetido; además mide el error de reproyección en las
+      vistas que quedaron fuera (validación cruzada)
+Las recalibraciones corren en un pool de procesos. Las esquinas viajan una
+sola vez, en memoria compartida (multiprocessing.shared_memory): cada tarea
+solo envía los índices de sus vistas.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .reprojection import reprojection_errors
+
+PARAM_NAMES = ('fx', 'fy', 'cx', 'cy', 'k1', 'k2', 'p1', 'p2', 'k3', 'k4', 'k5', 'k6')
+METHODS = ('bootstrap', 'kfold')
+
+UncertaintyResult = namedtuple('UncertaintyResult', [
+    'method',    # 'bootstrap' o 'kfold'
+    'names',     # nombre de cada parámetro
+    'samples',   # (R, P) parámetros de cada remuestreo
+    'estimate',  # (P,) mediana de los remuestreos
+    'low',       # (P,) límite inferior del intervalo
+    'high',      # (P,) límite superior del intervalo
+    'std',       # (P,) desviación estándar de los remuestreos
+    'level',     # nivel de confianza (p. ej. 0.95)
+    'held_out',  # (R,) RMS en las vistas excluidas (solo 'kfold'), si no None
+])
+
+# Estado de cada worker: vistas reconstruidas sobre la memoria compartida
+_shared = {}
+
+
+def _to_shared(arr):
+    """Copia un arreglo a un bloque de memoria compartida nuevo."""
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm
+
+
+def _attach(spec):
+    """(nombre, forma, dtype) → (bloque, arreglo que lo usa como buffer)."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(obj_spec, img_spec, offsets, img_shape, flags):
+    cv2.setNumThreads(1)  # El paralelismo lo pone el pool
+    obj_shm, obj_flat = _attach(obj_spec)
+    img_shm, img_flat = _attach(img_spec)
+    _shared.update(
+        blocks=(obj_shm, img_shm),  # Mantener vivos los bloques mientras viva el worker
+        obj=[obj_flat[a:b] for a, b in zip(offsets[:-1], offsets[1:])],
+        img=[img_flat[a:b].reshape(-1, 1, 2) for a, b in zip(offsets[:-1], offsets[1:])],
+        img_shape=img_shape, flags=flags)
+
+
+def _calibrate_subset(task):
+    """Calibra con las vistas `train`; si hay `test`, mide su error de reproyección."""
+    train, test = task
+    obj, img = _shared['obj'], _shared['img']
+    _, K, dist, _, _ = cv2.calibrateCamera([obj[i] for i in train], [img[i] for i in train],
+                                           _shared['img_shape'], None, None,
+                                           flags=_shared['flags'])
+    params = np.concatenate([[K[0, 0], K[1, 1], K[0, 2], K[1, 2]], dist.ravel()])
+
+    held_out = np.nan
+    if test is not None and len(test):
+        # Poses de las vistas excluidas con la K/dist de este remuestreo
+        rvecs, tvecs = [], []
+        for i in test:
+            _, rvec, tvec = cv2.solvePnP(obj[i], img[i], K, dist)
+            rvecs.append(rvec)
+            tvecs.append(tvec)
+        held_out = reprojection_errors([obj[i] for i in test], [img[i] for i in test],
+                                       rvecs, tvecs, K, dist).rms
+    return params, held_out
+
+
+def resample_tasks(n_views, method='bootstrap', resamples=200, folds=5, seed=0):
+    """
+    Lista de tareas (train, test) con índices de vistas.
+    'bootstrap': V vistas con reemplazo, test=None (al menos 3 vistas distintas)
+    'kfold': k-fold repetido con permutaciones nuevas hasta juntar `resamples`
+    """
+    rng = np.random.default_rng(seed)
+    tasks = []
+    if method == 'bootstrap':
+        while len(tasks) < resamples:
+            train = rng.integers(0, n_views, n_views)
+            if len(np.unique(train)) >= 3:
+                tasks.append((train, None))
+    elif method == 'kfold':
+        folds = min(folds, n_views)
+        if n_views - n_views // folds < 3:
+            raise ValueError("Se necesitan al menos 3 vistas de entrenamiento por fold")
+        while len(tasks) < resamples:
+            for test in np.array_split(rng.permutation(n_views), folds):
+                tasks.append((np.setdiff1d(np.arange(n_views), test), test))
+        tasks = tasks[:resamples]
+    else:
+        raise ValueError(f"method debe ser uno de {METHODS}")
+    return tasks
+
+
+def calibration_uncertainty(obj_points, img_points, img_shape, method='bootstrap',
+                            resamples=200, folds=5, level=0.95, workers=None,
+                            seed=0, flags=0):
+    """
+    Recalibra `resamples` veces con subconjuntos de las vistas y retorna un
+    UncertaintyResult con intervalos de confianza por percentiles.
+
+    workers: procesos del pool (None = todos los núcleos, 1 = en serie)
+    flags: los mismos flags de cv2.calibrateCamera usados en la calibración
+    """
+    n_views = len(obj_points)
+    tasks = resample_tasks(n_views, method, resamples, folds, seed)
+
+    # Todas las vistas concatenadas: (T, 3) y (T, 2) + desplazamientos por vista
+    obj_arrays = [np.asarray(o, dtype=np.float32).reshape(-1, 3) for o in obj_points]
+    img_arrays = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in img_points]
+    offsets = np.concatenate([[0], np.cumsum([len(a) for a in obj_arrays])])
+    obj_flat, img_flat = np.concatenate(obj_arrays), np.concatenate(img_arrays)
+    img_shape = tuple(int(v) for v in img_shape)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    blocks = [_to_shared(obj_flat), _to_shared(img_flat)]
+    try:
+        init_args = ((blocks[0].name, obj_flat.shape, obj_flat.dtype),
+                     (blocks[1].name, img_flat.shape, img_flat.dtype),
+                     offsets, img_shape, flags)
+        if workers == 1:
+            _init_worker(*init_args)
+            results = [_calibrate_subset(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=init_args) as pool:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                results = list(pool.map(_calibrate_subset, tasks, chunksize=chunksize))
+    finally:
+        # En serie, soltar primero las vistas de _shared (también si un
+        # remuestreo falló) y después cerrar los bloques
+        attached = _shared.pop('blocks', ()) if workers == 1 else ()
+        _shared.clear()
+        for shm in attached + tuple(blocks):
+            try:
+                shm.close()
+            except BufferError:
+                # Todavía hay vistas vivas (p. ej. en el traceback de la
+                # excepción en curso): el mapeo se libera cuando mueran
+                pass
+        for shm in blocks:
+            shm.unlink()
+
+    samples = np.stack([params for params, _ in results])
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    held_out = np.array([h for _, h in results]) if method == 'kfold' else None
+    return UncertaintyResult(method=method, names=PARAM_NAMES[:samples.shape[1]],
+                             samples=samples, estimate=np.median(samples, axis=0),
+                             low=low, high=high, std=samples.std(axis=0, ddof=1),
+                             level=level, held_out=held_out)
+
+
+def print_uncertainty_report(result):
+    """Imprime el intervalo de confianza de cada parámetro."""
+    print(f"\nIncertidumbre de la calibración ({result.method}, "
+          f"{len(result.samples)} remuestreos, IC {result.level:.0%}):")
+    for name, est, lo, hi, std in zip(result.names, result.estimate, result.low,
+                                      result.high, result.std):
+        print(f"  {name:>3} = {est:12.5f}   [{lo:12.5f}, {hi:12.5f}]   σ = {std:.5f}")
+    if result.held_out is not None:
+        print(f"  RMS en vistas excluidas: {np.mean(result.held_out):.4f} px "
+              f"(máx {np.max(result.held_out):.4f} px)")
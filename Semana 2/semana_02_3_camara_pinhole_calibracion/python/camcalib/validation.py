@@ -0,0 +1,60 @@
+"""
+Corrección de distorsión y validación de la calibración
+apply_undistortion corrige una imagen con mapas precalculados (Undistorter)
+y compute_reprojection_error reporta el error por imagen.
+"""
+
+import cv2
+
+from . import metrics
+from .reprojection import print_reprojection_report, reprojection_errors
+from .undistorter import Undistorter
+
+
+def apply_undistortion(image_path, K, dist, save_path=None, undistorter=None):
+    """
+    Aplica corrección de distorsión a una imagen.
+    
+    undistorter: Undistorter reutilizable; sin él se crea uno para (K, dist).
+    Los mapas de corrección se construyen una sola vez por tamaño de imagen
+    (y se comparten entre llamadas), en lugar de en cada cv2.undistort.
+    """
+    with metrics.timer('calib_stage_seconds', stage='imread'):
+        img = cv2.imread(image_path)
+    if img is None:
+        print(f"No se pudo leer: {image_path}")
+        return None, None
+    
+    # Nueva matriz de cámara óptima con alpha=1: conserva todos los píxeles
+    # (alpha=0 recortaría la imagen para eliminar bordes negros)
+    if undistorter is None:
+        undistorter = Undistorter(K, dist, alpha=1)
+    
+    # Corregir distorsión
+    with metrics.timer('calib_stage_seconds', stage='undistort'):
+        undistorted = undistorter.undistort(img)
+    metrics.count('undistort_images_total')
+    
+    # Recortar región válida
+    x, y, w_roi, h_roi = undistorter.maps_for(img.shape[1::-1])[3]
+    undistorted_cropped = undistorted[y:y+h_roi, x:x+w_roi]
+    
+    if save_path:
+        with metrics.timer('calib_stage_seconds', stage='imwrite'):
+            cv2.imwrite(save_path, undistorted_cropped)
+    
+    return img, undistorted
+
+
+def compute_reprojection_error(obj_points, img_points, rvecs, tvecs, K, dist):
+    """
+    Calcula el error de reproyección para cada imagen.
+    Error bajo (< 1 px) = buena calibración.
+    
+    Todas las vistas se reproyectan en una sola pasada vectorizada
+    (ver camcalib.reprojection.reprojection_errors, que retorna también los
+    residuos por punto); aquí solo se imprime el reporte.
+    """
+    errors = reprojection_errors(obj_points, img_points, rvecs, tvecs, K, dist)
+    print_reprojection_report(errors)
+    return errors.per_view.tolist()
@@ -0,0 +1,85 @@
+"""
+Selección de las N vistas más informativas para calibrar
+Con miles de detecciones, cv2.calibrateCamera se vuelve lento y casi no gana
+precisión. Aquí cada vista se describe por:
+    - cobertura: qué celdas de una grilla sobre la imagen ocupan sus esquinas
+    - pose: rotación y dirección/distancia del tablero (rvec, tvec estimados
+      con una K inicial)
+y se elige un subconjunto de forma voraz: en cada paso entra la vista que
+más celdas nuevas cubre y más se aleja (en pose) de las ya elegidas.
+"""
+
+import cv2
+import numpy as np
+
+
+def view_features(obj_points, img_points, img_shape, grid=(8, 6)):
+    """
+    Retorna (occupancy, poses):
+        occupancy: (V, gx*gy) bool, celdas de la grilla que toca cada vista
+        poses: (V, 7) rvec, dirección de tvec y log de la distancia
+               (NaN en las vistas donde solvePnP falla)
+    """
+    w, h = img_shape
+    gx, gy = grid
+    occupancy = np.zeros((len(img_points), gx * gy), dtype=bool)
+    for i, pts in enumerate(img_points):
+        pts = pts.reshape(-1, 2)
+        cx = np.clip((pts[:, 0] * gx / w).astype(int), 0, gx - 1)
+        cy = np.clip((pts[:, 1] * gy / h).astype(int), 0, gy - 1)
+        occupancy[i, cy * gx + cx] = True
+
+    # Poses aproximadas con una K inicial (sin distorsión): basta para
+    # comparar vistas entre sí
+    K0 = cv2.initCameraMatrix2D([o.astype(np.float32) for o in obj_points],
+                                [p.astype(np.float32) for p in img_points], img_shape)
+    poses = np.full((len(img_points), 7), np.nan)
+    for i, (obj, pts) in enumerate(zip(obj_points, img_points)):
+        ok, rvec, tvec = cv2.solvePnP(obj, pts, K0, None, flags=cv2.SOLVEPNP_IPPE)
+        tvec = tvec.ravel()
+        dist = np.linalg.norm(tvec)
+        if not ok or not dist > 0:
+            continue
+        poses[i] = np.concatenate([rvec.ravel(), tvec / dist, [np.log(dist)]])
+    return occupancy, poses
+
+
+def select_views(obj_points, img_points, img_shape, n, grid=(8, 6), pose_weight=1.0):
+    """
+    Elige de forma voraz `n` vistas.
+
+    Ganancia de una vista candidata = celdas nuevas que cubre (normalizadas)
+    + pose_weight * distancia de su pose a la vista elegida más cercana
+    (normalizada por la dispersión de todas las poses). Las vistas sin pose
+    (solvePnP falló) no entran en la normalización ni en las distancias:
+    compiten solo por cobertura.
+    Retorna la lista de índices elegidos, en el orden en que se eligieron.
+    """
+    n_views = len(img_points)
+    if n >= n_views:
+        return list(range(n_views))
+
+    occupancy, poses = view_features(obj_points, img_points, img_shape, grid)
+    valid = np.isfinite(poses).all(axis=1)
+    if valid.any():
+        poses = (poses - poses[valid].mean(axis=0)) / (poses[valid].std(axis=0) + 1e-12)
+    poses[~valid] = 0.0
+    cell_weight = 1.0 / occupancy.shape[1]
+
+    covered = np.zeros(occupancy.shape[1], dtype=bool)
+    # Distancia de cada vista a la vista elegida más cercana (en pose)
+    nearest = np.full(n_views, np.inf)
+    available = np.ones(n_views, dtype=bool)
+    selected = []
+    for _ in range(n):
+        new_cells = (occupancy & ~covered).sum(axis=1) * cell_weight
+        novelty = np.where(valid & ~np.isinf(nearest), nearest, 0.0) / np.sqrt(poses.shape[1])
+        gain = np.where(available, new_cells + pose_weight * novelty, -np.inf)
+        best = int(np.argmax(gain))
+
+        selected.append(best)
+        available[best] = False
+        covered |= occupancy[best]
+        if valid[best]:
+            nearest = np.minimum(nearest, np.linalg.norm(poses - poses[best], axis=1))
+    return selected
@@ -1,32 +1,235 @@
-"""Captura imágenes del patrón de ajedrez con la webcam."""
-import cv2
+"""
+Captura imágenes del patrón de ajedrez con la webcam.
+
+La cámara se lee en un hilo aparte (buffer circular), el tablero se detecta
+en una copia reducida en otro hilo y las imágenes se guardan en segundo
+plano, así la vista previa va a los fps de la cámara. Con AUTO_CAPTURE se
+guarda sola cada pose nueva y estable del tablero; ESPACIO guarda a mano.
+
+La fuente también puede ser un video o una carpeta de imágenes, y con
+--headless corre sin ventana (CI, reproducir una sesión grabada):
+    python capture_images.py
+    python capture_images.py --source sesion.mp4 --fps 30
+    python capture_images.py --source ../synthetic/cam_00 --headless \
+        --out /tmp/capturas --calibrate
+"""
+
+import argparse
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from camcalib.capture import (AsyncSaver, DetectionWorker, FrameRing, Grabber,
+                              PoseNovelty)
+from camcalib.corner_detection import refine_in_roi
+from camcalib.online import OnlineCalibrator, format_estimate
+from camcalib.sources import open_source
+from camcalib.tracking import CornerTracker
+
+CAMERA_INDEX    = 0
+CHESSBOARD_COLS = 9   # Esquinas INTERNAS (como en 04_calibration.py)
+CHESSBOARD_ROWS = 6
+SQUARE_SIZE_MM  = 25.0  # Para --calibrate y --online
+OUT_DIR         = '../calibration_images'
+RING_SIZE       = 8     # Cuadros en el buffer circular
+DETECT_WIDTH    = 640   # Ancho de la copia reducida donde se busca el tablero
+AUTO_CAPTURE    = True  # Guardar automáticamente cada pose nueva
+MIN_POSE_CHANGE = 0.05  # Desplazamiento mínimo (fracción de la diagonal) para una pose nueva
+MIN_INTERVAL_S  = 1.0   # Tiempo mínimo entre capturas automáticas
+ONLINE_VIEWS    = 30    # Vistas con que recalibra la calibración en línea
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--source', default=str(CAMERA_INDEX),
+                        help='índice de cámara, archivo de video o carpeta de imágenes')
+    parser.add_argument('--out', default=OUT_DIR, help='carpeta de las capturas')
+    parser.add_argument('--headless', action='store_true',
+                        help='sin ventana: solo captura automática hasta que termine la fuente')
+    parser.add_argument('--fps', type=float, default=None,
+                        help='ritmo de reproducción de videos/carpetas (por defecto, lo más rápido posible)')
+    parser.add_argument('--every', type=int, default=1, help='usar uno de cada N cuadros')
+    parser.add_argument('--max-fps', type=float, default=None, help='descartar cuadros por encima de estos fps')
+    parser.add_argument('--prefetch', type=int, default=8, help='cuadros decodificados por adelantado')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='al terminar, calibrar con las imágenes capturadas')
+    parser.add_argument('--online', action='store_true',
+                        help='calibrar en línea con cada captura y avisar cuando converja')
+    parser.add_argument('--online-strategy', choices=('reservoir', 'sliding'),
+                        default='reservoir')
+    parser.add_argument('--stop-when-converged', action='store_true',
+                        help='con --online, terminar la captura al converger')
+    parser.add_argument('--track', action='store_true',
+                        help='seguir las esquinas entre cuadros (flujo óptico) en vez de detectarlas en cada uno')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    board = (CHESSBOARD_COLS, CHESSBOARD_ROWS)
+    try:
+        source = open_source(args.source, fps=args.fps, prefetch=args.prefetch,
+                             every=args.every, max_fps=args.max_fps)
+    except OSError as e:
+        raise SystemExit(str(e))
+
+    # Sin ventana y con una fuente de archivo no hay prisa: no perder cuadros
+    ring = FrameRing(RING_SIZE, lossless=args.headless and not source.live)
+    grabber = Grabber(source, ring)
+    saver = AsyncSaver()
+    lock = threading.Lock()
+    state = {'count': 0, 'last_auto': 0.0, 'novelty': None, 'online': None}
+    # Un solo hilo para la calibración en línea: no frena la detección
+    online_pool = ThreadPoolExecutor(max_workers=1) if args.online else None
+
+    def online_add(frame, corners):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        online = state['online']
+        if online is None:
+            online = state['online'] = OnlineCalibrator(
+                gray.shape[::-1], board, SQUARE_SIZE_MM, max_views=ONLINE_VIEWS,
+                strategy=args.online_strategy)
+        was_converged = online.converged
+        est = online.add(refine_in_roi(gray, corners))
+        if est is None:
+            return
+        print(f"En línea: {format_estimate(est)}")
+        if est.converged and not was_converged:
+            print("La calibración en línea convergió: ya hay suficientes vistas")
+            if args.stop_when_converged:
+                grabber.stop()
+                ring.close()
+
+    def online_done(future):
+        # Los errores del hilo de calibración en línea no deben perderse en silencio
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            print(f"En línea: no se pudo agregar la vista ({type(error).__name__}: {error})")
+
+    def save(frame):
+        with lock:
+            fname = os.path.join(args.out, f"calib_{state['count']:03d}.jpg")
+            state['count'] += 1
+        saver.save(frame, fname)
+        print(f"Guardando: {fname}")
+
+    def on_result(det):
+        # Corre en el hilo de detección: decide la captura automática
+        novelty = state['novelty']
+        if novelty is None:
+            # Las imágenes de una carpeta son fotos fijas: no hace falta estabilidad
+            novelty = state['novelty'] = PoseNovelty(
+                det.frame.shape[1::-1], board, min_change=MIN_POSE_CHANGE,
+                max_motion=None if os.path.isdir(args.source) else 0.01)
+        if not det.found:
+            novelty.reset_motion()
+            return
+        # Reproduciendo sin ventana el tiempo real no importa: solo la pose
+        min_interval = 0.0 if ring.lossless else MIN_INTERVAL_S
+        if ((AUTO_CAPTURE or args.headless) and novelty.is_new(det.corners) and
+                det.t_done - state['last_auto'] > min_interval):
+            novelty.accept(det.corners)
+            state['last_auto'] = det.t_done
+            save(det.frame)
+            if online_pool is not None:
+                online_pool.submit(online_add, det.frame, det.corners).add_done_callback(
+                    online_done)
+
+    tracker = CornerTracker(board) if args.track else None
+    detector = DetectionWorker(ring, board, DETECT_WIDTH, on_result=on_result,
+                               tracker=tracker)
+    t_start = time.perf_counter()
+    grabber.start()
+    detector.start()
+
+    if args.headless:
+        try:
+            detector.join()
+        except KeyboardInterrupt:
+            pass
+        grabber.stop()
+        ring.close()
+        grabber.join(timeout=2.0)
+        if online_pool is not None:
+            online_pool.shutdown()
+        saver.close()
+        source.release()
+        elapsed = time.perf_counter() - t_start
+        print(f"{grabber.grabbed} cuadros en {elapsed:.2f} s ({grabber.grabbed / elapsed:.1f} fps), "
+              f"{detector.processed} analizados, tablero en {detector.found}, "
+              f"{saver.saved} capturas en {args.out}")
+        if tracker is not None:
+            print(f"Seguimiento: {tracker.tracked} cuadros seguidos, "
+                  f"{tracker.detected} detecciones ({tracker.lost} pérdidas)")
+        if args.calibrate:
+            from camcalib import calibrate_camera
+            calibrate_camera(os.path.join(args.out, '*.jpg'), board, SQUARE_SIZE_MM,
+                             workers=None)
+        raise SystemExit(0)
+
+    print("Presiona ESPACIO para capturar, Q para salir")
+    print("Captura al menos 10 imágenes desde diferentes ángulos")
+    if AUTO_CAPTURE:
+        print("Captura automática activa: mueve el tablero a poses distintas y sostenlo quieto")
+
+    last_seq = -1
+    dropped = 0
+    latency = 0.0
+    preview_fps = 0.0
+    t_last = time.perf_counter()
+
+    while True:
+        item = ring.latest(after=last_seq, timeout=1.0)
+        if item is None:
+            if ring.closed:
+                break
+            continue
+        # Cuadros que la vista previa nunca mostró
+        dropped += item.seq - last_seq - 1
+        last_seq = item.seq
+
+        now = time.perf_counter()
+        latency = 0.9 * latency + 0.1 * (now - item.t_grab)
+        dt = now - t_last
+        t_last = now
+        if dt > 0:
+            preview_fps = 0.9 * preview_fps + 0.1 / dt
+
+        # Dibujar sobre una copia: el mismo cuadro puede estar guardándose
+        display = item.frame.copy()
+        det = detector.result
+        if det is not None and det.found:
+            cv2.drawChessboardCorners(display, board, det.corners.astype('float32'), True)
+        status = 'TABLERO' if det is not None and det.found else 'sin tablero'
+        lines = [
+            f"Capturas: {state['count']} (pendientes {saver.pending}) | {status}",
+            f"camara {grabber.fps:.0f} fps | vista {preview_fps:.0f} fps | perdidos {dropped}",
+            f"latencia {latency*1000:.0f} ms | deteccion {detector.latency*1000:.0f} ms",
+            "ESPACIO=capturar Q=salir",
+        ]
+        if state['online'] is not None and state['online'].estimate is not None:
+            lines.insert(3, format_estimate(state['online'].estimate))
+        for i, text in enumerate(lines):
+            cv2.putText(display, text, (10, 30 + 28 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.7, (0, 255, 0), 2)
+        cv2.imshow('Calibración - Muestra el patrón de ajedrez', display)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord(' '):
+            save(item.frame)
+        elif key == ord('q'):
+            break
 
-os.makedirs('../calibration_images', exist_ok=True)
-cap = cv2.VideoCapture(0)
-count = 0
-
-print("Presiona ESPACIO para capturar, Q para salir")
-print(f"Captura al menos 10 imágenes desde diferentes ángulos")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    cv2.putText(frame, f'Capturas: {count} | ESPACIO=capturar Q=salir',
-                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-    cv2.imshow('Calibración - Muestra el patrón de ajedrez', frame)
-    
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord(' '):
-        fname = f'../calibration_images/calib_{count:03d}.jpg'
-        cv2.imwrite(fname, frame)
-        print(f"Guardado: {fname}")
-        count += 1
-    elif key == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-print(f"Total capturas: {count}")
\ No newline at end of file
+    grabber.stop()
+    detector.stop()
+    ring.close()
+    grabber.join(timeout=2.0)
+    detector.join(timeout=2.0)
+    if online_pool is not None:
+        online_pool.shutdown()
+    saver.close()
+    source.release()
+    cv2.destroyAllWindows()
+    print(f"Total capturas: {saver.saved} ({saver.skipped} descartadas por cola llena, "
+          f"{dropped} cuadros no mostrados)")
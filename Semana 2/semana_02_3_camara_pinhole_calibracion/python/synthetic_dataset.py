@@ -0,0 +1,38 @@
+"""
+Generador de datasets sintéticos de calibración a gran escala
+(línea de comandos de camcalib.dataset)
+
+Uso:
+    python synthetic_dataset.py ../synthetic --cameras 8 --views 200
+    python synthetic_dataset.py ../synthetic --resolutions 640x480 1920x1080 --seed 7
+"""
+
+import argparse
+
+from camcalib.dataset import DEFAULT_RESOLUTIONS, generate_dataset, parse_resolution
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('out_dir', help='carpeta de salida')
+    parser.add_argument('--cameras', type=int, default=4, help='modelos de cámara')
+    parser.add_argument('--views', type=int, default=50, help='imágenes por cámara')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--resolutions', type=parse_resolution, nargs='+',
+                        default=list(DEFAULT_RESOLUTIONS), help='p. ej. 1280x960')
+    parser.add_argument('--board', type=float, nargs=3, default=(9, 6, 30.0),
+                        metavar=('COLS', 'ROWS', 'SQUARE_MM'))
+    parser.add_argument('--noise', type=float, default=3.0, help='ruido del sensor (niveles de gris)')
+    parser.add_argument('--supersample', type=int, default=2)
+    parser.add_argument('--quality', type=int, default=95, help='calidad JPEG')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.cameras < 1 or args.views < 1:
+        parser.error("--cameras y --views deben ser >= 1")
+
+    cols, rows, square = args.board
+    generate_dataset(args.out_dir, n_cameras=args.cameras, views_per_camera=args.views,
+                     seed=args.seed, resolutions=args.resolutions,
+                     board=(int(cols), int(rows), square), noise_sigma=args.noise,
+                     supersample=args.supersample, quality=args.quality,
+                     workers=args.workers)